@@ -25,15 +25,31 @@ opendata_swiss_base_dir = r"06_Final_Workflow\data\01_opendata.swiss"
 opendata_swiss_list_datasets_save_path = opendata_swiss_base_dir + r"\opendata_swiss_datasets.csv"
 open_data_swiss_data_folder = opendata_swiss_base_dir + r"\saved_metadata_xml"
 MAX_DATASETS = None
-
-download_opendata_swiss.gather_opendata_swiss_datasets(opendata_swiss_list_datasets_save_path)
-download_opendata_swiss.download_opendata_swiss_xml(opendata_swiss_list_datasets_save_path,open_data_swiss_data_folder,MAX_DATASETS)
+DOWNLOAD_WORKERS = download_opendata_swiss.DOWNLOAD_WORKERS  # 1 = sequential download
+INCREMENTAL_HARVEST = True  # only download datasets modified since the last successful run
+CATALOG_HARVEST = False  # download all datasets from the paged DCAT catalogue (a few hundred requests) instead of one request per dataset
+TABLE_FORMAT = "csv"  # "parquet": intermediate tables with list and timestamp columns (requires pyarrow)
+INCREMENTAL_EXTRACTION = False  # only parse the new and changed datasets and upsert them into the extracted_tables of each portal
+CHANGE_HASH_MODE = "sha256"  # "semantic": only changed titles, descriptions, keywords, distributions or contacts count as 'changed'
+
+# The first incremental extraction seeds the extracted_tables: every dataset is downloaded and the unchanged documents are kept for it
+from functions.extracted_tables import extracted_table_exists
+opendata_swiss_seed = INCREMENTAL_EXTRACTION and not extracted_table_exists(opendata_swiss_base_dir, "opendata_dataset_metadata")
+
+# Packed metadata store instead of one XML file per dataset (loose files of earlier runs are moved into it)
+from functions.metadata_store import MetadataStore, METADATA_STORE_FILE
+opendata_swiss_store = MetadataStore(opendata_swiss_base_dir + "\\" + METADATA_STORE_FILE)
+opendata_swiss_store.import_folder(open_data_swiss_data_folder)
+
+if CATALOG_HARVEST:
+    download_opendata_swiss.download_opendata_swiss_catalog(open_data_swiss_data_folder,MAX_DATASETS,store=opendata_swiss_store,clean_xml=True)
+else:
+    download_opendata_swiss.gather_opendata_swiss_datasets(opendata_swiss_list_datasets_save_path, incremental=INCREMENTAL_HARVEST and not opendata_swiss_seed)
+    download_opendata_swiss.download_opendata_swiss_xml(opendata_swiss_list_datasets_save_path,open_data_swiss_data_folder,MAX_DATASETS,workers=DOWNLOAD_WORKERS,store=opendata_swiss_store,clean_xml=True,full_download=opendata_swiss_seed)
 
 
 # # # # 1.2 Clean metadata
-from functions import xml_cleaner
-xml_cleaner.PORTAL_NAME = "opendata.swiss"
-xml_cleaner.process_folder(open_data_swiss_data_folder)
+# Done during the download (clean_xml=True); xml_cleaner.process_folder is only needed for XML saved without cleaning
 
 # # # 1.3 Compare metadata
 from functions.dataset_change_detector import compare_dataset_hashes
@@ -41,15 +57,29 @@ compare_dataset_hashes(
     base_dir=opendata_swiss_base_dir,
     remove_order_file=opendata_swiss_base_dir + r"\removeorder_metadata_opendata.swiss.csv",
     extension="xml",
-    portal_name="opendata.swiss"
+    portal_name="opendata.swiss",
+    store=opendata_swiss_store,
+    hash_mode=CHANGE_HASH_MODE,
+    keep_found=opendata_swiss_seed
 )
 
 # # 1.4 Extract and export metadata
+# A new database is loaded with every current dataset of the extracted_tables instead of the delta of this run
+from functions.load_metadata import database_exists
+LOAD_ALL_DATASETS = INCREMENTAL_EXTRACTION and not database_exists(db_name, confing_file_path_db)
+
 from functions.extract_metadata_opendata_swiss import extract_and_save_all_opendata_swiss
 extract_and_save_all_opendata_swiss(
     folder_path=open_data_swiss_data_folder,
-    output_folder=opendata_swiss_base_dir
+    output_folder=opendata_swiss_base_dir,
+    store=opendata_swiss_store,
+    table_format=TABLE_FORMAT,
+    incremental=INCREMENTAL_EXTRACTION,
+    export_all=LOAD_ALL_DATASETS
 )
+if opendata_swiss_seed:
+    from functions.dataset_change_detector import remove_found_documents
+    remove_found_documents(opendata_swiss_base_dir, "xml", store=opendata_swiss_store)
 
 # 1.5 Transform extracted metadata
 from functions.transform_metadata_opendata_swiss import transform_opendata_swiss
@@ -61,6 +91,9 @@ transform_opendata_swiss(opendata_swiss_base_dir)
 
 geocat_base_dir = r"06_Final_Workflow\data\02_geocat.ch"
 geocat_data_folder = geocat_base_dir + r"\saved_metadata_xml"
+geocat_store = MetadataStore(geocat_base_dir + "\\" + METADATA_STORE_FILE)
+geocat_store.import_folder(geocat_data_folder)
+geocat_seed = INCREMENTAL_EXTRACTION and not extracted_table_exists(geocat_base_dir, "geocat_dataset_metadata")
 
 
 # 2.1 Download metadata
@@ -74,19 +107,21 @@ download_geocat_metadata(
 )
 
 # XML-Dateien einzeln aus der CSV herunterladen
-from functions.download_geocat import download_xml_metadata_from_csv
+from functions.download_geocat import download_xml_metadata_from_csv, DOWNLOAD_WORKERS
 download_xml_metadata_from_csv(
     save_dir= geocat_base_dir,
     csv_file="geocat_dataset_id_title.csv",
-    max_files= None  # oder None für alle
+    max_files= None,  # oder None für alle
+    workers= DOWNLOAD_WORKERS,  # 1 = sequentieller Download
+    store= geocat_store,
+    clean_xml= True,  # XML wird direkt beim Download bereinigt
+    full_download= geocat_seed
 )
 
 
 
 # 2.2 Clean metadata
-from functions import xml_cleaner
-xml_cleaner.PORTAL_NAME = "geocat.ch"
-xml_cleaner.process_folder(geocat_data_folder)
+# Done during the download (clean_xml=True)
 
 # 2.3 Compare metadata
 from functions.dataset_change_detector import compare_dataset_hashes
@@ -94,15 +129,27 @@ compare_dataset_hashes(
     base_dir=geocat_base_dir,
     remove_order_file= geocat_base_dir + r"\removeorder_metadata_geocat.ch.csv",
     extension="xml",
-    portal_name="geocat.ch"
+    portal_name="geocat.ch",
+    store=geocat_store,
+    hash_mode=CHANGE_HASH_MODE,
+    keep_found=geocat_seed
 )
 
 # 2.4 Extract and export metadata
 from functions.extract_metadata_geocat import extract_and_save_all_geocat
+EXTRACTION_WORKERS = 1  # >1 extracts with a process pool; requires running this script under `if __name__ == "__main__":` on Windows
 extract_and_save_all_geocat(
     input_folder= geocat_data_folder,
-    output_folder= geocat_base_dir
+    output_folder= geocat_base_dir,
+    store= geocat_store,
+    workers= EXTRACTION_WORKERS,
+    table_format= TABLE_FORMAT,
+    incremental= INCREMENTAL_EXTRACTION,
+    export_all= LOAD_ALL_DATASETS
 )
+if geocat_seed:
+    from functions.dataset_change_detector import remove_found_documents
+    remove_found_documents(geocat_base_dir, "xml", store=geocat_store)
 
 # 2.5 Transform extracted metadata
 from functions.transform_metadata_geocat import process_dataset_metadata, clean_csv_file
@@ -0,0 +1,87 @@
+"""
+Benchmark: geocat value cleaning
+
+Compares the former cleaning of `transform_metadata_geocat.clean_csv_file` (`df.applymap(clean_value)`,
+one `ast.literal_eval` per cell) with the column-wise `clean_column` (string operations, only
+possible list literals parsed, once per distinct value) on the three extracted geocat tables.
+Reports the cleaning time per table (reading and writing excluded) and checks that both give
+identical cells.
+
+Usage (from the repository root, on the tables written by the extraction, before the transformation):
+    python 06_Final_Workflow/benchmarks/benchmark_clean_csv.py --folder 06_Final_Workflow/data/02_geocat.ch
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.table_io import resolve_table_path, read_table
+from functions.transform_metadata_geocat import clean_value, clean_column
+
+TABLES = ["geocat_dataset_metadata", "geocat_distribution_metadata", "geocat_contact_point_metadata"]
+
+
+def legacy_clean(df):
+    """Former cleaning: `clean_value` on every cell."""
+    # DataFrame.applymap was renamed to DataFrame.map in pandas 2.1
+    apply_cells = df.map if hasattr(df, "map") else df.applymap
+    return apply_cells(clean_value)
+
+
+def column_clean(df):
+    """Current cleaning of `clean_csv_file`."""
+    df = df.copy()
+    for column in df.columns:
+        df[column] = clean_column(df[column])
+    return df
+
+
+def identical(expected, actual):
+    """True if both tables have the same columns and the same cells (values and types)."""
+    if list(expected.columns) != list(actual.columns):
+        return False
+    return all(
+        all(a == b and type(a) is type(b) for a, b in zip(expected[column].tolist(), actual[column].tolist()))
+        for column in expected.columns
+    )
+
+
+def timed(function, df, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(df)
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+
+def run(folder, repeat):
+    for name in TABLES:
+        path = resolve_table_path(os.path.join(folder, name + ".csv"))
+        if not os.path.exists(path):
+            print(f"{name}: not found in {folder}, skipped")
+            continue
+        df = read_table(path, dtype=str)
+        expected, legacy_time = timed(legacy_clean, df, repeat)
+        actual, column_time = timed(column_clean, df, repeat)
+        print(f"{name}")
+        print(f"Cells:             {df.size} ({len(df)} rows x {len(df.columns)} columns)")
+        print(f"applymap:          {legacy_time * 1e3:.1f} ms (median of {repeat})")
+        print(f"clean_column:      {column_time * 1e3:.1f} ms (median of {repeat})")
+        print(f"Speedup:           {legacy_time / column_time:.1f}x")
+        print(f"Identical cells:   {identical(expected, actual)}")
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the column-wise geocat value cleaning against applymap(clean_value).")
+    parser.add_argument("--folder", default=r"06_Final_Workflow\data\02_geocat.ch",
+                        help="Folder with the extracted geocat tables")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of repetitions")
+    args = parser.parse_args()
+
+    run(args.folder, args.repeat)
@@ -0,0 +1,452 @@
+"""
+Benchmark: field mapping engine
+
+Compares the former hand-written extractors (`extract_metadata_opendata_swiss.extract_metadata_from_xml`
+with ElementTree `find` / `findall` calls, `extract_metadata_geocat.extract_metadata` with one
+`PathIndex` lookup per field) with the declarative `OPENDATA_SWISS_MAPPING` and `GEOCAT_MAPPING`
+evaluated by `field_mapping`. Reports the per-record latency (mean, median, 95th percentile,
+parsing included) per portal, checks that both return identical records and prints the size of the
+compiled plans.
+
+Usage (from the repository root):
+    python 06_Final_Workflow/benchmarks/benchmark_field_mapping.py --opendata 06_Final_Workflow/data/01_opendata.swiss/saved_metadata_xml --geocat 06_Final_Workflow/data/02_geocat.ch/saved_metadata_xml
+
+Paths to `saved_metadata.sqlite` metadata stores can be given instead of folders; a portal without
+a path is skipped.
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.error_logger import log_error
+from functions.extract_metadata_geocat import extract_metadata, GEOCAT_MAPPING
+from functions.extract_metadata_opendata_swiss import extract_metadata_from_xml, OPENDATA_SWISS_MAPPING
+from functions.metadata_store import MetadataStore, iter_documents
+from functions.xml_path_index import PathIndex
+
+
+# Verbatim copy of the former opendata.swiss extractor (renamed)
+def extract_multilang_elements(element_name, dataset_element, namespace, default_label):
+    elements = {}
+    collected_values = {}
+    for element in dataset_element.findall(f".//{element_name}", namespace):
+        lang_attr = element.get("{http://www.w3.org/XML/1998/namespace}lang", "unknown").upper()
+        text_value = element.text.strip() if element.text else "N/A"
+        collected_values.setdefault(lang_attr, []).append(text_value)
+    for lang, values in collected_values.items():
+        elements[f"{default_label}_{lang}"] = ", ".join(values)
+    if not elements:
+        elements[f"{default_label}_UNKNOWN"] = "N/A"
+    return elements
+
+def extract_text(element, tag, namespace, default="N/A"):
+    found_element = element.find(tag, namespace)
+    return found_element.text.strip() if found_element is not None and found_element.text else default
+
+def extract_attribute(element, tag, attribute, namespace, default="N/A"):
+    found_element = element.find(tag, namespace)
+    return found_element.get(attribute, default) if found_element is not None else default
+
+def extract_identifier(dataset_element, namespace):
+    identifier_element = dataset_element.find("dct:identifier", namespace)
+    return identifier_element.text if identifier_element is not None else "N/A"
+
+def extract_list(element, tag, namespace):
+    return [elem.text.strip() for elem in element.findall(tag, namespace) if elem.text] or ["N/A"]
+
+def extract_issued_date(distribution_element, namespace):
+    issued_element = distribution_element.find(".//dct:issued", namespace)
+    return issued_element.text if issued_element is not None else "N/A"
+
+def extract_publisher(dataset_element, namespace):
+    publisher_element = dataset_element.find("dct:publisher/foaf:Organization", namespace)
+    if publisher_element is not None:
+        publisher_url = publisher_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about", "N/A")
+        publisher_name_element = publisher_element.find("foaf:name", namespace)
+        publisher_name = publisher_name_element.text.strip() if publisher_name_element is not None else "N/A"
+    else:
+        publisher_url, publisher_name = "N/A", "N/A"
+    return {"dataset_publisher_url": publisher_url, "dataset_publisher_name": publisher_name}
+
+def extract_distributions(dataset_element, namespace, dataset_id):
+    distributions = []
+    for distribution_element in dataset_element.findall(".//dcat:Distribution", namespace):
+        access_url_element = distribution_element.find("dcat:accessURL", namespace)
+        access_url = access_url_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if access_url_element is not None else "N/A"
+        license_element = distribution_element.find("dct:license", namespace)
+        license_url = license_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if license_element is not None else "N/A"
+        rights_element = distribution_element.find("dct:rights", namespace)
+        rights_text = rights_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if rights_element is not None else "N/A"
+        byte_size_element = distribution_element.find("dcat:byteSize", namespace)
+        byte_size = byte_size_element.text if byte_size_element is not None else "N/A"
+        format_element = distribution_element.find("dct:format", namespace)
+        format_url = format_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if format_element is not None else "N/A"
+        media_type_element = distribution_element.find("dcat:mediaType", namespace)
+        media_type = media_type_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if media_type_element is not None else "N/A"
+        modified_element = distribution_element.find("dct:modified", namespace)
+        modified_date = modified_element.text if modified_element is not None else "N/A"
+        languages = [lang.text.strip() for lang in distribution_element.findall("dct:language", namespace) if lang.text] or ["N/A"]
+        distribution_titles = extract_multilang_elements("dct:title", distribution_element, namespace, "distribution_title")
+        distribution_descriptions = extract_multilang_elements("dct:description", distribution_element, namespace, "distribution_description")
+        distribution_identifier_element = distribution_element.find("dct:identifier", namespace)
+        distribution_identifier = distribution_identifier_element.text.strip() if distribution_identifier_element is not None else "N/A"
+        download_url_element = distribution_element.find("dcat:downloadURL", namespace)
+        download_url = download_url_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if download_url_element is not None else "N/A"
+        documentation_element = distribution_element.find(".//foaf:page/foaf:Document", namespace)
+        documentation_url = documentation_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about", "N/A") if documentation_element is not None else "N/A"
+        distribution_temporal_resolution_element = distribution_element.find("dcat:temporalResolution", namespace)
+        distribution_temporal_resolution = distribution_temporal_resolution_element.text if distribution_temporal_resolution_element is not None else "N/A"
+        coverage_elements = [elem.text.strip() for elem in distribution_element.findall("{http://purl.org/dc/terms/}coverage") if elem.text]
+        coverage = coverage_elements if coverage_elements else ["N/A"]
+        distribution_entry = {
+            "dataset_identifier": dataset_id,
+            "distribution_id": distribution_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about", "N/A"),
+            "distribution_issued_date": extract_issued_date(distribution_element, namespace),
+            "distribution_modified_date": modified_date,
+            "distribution_access_url": access_url,
+            "distribution_license": license_url,
+            "distribution_rights": rights_text,
+            "distribution_byte_size": byte_size,
+            "distribution_format": format_url,
+            "distribution_media_type": media_type,
+            "distribution_language": languages,
+            "distribution_download_url": download_url,
+            "distribution_coverage": coverage,
+            "distribution_temporal_resolution": distribution_temporal_resolution,
+            "distribution_documentation": documentation_url,
+            "distribution_identifier": distribution_identifier,
+            "origin": "opendata.swiss"
+        }
+        distribution_entry.update(distribution_titles)
+        distribution_entry.update(distribution_descriptions)
+        distributions.append(distribution_entry)
+    return distributions
+
+def extract_contact_points(dataset_element, namespace, dataset_id):
+    contact_points = []
+    for contact_element in dataset_element.findall(".//dcat:contactPoint", namespace):
+        organization_element = contact_element.find("vcard:Organization", namespace)
+        individual_element = contact_element.find("vcard:Individual", namespace)
+        if organization_element is not None:
+            contact_type = "Organization"
+            email_element = organization_element.find("vcard:hasEmail", namespace)
+            email = email_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if email_element is not None else "N/A"
+            name_element = organization_element.find("vcard:fn", namespace)
+            name = name_element.text.strip() if name_element is not None else "N/A"
+        elif individual_element is not None:
+            contact_type = "Individual"
+            email_element = individual_element.find("vcard:hasEmail", namespace)
+            email = email_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if email_element is not None else "N/A"
+            name_element = individual_element.find("vcard:fn", namespace)
+            name = name_element.text.strip() if name_element is not None else "N/A"
+        else:
+            continue
+        contact_points.append({
+            "dataset_identifier": dataset_id,
+            "contact_type": contact_type,
+            "contact_email": email,
+            "contact_name": name,
+            "origin": "opendata.swiss"
+        })
+    return contact_points
+
+def legacy_extract_metadata_from_xml(xml_file, xml_filename):
+    # xml_file: file path or binary file object (e.g. a document of the MetadataStore)
+    tree = ET.parse(xml_file)
+    root = tree.getroot()
+    namespace = {
+        "dct": "http://purl.org/dc/terms/",
+        "foaf": "http://xmlns.com/foaf/0.1/",
+        "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+        "dcat": "http://www.w3.org/ns/dcat#",
+        "vcard": "http://www.w3.org/2006/vcard/ns#",
+        "xml": "http://www.w3.org/XML/1998/namespace",
+        "schema": "http://schema.org/",
+        "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    }
+    dataset_element = root.find(".//dcat:Dataset", namespace)
+    if dataset_element is None:
+        return {}, [], []
+    dataset_id = extract_identifier(dataset_element, namespace)
+    sorted_keywords = extract_multilang_elements("dcat:keyword", dataset_element, namespace, "dataset_keyword")
+    dataset_descriptions = extract_multilang_elements("dct:description", dataset_element, namespace, "dataset_description")
+    dataset_titles = extract_multilang_elements("dct:title", dataset_element, namespace, "dataset_title")
+    distributions = extract_distributions(dataset_element, namespace, dataset_id)
+    contact_points = extract_contact_points(dataset_element, namespace, dataset_id)
+    dataset_language = [lang.text.strip() for lang in dataset_element.findall("dct:language", namespace) if lang.text] or ["N/A"]
+    dataset_metadata = {
+        "dataset_identifier": dataset_id,
+        "origin": "opendata.swiss",
+        "dataset_language" : dataset_language
+    }
+    dataset_metadata.update(sorted_keywords)
+    dataset_metadata.update(dataset_descriptions)
+    dataset_metadata.update(dataset_titles)
+    return dataset_metadata, distributions, contact_points
+
+
+# Verbatim copy of the former geocat extractor (renamed)
+def legacy_extract_metadata(xml_file):
+    """
+    Extract metadata fields from a GeoCat XML metadata file.
+
+    The tree is walked once to build a `PathIndex`; all field paths are evaluated on the index
+    with the same results as `Element.find` / `findall`.
+
+    Parameters:
+        xml_file (str or file object): Path to the XML metadata file, or a binary file object.
+
+    Returns:
+        tuple: A tuple containing extracted values.
+    """
+    try:
+        tree = ET.parse(xml_file)
+        root = tree.getroot()
+    except Exception as e:
+        log_error(f"Failed to parse XML file: {xml_file}", exception=e)
+        raise
+
+    namespace = {
+        "gmd": "http://www.isotc211.org/2005/gmd",
+        "gco": "http://www.isotc211.org/2005/gco",
+        "che": "http://www.geocat.ch/2008/che",
+        "xsi": "http://www.w3.org/2001/XMLSchema-instance"
+    }
+
+    index = PathIndex(root, namespace)
+
+    def safe_find_text(path, default="N/A"):
+        try:
+            el = index.find(path)
+            return el.text.strip() if el is not None and el.text else default
+        except Exception as e:
+            log_error(f"Error extracting path '{path}' in {xml_file}", exception=e)
+            return default
+
+    def safe_find_all(path):
+        try:
+            return index.findall(path)
+        except Exception as e:
+            log_error(f"Error finding all elements at '{path}' in {xml_file}", exception=e)
+            return []
+
+    file_identifier = safe_find_text(".//gmd:fileIdentifier/gco:CharacterString")
+
+    dataset_language = safe_find_text(".//gmd:language/gmd:LanguageCode")
+    if dataset_language == "N/A":
+        dataset_language = safe_find_text(".//gmd:language/gco:CharacterString")
+
+    titles = {}
+    titles["dataset_title"] = safe_find_text(".//gmd:identificationInfo//gmd:citation//gmd:title/gco:CharacterString")
+    try:
+        title_localized_element = index.find(".//gmd:identificationInfo//gmd:citation//gmd:title/gmd:PT_FreeText")
+        if title_localized_element is not None:
+            for text_group in index.findall("gmd:textGroup/gmd:LocalisedCharacterString", title_localized_element):
+                locale = text_group.attrib.get("locale", "").replace("#", "").strip()
+                if text_group.text:
+                    titles[f"dataset_title_{locale}"] = text_group.text.strip()
+    except Exception as e:
+        log_error(f"Failed to extract localized titles from {xml_file}", exception=e)
+
+    descriptions = {}
+    descriptions["dataset_description"] = safe_find_text(".//gmd:identificationInfo//gmd:abstract/gco:CharacterString")
+    try:
+        description_localized_element = index.find(".//gmd:identificationInfo//gmd:abstract/gmd:PT_FreeText")
+        if description_localized_element is not None:
+            for text_group in index.findall("gmd:textGroup/gmd:LocalisedCharacterString", description_localized_element):
+                locale = text_group.attrib.get("locale", "").replace("#", "").strip()
+                if text_group.text:
+                    descriptions[f"dataset_description_{locale}"] = text_group.text.strip()
+    except Exception as e:
+        log_error(f"Failed to extract localized descriptions from {xml_file}", exception=e)
+
+    issued_date = safe_find_text(".//gmd:identificationInfo//gmd:citation/gmd:CI_Citation/gmd:date/gmd:CI_Date/gmd:date/gco:Date")
+    if issued_date == "N/A":
+        issued_date = safe_find_text(".//gmd:identificationInfo//gmd:citation/gmd:CI_Citation/gmd:date/gmd:CI_Date/gmd:date/gco:DateTime")
+
+    publisher_name = "N/A"
+    for path in [
+        ".//gmd:contact//gmd:organisationName/gco:CharacterString",
+        ".//gmd:pointOfContact//gmd:organisationName/gco:CharacterString"
+    ]:
+        val = safe_find_text(path)
+        if val != "N/A":
+            publisher_name = val
+            break
+
+    publisher_url = "N/A"
+    for path in [
+        ".//gmd:pointOfContact//gmd:contactInfo//gmd:CI_Contact//gmd:onlineResource//gmd:linkage/gco:CharacterString",
+        ".//gmd:contact//gmd:contactInfo//gmd:CI_Contact//gmd:onlineResource//gmd:CI_OnlineResource//gmd:linkage/gmd:URL",
+        ".//gmd:contact//gmd:contactInfo//gmd:CI_Contact//gmd:onlineResource//gmd:CI_OnlineResource//gmd:linkage[@xsi:type='che:PT_FreeURL_PropertyType']/gmd:URL"
+    ]:
+        val = safe_find_text(path)
+        if val != "N/A":
+            publisher_url = val
+            break
+
+    dataset_theme = [el.text.strip() for el in safe_find_all(".//gmd:topicCategory/gmd:MD_TopicCategoryCode") if el is not None and el.text]
+    if not dataset_theme:
+        dataset_theme = ["N/A"]
+
+    keywords = {"UNKNOWN": []}
+    for keyword_element in safe_find_all(".//gmd:descriptiveKeywords/gmd:MD_Keywords/gmd:keyword"):
+        try:
+            keyword_text_element = index.find("gco:CharacterString", keyword_element)
+            if keyword_text_element is not None and keyword_text_element.text:
+                keywords["UNKNOWN"].append(keyword_text_element.text.strip())
+            localized_texts = index.findall("gmd:PT_FreeText/gmd:textGroup/gmd:LocalisedCharacterString", keyword_element)
+            for text_element in localized_texts:
+                lang_code = text_element.attrib.get("locale", "").replace("#", "").strip()
+                if text_element.text and lang_code:
+                    keywords.setdefault(lang_code, []).append(text_element.text.strip())
+        except Exception as e:
+            log_error(f"Failed to extract keyword from element in {xml_file}", exception=e)
+
+    distribution_formats = []
+    for el in safe_find_all(".//gmd:distributionInfo/gmd:MD_Distribution/gmd:transferOptions//gmd:CI_OnlineResource"):
+        try:
+            distribution_formats.append({
+                "dataset_identifier": file_identifier,
+                "xml_filename": xml_file,   
+                "distribution_format": index.findtext("gmd:protocol/gco:CharacterString", default="N/A", context=el),
+                "distribution_download_url": index.findtext("gmd:linkage/gmd:URL", default="N/A", context=el),
+                "distribution_title_UNKNOWN": index.findtext("gmd:name/gco:CharacterString", default="N/A", context=el),
+                "distribution_description_UNKNOWN": index.findtext("gmd:description/gco:CharacterString", default="N/A", context=el)
+            })
+        except Exception as e:
+            log_error(f"Failed to extract distribution format in {xml_file}", exception=e)
+
+    contact_points = []
+    contact_elements = safe_find_all(".//gmd:identificationInfo//gmd:pointOfContact//gmd:CI_ResponsibleParty")
+    contact_elements += safe_find_all(".//gmd:identificationInfo/che:CHE_MD_DataIdentification/gmd:pointOfContact/che:CHE_CI_ResponsibleParty")
+    for el in contact_elements:
+        try:
+            contact_points.append({
+                "contact_name": index.findtext("gmd:organisationName/gco:CharacterString", default="N/A", context=el),
+                "contact_email": index.findtext(".//gmd:electronicMailAddress/gco:CharacterString", default="N/A", context=el)
+            })
+        except Exception as e:
+            log_error(f"Failed to extract contact point in {xml_file}", exception=e)
+    
+    return (
+        file_identifier,
+        dataset_language,
+        titles,
+        descriptions,
+        publisher_name,
+        publisher_url,
+        dataset_theme,
+        issued_date,
+        keywords,
+        distribution_formats,
+        contact_points
+    )
+
+
+def load_documents(path, limit=None):
+    """Returns the XML documents (bytes) of a folder or metadata store."""
+    store = MetadataStore(path) if os.path.isfile(path) else None
+    documents = []
+    try:
+        for _, source in iter_documents(path, store):
+            if isinstance(source, str):
+                with open(source, "rb") as file:
+                    documents.append(file.read())
+            else:
+                documents.append(source.getvalue())
+            if limit and len(documents) >= limit:
+                break
+    finally:
+        if store is not None:
+            store.close()
+    return documents
+
+
+def opendata_record(result):
+    """Returns an opendata.swiss result with the field order of every record."""
+    dataset, distributions, contact_points = result
+    return [list(dataset.items()), [list(d.items()) for d in distributions], [list(c.items()) for c in contact_points]]
+
+
+def geocat_record(result):
+    """Drops the `xml_filename` (the source object) from the distributions of a geocat result."""
+    distributions = [{key: value for key, value in d.items() if key != "xml_filename"} for d in result[9]]
+    return result[:9] + (distributions,) + result[10:]
+
+
+PORTALS = {
+    "opendata.swiss": (
+        lambda source: legacy_extract_metadata_from_xml(source, None),
+        lambda source: extract_metadata_from_xml(source, None),
+        opendata_record,
+        OPENDATA_SWISS_MAPPING,
+    ),
+    "geocat.ch": (legacy_extract_metadata, extract_metadata, geocat_record, GEOCAT_MAPPING),
+}
+
+
+def latencies(function, documents, repeat):
+    times = []
+    for _ in range(repeat):
+        for xml_data in documents:
+            start = time.perf_counter()
+            try:
+                function(io.BytesIO(xml_data))
+            except ET.ParseError:
+                pass
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def describe(label, times):
+    times = sorted(times)
+    p95 = times[int(len(times) * 0.95) - 1] if times else 0.0
+    print(f"{label:<18} mean {statistics.mean(times) * 1e3:.3f} ms, median {statistics.median(times) * 1e3:.3f} ms, p95 {p95 * 1e3:.3f} ms")
+
+
+def run(portal, documents, repeat):
+    legacy, current, record, mapping = PORTALS[portal]
+    mismatches = 0
+    for xml_data in documents:
+        try:
+            expected = record(legacy(io.BytesIO(xml_data)))
+        except ET.ParseError:
+            continue
+        if record(current(io.BytesIO(xml_data))) != expected:
+            mismatches += 1
+
+    legacy_times = latencies(legacy, documents, repeat)
+    mapping_times = latencies(current, documents, repeat)
+    print(f"{portal}")
+    print(f"Documents:         {len(documents)} (x{repeat})")
+    print(f"Plan:              {len(mapping.plan)} paths, {len(mapping.unsupported)} evaluated by ElementTree")
+    describe("Hand-written:", legacy_times)
+    describe("Field mapping:", mapping_times)
+    print(f"Speedup (mean):    {statistics.mean(legacy_times) / statistics.mean(mapping_times):.2f}x")
+    print(f"Different results: {mismatches}")
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the field mapping engine against the former hand-written extractors.")
+    parser.add_argument("--opendata", default=r"06_Final_Workflow\data\01_opendata.swiss\saved_metadata_xml",
+                        help="opendata.swiss XML folder or metadata store")
+    parser.add_argument("--geocat", default=r"06_Final_Workflow\data\02_geocat.ch\saved_metadata_xml",
+                        help="geocat.ch XML folder or metadata store")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of documents per portal")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of repetitions")
+    args = parser.parse_args()
+
+    for portal, path in (("opendata.swiss", args.opendata), ("geocat.ch", args.geocat)):
+        if path and os.path.exists(path):
+            run(portal, load_documents(path, args.limit), args.repeat)
+        else:
+            print(f"{portal}: {path} not found, skipped")
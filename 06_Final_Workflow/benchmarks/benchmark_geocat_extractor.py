@@ -0,0 +1,255 @@
+"""
+Benchmark: geocat extractor
+
+Compares the former `extract_metadata_geocat.extract_metadata` (one `find` / `findall` with a
+`.//` prefix per field, each rescanning the tree) with the current one based on
+`xml_path_index.PathIndex` (single traversal, compiled paths). Reports the per-file latency
+(mean, median, 95th percentile, parsing included) and checks that both return identical tuples.
+
+Usage (from the repository root):
+    python 06_Final_Workflow/benchmarks/benchmark_geocat_extractor.py --source 06_Final_Workflow/data/02_geocat.ch/saved_metadata_xml
+
+A path to a `saved_metadata.sqlite` metadata store can be given instead of a folder.
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.error_logger import log_error
+from functions.extract_metadata_geocat import extract_metadata
+from functions.metadata_store import MetadataStore, iter_documents
+
+
+# Verbatim copy of the former extractor (renamed)
+def legacy_extract_metadata(xml_file):
+    """
+    Extract metadata fields from a GeoCat XML metadata file.
+
+    Parameters:
+        xml_file (str or file object): Path to the XML metadata file, or a binary file object.
+
+    Returns:
+        tuple: A tuple containing extracted values.
+    """
+    try:
+        tree = ET.parse(xml_file)
+        root = tree.getroot()
+    except Exception as e:
+        log_error(f"Failed to parse XML file: {xml_file}", exception=e)
+        raise
+
+    namespace = {
+        "gmd": "http://www.isotc211.org/2005/gmd",
+        "gco": "http://www.isotc211.org/2005/gco",
+        "che": "http://www.geocat.ch/2008/che",
+        "xsi": "http://www.w3.org/2001/XMLSchema-instance"
+    }
+
+    def safe_find_text(path, default="N/A"):
+        try:
+            el = root.find(path, namespace)
+            return el.text.strip() if el is not None and el.text else default
+        except Exception as e:
+            log_error(f"Error extracting path '{path}' in {xml_file}", exception=e)
+            return default
+
+    def safe_find_all(path):
+        try:
+            return root.findall(path, namespace)
+        except Exception as e:
+            log_error(f"Error finding all elements at '{path}' in {xml_file}", exception=e)
+            return []
+
+    file_identifier = safe_find_text(".//gmd:fileIdentifier/gco:CharacterString")
+
+    dataset_language = safe_find_text(".//gmd:language/gmd:LanguageCode")
+    if dataset_language == "N/A":
+        dataset_language = safe_find_text(".//gmd:language/gco:CharacterString")
+
+    titles = {}
+    titles["dataset_title"] = safe_find_text(".//gmd:identificationInfo//gmd:citation//gmd:title/gco:CharacterString")
+    try:
+        title_localized_element = root.find(".//gmd:identificationInfo//gmd:citation//gmd:title/gmd:PT_FreeText", namespace)
+        if title_localized_element is not None:
+            for text_group in title_localized_element.findall("gmd:textGroup/gmd:LocalisedCharacterString", namespace):
+                locale = text_group.attrib.get("locale", "").replace("#", "").strip()
+                if text_group.text:
+                    titles[f"dataset_title_{locale}"] = text_group.text.strip()
+    except Exception as e:
+        log_error(f"Failed to extract localized titles from {xml_file}", exception=e)
+
+    descriptions = {}
+    descriptions["dataset_description"] = safe_find_text(".//gmd:identificationInfo//gmd:abstract/gco:CharacterString")
+    try:
+        description_localized_element = root.find(".//gmd:identificationInfo//gmd:abstract/gmd:PT_FreeText", namespace)
+        if description_localized_element is not None:
+            for text_group in description_localized_element.findall("gmd:textGroup/gmd:LocalisedCharacterString", namespace):
+                locale = text_group.attrib.get("locale", "").replace("#", "").strip()
+                if text_group.text:
+                    descriptions[f"dataset_description_{locale}"] = text_group.text.strip()
+    except Exception as e:
+        log_error(f"Failed to extract localized descriptions from {xml_file}", exception=e)
+
+    issued_date = safe_find_text(".//gmd:identificationInfo//gmd:citation/gmd:CI_Citation/gmd:date/gmd:CI_Date/gmd:date/gco:Date")
+    if issued_date == "N/A":
+        issued_date = safe_find_text(".//gmd:identificationInfo//gmd:citation/gmd:CI_Citation/gmd:date/gmd:CI_Date/gmd:date/gco:DateTime")
+
+    publisher_name = "N/A"
+    for path in [
+        ".//gmd:contact//gmd:organisationName/gco:CharacterString",
+        ".//gmd:pointOfContact//gmd:organisationName/gco:CharacterString"
+    ]:
+        val = safe_find_text(path)
+        if val != "N/A":
+            publisher_name = val
+            break
+
+    publisher_url = "N/A"
+    for path in [
+        ".//gmd:pointOfContact//gmd:contactInfo//gmd:CI_Contact//gmd:onlineResource//gmd:linkage/gco:CharacterString",
+        ".//gmd:contact//gmd:contactInfo//gmd:CI_Contact//gmd:onlineResource//gmd:CI_OnlineResource//gmd:linkage/gmd:URL",
+        ".//gmd:contact//gmd:contactInfo//gmd:CI_Contact//gmd:onlineResource//gmd:CI_OnlineResource//gmd:linkage[@xsi:type='che:PT_FreeURL_PropertyType']/gmd:URL"
+    ]:
+        val = safe_find_text(path)
+        if val != "N/A":
+            publisher_url = val
+            break
+
+    dataset_theme = [el.text.strip() for el in safe_find_all(".//gmd:topicCategory/gmd:MD_TopicCategoryCode") if el is not None and el.text]
+    if not dataset_theme:
+        dataset_theme = ["N/A"]
+
+    keywords = {"UNKNOWN": []}
+    for keyword_element in safe_find_all(".//gmd:descriptiveKeywords/gmd:MD_Keywords/gmd:keyword"):
+        try:
+            keyword_text_element = keyword_element.find("gco:CharacterString", namespace)
+            if keyword_text_element is not None and keyword_text_element.text:
+                keywords["UNKNOWN"].append(keyword_text_element.text.strip())
+            localized_texts = keyword_element.findall("gmd:PT_FreeText/gmd:textGroup/gmd:LocalisedCharacterString", namespace)
+            for text_element in localized_texts:
+                lang_code = text_element.attrib.get("locale", "").replace("#", "").strip()
+                if text_element.text and lang_code:
+                    keywords.setdefault(lang_code, []).append(text_element.text.strip())
+        except Exception as e:
+            log_error(f"Failed to extract keyword from element in {xml_file}", exception=e)
+
+    distribution_formats = []
+    for el in safe_find_all(".//gmd:distributionInfo/gmd:MD_Distribution/gmd:transferOptions//gmd:CI_OnlineResource"):
+        try:
+            distribution_formats.append({
+                "dataset_identifier": file_identifier,
+                "xml_filename": xml_file,   
+                "distribution_format": el.findtext("gmd:protocol/gco:CharacterString", default="N/A", namespaces=namespace),
+                "distribution_download_url": el.findtext("gmd:linkage/gmd:URL", default="N/A", namespaces=namespace),
+                "distribution_title_UNKNOWN": el.findtext("gmd:name/gco:CharacterString", default="N/A", namespaces=namespace),
+                "distribution_description_UNKNOWN": el.findtext("gmd:description/gco:CharacterString", default="N/A", namespaces=namespace)
+            })
+        except Exception as e:
+            log_error(f"Failed to extract distribution format in {xml_file}", exception=e)
+
+    contact_points = []
+    contact_elements = safe_find_all(".//gmd:identificationInfo//gmd:pointOfContact//gmd:CI_ResponsibleParty")
+    contact_elements += safe_find_all(".//gmd:identificationInfo/che:CHE_MD_DataIdentification/gmd:pointOfContact/che:CHE_CI_ResponsibleParty")
+    for el in contact_elements:
+        try:
+            contact_points.append({
+                "contact_name": el.findtext("gmd:organisationName/gco:CharacterString", default="N/A", namespaces=namespace),
+                "contact_email": el.findtext(".//gmd:electronicMailAddress/gco:CharacterString", default="N/A", namespaces=namespace)
+            })
+        except Exception as e:
+            log_error(f"Failed to extract contact point in {xml_file}", exception=e)
+    
+    return (
+        file_identifier,
+        dataset_language,
+        titles,
+        descriptions,
+        publisher_name,
+        publisher_url,
+        dataset_theme,
+        issued_date,
+        keywords,
+        distribution_formats,
+        contact_points
+    )
+
+
+def load_documents(path, limit=None):
+    """Returns the XML documents (bytes) of a folder or metadata store."""
+    store = MetadataStore(path) if os.path.isfile(path) else None
+    documents = []
+    try:
+        for _, source in iter_documents(path, store):
+            if isinstance(source, str):
+                with open(source, "rb") as file:
+                    documents.append(file.read())
+            else:
+                documents.append(source.getvalue())
+            if limit and len(documents) >= limit:
+                break
+    finally:
+        if store is not None:
+            store.close()
+    return documents
+
+
+def comparable(result):
+    """Drops the `xml_filename` (the source object) from the distributions of an extractor result."""
+    distributions = [{key: value for key, value in d.items() if key != "xml_filename"} for d in result[9]]
+    return result[:9] + (distributions,) + result[10:]
+
+
+def latencies(function, documents, repeat):
+    times = []
+    for _ in range(repeat):
+        for xml_data in documents:
+            start = time.perf_counter()
+            try:
+                function(io.BytesIO(xml_data))
+            except ET.ParseError:
+                pass
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def describe(label, times):
+    times = sorted(times)
+    p95 = times[int(len(times) * 0.95) - 1] if times else 0.0
+    print(f"{label:<18} mean {statistics.mean(times) * 1e3:.3f} ms, median {statistics.median(times) * 1e3:.3f} ms, p95 {p95 * 1e3:.3f} ms")
+
+
+def run(documents, repeat):
+    mismatches = 0
+    for xml_data in documents:
+        try:
+            expected = comparable(legacy_extract_metadata(io.BytesIO(xml_data)))
+        except ET.ParseError:
+            continue
+        if comparable(extract_metadata(io.BytesIO(xml_data))) != expected:
+            mismatches += 1
+
+    legacy_times = latencies(legacy_extract_metadata, documents, repeat)
+    index_times = latencies(extract_metadata, documents, repeat)
+    print(f"Documents:         {len(documents)} (x{repeat})")
+    describe("Legacy extractor:", legacy_times)
+    describe("PathIndex:", index_times)
+    print(f"Speedup (mean):    {statistics.mean(legacy_times) / statistics.mean(index_times):.2f}x")
+    print(f"Different results: {mismatches}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the single-traversal geocat extractor against the former one.")
+    parser.add_argument("--source", default=r"06_Final_Workflow\data\02_geocat.ch\saved_metadata_xml",
+                        help="geocat.ch XML folder or metadata store")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of documents")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of repetitions")
+    args = parser.parse_args()
+
+    run(load_documents(args.source, args.limit), args.repeat)
@@ -0,0 +1,103 @@
+"""
+Benchmark: XML canonicalisation
+
+Compares the former recursive `sort_xml` (called twice per document, as the
+opendata.swiss downloader did) with `xml_canonicalizer.canonicalize` on real
+metadata records, and checks that both produce the same ordering. It also checks that
+`to_pretty_xml` is byte-identical to the former ElementTree -> minidom round-trip (the
+change detector hashes depend on it).
+
+Usage (from the repository root):
+    python 06_Final_Workflow/benchmarks/benchmark_sort_xml.py --folder 06_Final_Workflow/data/01_opendata.swiss/saved_metadata_xml
+"""
+
+import argparse
+import copy
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from xml.dom import minidom
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.xml_canonicalizer import canonicalize, to_pretty_xml
+
+
+def legacy_sort_xml(elem):
+    """Former recursive implementation of `download_opendata_swiss.sort_xml`."""
+    elem.attrib = dict(sorted(elem.attrib.items()))
+    for child in elem:
+        legacy_sort_xml(child)
+    elem[:] = sorted(
+        elem,
+        key=lambda e: (
+            e.tag,
+            sorted(e.attrib.items()),
+            ET.tostring(e, encoding='utf-8', method='xml')
+        )
+    )
+
+
+def legacy_pretty_xml(elem):
+    """Former `download_opendata_swiss.prettify_xml` followed by the removal of blank lines."""
+    pretty = minidom.parseString(ET.tostring(elem, encoding='utf-8')).toprettyxml(indent="  ", newl="\n")
+    return "\n".join([line for line in pretty.splitlines() if line.strip()])
+
+
+def load_records(folder, limit=None):
+    """Parses the XML records of a folder, largest files first."""
+    filenames = [f for f in os.listdir(folder) if f.endswith(".xml")]
+    filenames.sort(key=lambda f: os.path.getsize(os.path.join(folder, f)), reverse=True)
+    if limit:
+        filenames = filenames[:limit]
+    return [(f, ET.parse(os.path.join(folder, f)).getroot()) for f in filenames]
+
+
+def run(records, repeat):
+    legacy_time = 0.0
+    canonical_time = 0.0
+    mismatches = []
+    pretty_mismatches = set()
+    for _ in range(repeat):
+        for filename, root in records:
+            legacy_root = copy.deepcopy(root)
+            canonical_root = copy.deepcopy(root)
+
+            start = time.perf_counter()
+            legacy_sort_xml(legacy_root)
+            legacy_sort_xml(legacy_root)
+            legacy_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            canonicalize(canonical_root)
+            canonical_time += time.perf_counter() - start
+
+            if ET.tostring(legacy_root) != ET.tostring(canonical_root):
+                mismatches.append(filename)
+            if to_pretty_xml(canonical_root) != legacy_pretty_xml(canonical_root):
+                pretty_mismatches.add(filename)
+
+    count = len(records) * repeat
+    print(f"Records:            {len(records)} (x{repeat})")
+    print(f"Legacy sort_xml x2: {legacy_time:.3f}s ({legacy_time / count * 1000:.2f} ms/record)")
+    print(f"canonicalize:       {canonical_time:.3f}s ({canonical_time / count * 1000:.2f} ms/record)")
+    if canonical_time > 0:
+        print(f"Speedup:            {legacy_time / canonical_time:.1f}x")
+    print(f"Ordering mismatches: {len(set(mismatches))}")
+    for filename in sorted(set(mismatches))[:20]:
+        print(f"  {filename}")
+    print(f"Pretty XML mismatches: {len(pretty_mismatches)}")
+    for filename in sorted(pretty_mismatches)[:20]:
+        print(f"  {filename}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark XML canonicalisation against the former sort_xml.")
+    parser.add_argument("--folder", default=r"06_Final_Workflow\data\01_opendata.swiss\saved_metadata_xml",
+                        help="Folder with XML metadata records")
+    parser.add_argument("--limit", type=int, default=500, help="Number of records to use (largest first)")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of repetitions")
+    args = parser.parse_args()
+
+    run(load_records(args.folder, args.limit), args.repeat)
@@ -0,0 +1,166 @@
+"""
+Benchmark: text sanitiser
+
+Compares the former cleaning of `xml_cleaner` with the cleaning based on `text_sanitizer`
+on the largest documents of the saved metadata of both portals:
+
+- Texts: former per-text cleaning (HTML tag regex compiled on every call, followed by the
+  `replace` / `re.sub` passes) against `sanitize_text`, on the longest element texts.
+- Documents: former `clean_xml_root` + `serialize_cleaned_xml` (passes over the serialised
+  document and the line-joining loop) against the current ones, parse included.
+
+The sanitiser turns line breaks into spaces instead of deleting them and collapses
+whitespace, so the number of texts whose output differs is reported as well.
+
+Usage (from the repository root):
+    python 06_Final_Workflow/benchmarks/benchmark_text_sanitizer.py --opendata 06_Final_Workflow/data/01_opendata.swiss/saved_metadata_xml --geocat 06_Final_Workflow/data/02_geocat.ch/saved_metadata_xml
+
+A path to a `saved_metadata.sqlite` metadata store can be given instead of a folder.
+"""
+
+import argparse
+import heapq
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.metadata_store import MetadataStore, iter_documents
+from functions.text_sanitizer import sanitize_text
+from functions.xml_cleaner import clean_xml_root, serialize_cleaned_xml
+
+
+def legacy_clean_text(text):
+    """Former cleaning of a text node: `remove_html_tags` plus the passes over the serialised XML."""
+    clean = re.compile('<.*?>')
+    text = re.sub(clean, '', text)
+    text = text.replace('\n', '').replace('\t', '')
+    return re.sub(r"(&#13;|&#10;|&#xD;|&#xA;)", " ", text)
+
+
+def legacy_clean_document(xml_data):
+    """Former `clean_xml_data` without logging: tag removal per text, then passes over the serialised XML."""
+    root = ET.fromstring(xml_data)
+    for elem in root.iter():
+        if elem.text:
+            elem.text = re.sub(re.compile('<.*?>'), '', elem.text)
+
+    cleaned_xml = ET.tostring(root, encoding='utf-8').decode('utf-8')
+    cleaned_xml = cleaned_xml.replace('\n', '').replace('\t', '')
+    cleaned_xml = re.sub(r"(&#13;|&#10;|&#xD;|&#xA;)", " ", cleaned_xml)
+
+    cleaned_lines = []
+    temp_line = ""
+
+    for line in cleaned_xml.splitlines():
+        line = line.strip()
+        if not line.endswith(">"):
+            temp_line += line + " "
+        else:
+            temp_line += line
+            cleaned_lines.append(temp_line.strip())
+            temp_line = ""
+
+    if temp_line:
+        cleaned_lines.append(temp_line.strip())
+
+    return "\n".join(cleaned_lines) + "\n"
+
+
+def clean_document(xml_data):
+    """Current cleaning of `xml_cleaner.clean_xml_data` without logging."""
+    root = ET.fromstring(xml_data)
+    clean_xml_root(root)
+    return serialize_cleaned_xml(root)
+
+
+def load_largest_documents(path, limit):
+    """Returns the `limit` largest documents (bytes) of a folder or metadata store."""
+    store = MetadataStore(path) if os.path.isfile(path) else None
+    documents = []
+    try:
+        for _, source in iter_documents(path, store):
+            if isinstance(source, str):
+                with open(source, "rb") as file:
+                    documents.append(file.read())
+            else:
+                documents.append(source.getvalue())
+            if len(documents) > 2 * limit:
+                documents = heapq.nlargest(limit, documents, key=len)
+    finally:
+        if store is not None:
+            store.close()
+    valid = []
+    for xml_data in heapq.nlargest(limit, documents, key=len):
+        try:
+            ET.fromstring(xml_data)
+        except ET.ParseError:
+            continue
+        valid.append(xml_data)
+    return valid
+
+
+def longest_texts(documents, limit):
+    """Returns the `limit` longest non-blank element texts of the documents."""
+    texts = []
+    for xml_data in documents:
+        root = ET.fromstring(xml_data)
+        texts.extend(elem.text for elem in root.iter() if elem.text and elem.text.strip())
+    return heapq.nlargest(limit, texts, key=len)
+
+
+def time_calls(function, items, repeat):
+    elapsed = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            function(item)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def run(documents, limit, repeat):
+    texts = longest_texts(documents, limit)
+    legacy_time = time_calls(legacy_clean_text, texts, repeat)
+    sanitizer_time = time_calls(sanitize_text, texts, repeat)
+    changed = sum(1 for text in texts if legacy_clean_text(text) != sanitize_text(text))
+    count = len(texts) * repeat
+    characters = sum(len(text) for text in texts)
+    print(f"Texts:             {len(texts)} (x{repeat}), {characters / max(len(texts), 1):.0f} characters on average")
+    print(f"Legacy cleaning:   {legacy_time:.3f}s ({legacy_time / count * 1e6:.1f} us/text)")
+    print(f"sanitize_text:     {sanitizer_time:.3f}s ({sanitizer_time / count * 1e6:.1f} us/text)")
+    if sanitizer_time > 0:
+        print(f"Speedup:           {legacy_time / sanitizer_time:.1f}x")
+    print(f"Different output:  {changed} texts (line breaks and whitespace runs)")
+
+    legacy_time = time_calls(legacy_clean_document, documents, repeat)
+    cleaner_time = time_calls(clean_document, documents, repeat)
+    count = len(documents) * repeat
+    size = sum(len(xml_data) for xml_data in documents)
+    print(f"Documents:         {len(documents)} (x{repeat}), {size / max(len(documents), 1) / 1024:.1f} KiB on average")
+    print(f"Legacy cleaning:   {legacy_time:.3f}s ({legacy_time / count * 1e3:.2f} ms/document)")
+    print(f"xml_cleaner:       {cleaner_time:.3f}s ({cleaner_time / count * 1e3:.2f} ms/document)")
+    if cleaner_time > 0:
+        print(f"Speedup:           {legacy_time / cleaner_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the text sanitiser against the former XML text cleaning.")
+    parser.add_argument("--opendata", default=r"06_Final_Workflow\data\01_opendata.swiss\saved_metadata_xml",
+                        help="opendata.swiss XML folder or metadata store")
+    parser.add_argument("--geocat", default=r"06_Final_Workflow\data\02_geocat.ch\saved_metadata_xml",
+                        help="geocat.ch XML folder or metadata store")
+    parser.add_argument("--documents", type=int, default=200, help="Number of largest documents per portal")
+    parser.add_argument("--limit", type=int, default=1000, help="Number of longest texts per portal")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of repetitions")
+    args = parser.parse_args()
+
+    for portal, path in (("opendata.swiss", args.opendata), ("geocat.ch", args.geocat)):
+        if not os.path.exists(path):
+            print(f"{portal}: {path} not found, skipped")
+            continue
+        print(f"--- {portal} ---")
+        run(load_largest_documents(path, args.documents), args.limit, args.repeat)
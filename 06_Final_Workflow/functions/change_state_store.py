@@ -0,0 +1,223 @@
+"""
+Module: Change State Store
+
+Indexed change state of a portal for `dataset_change_detector`. It replaces the
+`previous_import.csv` / `latest_import.csv` files by a single SQLite file:
+
+- `datasets`: current state, i.e. the hash of every dataset of the last import
+  (the former `previous_import.csv`).
+- `runs`: one row per comparison with its portal and start/finish timestamps.
+- `changes`: history of the datasets that were 'new', 'changed' or 'removed' in a run.
+  'found' datasets are not recorded, they are implied by the absence of a change.
+
+`changes_since(run_id)` answers "what changed since run N" with an index lookup
+instead of diffing CSV files.
+
+Usage:
+    with ChangeStateStore(os.path.join(base_dir, CHANGE_STATE_FILE)) as state:
+        previous_df = state.current_state()
+        run_id = state.begin_run("opendata.swiss")
+        state.commit_run(run_id, final_df)
+
+Constants:
+- CHANGE_STATE_FILE: Default file name of the store in the base directory of a portal.
+- RECORDED_STATUSES: Statuses that are written to the change history.
+
+Dependencies:
+- sqlite3
+- pandas
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+CHANGE_STATE_FILE = "change_state.sqlite"
+RECORDED_STATUSES = ("new", "changed", "removed")
+
+
+class ChangeStateStore:
+    """
+    SQLite store holding the current dataset hashes of a portal and the history of their changes.
+    """
+
+    def __init__(self, path):
+        """
+        Opens (and if necessary creates) the store.
+
+        Args:
+            path (str): Path of the SQLite file.
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS datasets (
+                name TEXT PRIMARY KEY,
+                hash TEXT,
+                run_id INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                portal TEXT,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS changes (
+                run_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                hash TEXT,
+                PRIMARY KEY (run_id, name)
+            );
+            CREATE INDEX IF NOT EXISTS changes_name ON changes (name, run_id);
+        """)
+        self._connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM datasets").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def has_state(self):
+        """Returns True if a run was committed or the store was seeded, i.e. a previous import exists."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT 1 FROM runs WHERE finished_at IS NOT NULL LIMIT 1"
+            ).fetchone() is not None
+
+    def seed(self, previous_df):
+        """
+        Imports a previous import (e.g. the former `previous_import.csv`) as run 0 of an empty store.
+
+        Args:
+            previous_df (DataFrame): Columns Dataset_Name and dataset_hash.
+        """
+        with self._lock:
+            now = time.time()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO runs (run_id, portal, started_at, finished_at) VALUES (0, 'seed', ?, ?)",
+                (now, now)
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO datasets (name, hash, run_id) VALUES (?, ?, 0)",
+                _state_rows(previous_df)
+            )
+            self._connection.commit()
+
+    def current_state(self):
+        """
+        Returns the hash of every dataset of the last import.
+
+        Returns:
+            DataFrame: Columns Dataset_Name and dataset_hash.
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT name, hash FROM datasets").fetchall()
+        return pd.DataFrame(rows, columns=["Dataset_Name", "dataset_hash"])
+
+    def names(self):
+        """Returns the names of all datasets of the last import."""
+        with self._lock:
+            return {row[0] for row in self._connection.execute("SELECT name FROM datasets")}
+
+    def begin_run(self, portal_name):
+        """
+        Starts a comparison run.
+
+        Returns:
+            int: Run id.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO runs (portal, started_at) VALUES (?, ?)", (portal_name, time.time())
+            )
+            self._connection.commit()
+            return cursor.lastrowid
+
+    def commit_run(self, run_id, final_df):
+        """
+        Stores the result of a comparison in a single transaction: the 'found', 'changed' and
+        'new' datasets become the current state, the changes are added to the history.
+
+        Args:
+            run_id (int): Run id returned by `begin_run`.
+            final_df (DataFrame): Columns Dataset_Name, dataset_hash and status.
+        """
+        current_df = final_df[final_df["status"].isin(["found", "changed", "new"])]
+        changes_df = final_df[final_df["status"].isin(RECORDED_STATUSES)]
+        with self._lock:
+            self._connection.execute("DELETE FROM datasets")
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO datasets (name, hash, run_id) VALUES (?, ?, ?)",
+                ((name, content_hash, run_id) for name, content_hash in _state_rows(current_df))
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO changes (run_id, name, status, hash) VALUES (?, ?, ?, ?)",
+                (
+                    (run_id, name, status, content_hash)
+                    for (name, content_hash), status in zip(_state_rows(changes_df), changes_df["status"])
+                )
+            )
+            self._connection.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+            self._connection.commit()
+
+    def last_run(self):
+        """
+        Returns the last committed run.
+
+        Returns:
+            tuple or None: (run id, finish timestamp), None if no run was committed.
+        """
+        with self._lock:
+            return self._connection.execute(
+                "SELECT run_id, finished_at FROM runs WHERE finished_at IS NOT NULL ORDER BY run_id DESC LIMIT 1"
+            ).fetchone()
+
+    def changes_since(self, run_id):
+        """
+        Returns the datasets that changed after a run, with their latest status.
+
+        Args:
+            run_id (int): Run id; the changes of later runs are returned.
+
+        Returns:
+            DataFrame: Columns Dataset_Name, status, dataset_hash and run_id (of the latest change).
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT changes.name, changes.status, changes.hash, changes.run_id
+                FROM changes
+                JOIN (
+                    SELECT name, MAX(run_id) AS run_id FROM changes WHERE run_id > ? GROUP BY name
+                ) AS latest ON latest.name = changes.name AND latest.run_id = changes.run_id
+                ORDER BY changes.name
+                """,
+                (run_id,)
+            ).fetchall()
+        return pd.DataFrame(rows, columns=["Dataset_Name", "status", "dataset_hash", "run_id"])
+
+
+def _state_rows(df):
+    """Yields (name, hash) pairs of a DataFrame, with None for missing hashes."""
+    hashes = df["dataset_hash"].astype(object).where(df["dataset_hash"].notna(), None)
+    return zip(df["Dataset_Name"].astype(str), hashes)
@@ -0,0 +1,124 @@
+"""
+Module: Content Fingerprint
+
+Semantic fingerprint of a metadata document for the change detector. Instead of the raw
+bytes, only the fields that matter downstream are hashed, as extracted by the portal's
+extractor (`extract_metadata_opendata_swiss` / `extract_metadata_geocat`):
+
+- titles, descriptions and keywords of the dataset
+- distributions (without their issued/modified dates)
+- contact points
+
+Texts are normalised (whitespace collapsed and stripped), distributions and contact points
+are sorted, and date fields are dropped. Cosmetic differences such as attribute order,
+harvester timestamps or layout whitespace therefore keep the fingerprint unchanged.
+
+Documents that cannot be extracted fall back to the SHA-256 of their bytes (prefixed with
+`raw:`), so they are still compared, only not semantically.
+
+Constants:
+- FINGERPRINT_EXTRACTORS: Fingerprint field extractor per portal name.
+
+Functions:
+- semantic_fingerprint: Computes the fingerprint of a document.
+
+Dependencies:
+- hashlib
+- io
+- json
+- re
+"""
+
+import hashlib
+import io
+import json
+import re
+
+from functions.error_logger import log_error
+from functions import extract_metadata_geocat
+from functions import extract_metadata_opendata_swiss
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+FINGERPRINT_PREFIXES = ("dataset_title", "dataset_description", "dataset_keyword")
+
+
+def _normalise(value):
+    """Normalises extracted values recursively: whitespace is collapsed, date fields are dropped."""
+    if isinstance(value, str):
+        return WHITESPACE_PATTERN.sub(" ", value).strip()
+    if isinstance(value, dict):
+        return {
+            key: _normalise(item) for key, item in value.items()
+            if "date" not in key and key != "xml_filename"
+        }
+    if isinstance(value, (list, tuple)):
+        return [_normalise(item) for item in value]
+    return value
+
+
+def _sorted_records(records):
+    """Normalises a list of records and sorts it, so that their order is not significant."""
+    return sorted(
+        (_normalise(record) for record in records),
+        key=lambda record: json.dumps(record, sort_keys=True, ensure_ascii=False)
+    )
+
+
+def _opendata_swiss_fields(source):
+    dataset_metadata, distributions, contact_points = extract_metadata_opendata_swiss.extract_metadata_from_xml(source, None)
+    return {
+        "dataset": {key: value for key, value in dataset_metadata.items() if key.startswith(FINGERPRINT_PREFIXES)},
+        "distributions": distributions,
+        "contact_points": contact_points,
+    }
+
+
+def _geocat_fields(source):
+    (_, _, titles, descriptions, _, _, _, _, keywords, distributions, contact_points) = extract_metadata_geocat.extract_metadata(source)
+    return {
+        "dataset": {"titles": titles, "descriptions": descriptions, "keywords": keywords},
+        "distributions": distributions,
+        "contact_points": contact_points,
+    }
+
+
+FINGERPRINT_EXTRACTORS = {
+    "opendata.swiss": _opendata_swiss_fields,
+    "geocat.ch": _geocat_fields,
+}
+
+
+def semantic_fingerprint(source, portal_name="opendata.swiss"):
+    """
+    Computes the semantic fingerprint of a metadata document.
+
+    Args:
+        source (str or bytes): File path or XML document.
+        portal_name (str): Portal of the document, selects the extractor.
+
+    Returns:
+        str or None: SHA-256 hex digest of the normalised fields (`raw:<sha256>` if the
+        document could not be extracted), None if the file does not exist.
+    """
+    if isinstance(source, str):
+        try:
+            with open(source, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+    else:
+        data = source
+
+    try:
+        fields = FINGERPRINT_EXTRACTORS[portal_name](io.BytesIO(data))
+    except Exception as e:
+        log_error(f"Semantic fingerprint failed, using the content hash instead ({portal_name})", "warning", e)
+        return "raw:" + hashlib.sha256(data).hexdigest()
+
+    fingerprint = {
+        "dataset": _normalise(fields["dataset"]),
+        "distributions": _sorted_records(fields["distributions"]),
+        "contact_points": _sorted_records(fields["contact_points"]),
+    }
+    serialised = json.dumps(fingerprint, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(serialised.encode("utf-8")).hexdigest()
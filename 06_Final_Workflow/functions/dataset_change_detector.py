@@ -2,23 +2,54 @@
 This script calculates SHA-256 hashes for files in a specified folder and compares
 current files with a previously stored list to identify 'new', 'changed', 'found', or 'removed' datasets.
 It outputs:
-- A CSV file of the latest import
 - A comparison CSV result
 - A CSV metadata file for removed/changed entries
-- An updated previous import file
+- An updated change state store (`change_state.sqlite`, see `change_state_store`)
+
+The change state store replaces the former `previous_import.csv` / `latest_import.csv`: it holds the current
+hash of every dataset and the history of the changes per run, so `changes_since(run_id)` answers which datasets
+changed since a given run. An existing `previous_import.csv` seeds the store on the first run.
+
+The files are read in chunks and hashed in parallel by a thread pool (hashlib releases the GIL while hashing).
+Semantic fingerprints are computed sequentially: parsing and extraction hold the GIL, so threads only add overhead.
+
+With `hash_mode="semantic"` the documents are compared by a semantic fingerprint (see `content_fingerprint`)
+instead of their SHA-256: only titles, descriptions, keywords, distributions and contact points count, so
+cosmetic differences do not mark a dataset as 'changed'. Switching the mode marks all datasets as 'changed' once.
 
 The file format (extension), working directory path, and metadata output file can be passed as command-line arguments,
 or the script can be imported and called via the function `compare_dataset_hashes()`.
+
+With a `MetadataStore` the documents are read from the packed store instead of
+`saved_metadata_xml`; the hashes come from its index, so no document is read again.
+
+Incremental harvests and conditional requests (HTTP 304) do not download unchanged datasets.
+The downloaders list those identifiers in `unchanged_datasets.csv`; they are carried over from the previous import
+as 'found' instead of being reported as 'removed'. The list is consumed by each comparison.
+
+The documents of 'found' datasets are deleted after the comparison, except with `keep_found=True`: the run
+that seeds the persistent tables of `extracted_tables` needs every document and deletes them after the
+extraction with `remove_found_documents`.
 """
 from functions.statistics_logger import log_portal_result, save_statistics
+from functions.content_fingerprint import semantic_fingerprint
+from functions.change_state_store import ChangeStateStore, CHANGE_STATE_FILE
 import os
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import argparse
 
+UNCHANGED_DATASETS_FILE = "unchanged_datasets.csv"
+HASH_MODE = "sha256"
+HASH_MODES = ("sha256", "semantic")
+HASH_CHUNK_SIZE = 1024 * 1024
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+
 def file_hash(file_path):
     """
-    Compute the SHA-256 hash of a file.
+    Compute the SHA-256 hash of a file, reading it in chunks of HASH_CHUNK_SIZE bytes.
 
     Args:
         file_path (str): Path to the file.
@@ -26,11 +57,38 @@ def file_hash(file_path):
     Returns:
         str or None: The SHA-256 hash string or None if file not found.
     """
+    digest = hashlib.sha256()
     try:
         with open(file_path, 'rb') as f:
-            return hashlib.sha256(f.read()).hexdigest()
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
     except FileNotFoundError:
         return None
+    return digest.hexdigest()
+
+
+def compute_file_hashes(file_paths, workers=HASH_WORKERS, mode=HASH_MODE, portal_name="opendata.swiss"):
+    """
+    Compute the hashes of files, the SHA-256 hashes in parallel.
+
+    Args:
+        file_paths (list of str): Paths of the files.
+        workers (int): Number of threads hashing the files (sha256 mode only).
+        mode (str): "sha256" for the file content, "semantic" for `semantic_fingerprint`.
+        portal_name (str): Portal of the documents (semantic mode only).
+
+    Returns:
+        list of str or None: Hashes in the order of `file_paths` (None for files that disappeared).
+    """
+    if mode not in HASH_MODES:
+        raise ValueError(f"Unknown hash mode: {mode}")
+    if mode == "semantic":
+        # Pure-Python parsing holds the GIL, a thread pool is slower than a loop
+        return [semantic_fingerprint(file_path, portal_name) for file_path in file_paths]
+    if not file_paths:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(file_hash, file_paths))
 
 def get_files_by_extension(directory, extension="xml"):
     """
@@ -46,10 +104,190 @@ def get_files_by_extension(directory, extension="xml"):
     return [f for f in os.listdir(directory) if f.lower().endswith(f".{extension.lower()}")]
 
 
-def compare_dataset_hashes(base_dir, remove_order_file, extension="xml", portal_name="opendata.swiss"):
+def save_unchanged_datasets(base_dir, dataset_names):
+    """
+    Saves the names of datasets that were skipped by an incremental harvest because they are unchanged.
+
+    Args:
+        base_dir (str): Base directory of the portal.
+        dataset_names (iterable of str): Dataset names (file names without extension).
+    """
+    path = os.path.join(base_dir, UNCHANGED_DATASETS_FILE)
+    pd.DataFrame({"Dataset_Name": sorted(dataset_names)}).to_csv(path, index=False)
+
+
+def load_unchanged_datasets(base_dir):
+    """
+    Loads the dataset names skipped by an incremental harvest.
+
+    Args:
+        base_dir (str): Base directory of the portal.
+
+    Returns:
+        set of str: Dataset names, empty if no incremental harvest took place.
+    """
+    path = os.path.join(base_dir, UNCHANGED_DATASETS_FILE)
+    if not os.path.exists(path) or os.stat(path).st_size == 0:
+        return set()
+    return set(pd.read_csv(path, dtype=str)["Dataset_Name"].dropna())
+
+
+def add_unchanged_datasets(base_dir, dataset_names):
+    """
+    Adds dataset names to the list of unchanged datasets of the current run.
+
+    Args:
+        base_dir (str): Base directory of the portal.
+        dataset_names (iterable of str): Dataset names (file names without extension).
+    """
+    dataset_names = set(dataset_names)
+    if dataset_names:
+        save_unchanged_datasets(base_dir, load_unchanged_datasets(base_dir) | dataset_names)
+
+
+def load_previous_dataset_names(base_dir, download_state=None):
+    """
+    Returns the dataset names of the previous import, i.e. all datasets with a known hash.
+
+    Downloaders use these names to decide which datasets may be skipped as unchanged. If
+    `download_state` (e.g. a validator cache) was written after the previous import, the last
+    download was never compared, so no dataset has a reliable hash and an empty set is returned.
+
+    Args:
+        base_dir (str): Base directory of the portal.
+        download_state (str, optional): State file written at the end of each download.
+
+    Returns:
+        set of str: Dataset names, empty if there is no (current) previous import.
+    """
+    state_path = os.path.join(base_dir, CHANGE_STATE_FILE)
+    if os.path.exists(state_path):
+        with ChangeStateStore(state_path) as state:
+            last_run = state.last_run()
+            if last_run is None:
+                return set()
+            if download_state and os.path.exists(download_state) and os.path.getmtime(download_state) > last_run[1]:
+                return set()
+            return state.names()
+
+    # No comparison with the change state store yet: the former previous_import.csv seeds it
+    path = os.path.join(base_dir, "previous_import.csv")
+    if not os.path.exists(path) or os.stat(path).st_size == 0:
+        return set()
+    if download_state and os.path.exists(download_state) and os.path.getmtime(download_state) > os.path.getmtime(path):
+        return set()
+    return set(pd.read_csv(path, dtype=str)["Dataset_Name"].dropna())
+
+
+def changes_since(base_dir, run_id):
+    """
+    Returns the datasets that were 'new', 'changed' or 'removed' after a comparison run.
+
+    Args:
+        base_dir (str): Base directory of the portal.
+        run_id (int): Run id of the change state store.
+
+    Returns:
+        DataFrame: Columns Dataset_Name, status, dataset_hash and run_id (latest change per dataset).
+    """
+    with ChangeStateStore(os.path.join(base_dir, CHANGE_STATE_FILE)) as state:
+        return state.changes_since(run_id)
+
+
+def classify_datasets(latest_df, previous_df, unchanged_names=()):
+    """
+    Classify datasets as 'new', 'changed', 'found' or 'removed' (vectorised).
+
+    Args:
+        latest_df (DataFrame): Current import with columns Dataset_Name and dataset_hash.
+        previous_df (DataFrame or None): Previous import, None if there is none.
+        unchanged_names (set of str): Datasets skipped by the download as unchanged; they are
+            carried over as 'found' instead of 'removed'.
+
+    Returns:
+        DataFrame: Columns Dataset_Name, dataset_hash and status.
+    """
+    if previous_df is None:
+        final_df = latest_df.copy()
+        final_df["status"] = "new"
+        return final_df
+
+    if not latest_df.empty:
+        comparison_df = pd.merge(latest_df, previous_df, on="Dataset_Name", how="left", suffixes=('_latest', '_previous'))
+        previous_hashes = comparison_df["dataset_hash_previous"]
+        comparison_df["status"] = np.select(
+            [previous_hashes.isna(), comparison_df["dataset_hash_latest"] == previous_hashes],
+            ["new", "found"],
+            default="changed"
+        )
+        comparison_df.rename(columns={"dataset_hash_latest": "dataset_hash"}, inplace=True)
+        comparison_df = comparison_df.drop(columns=["dataset_hash_previous"])
+    else:
+        comparison_df = pd.DataFrame(columns=["Dataset_Name", "dataset_hash", "status"])
+
+    missing_df = previous_df[~previous_df["Dataset_Name"].isin(latest_df["Dataset_Name"])]
+    # Datasets skipped by an incremental harvest are unchanged, not removed
+    carried = missing_df["Dataset_Name"].isin(unchanged_names)
+    carried_df = missing_df[carried].assign(status="found")
+    removed_df = missing_df[~carried].assign(status="removed")
+    return pd.concat([comparison_df, carried_df, removed_df], ignore_index=True)
+
+
+def clear_unchanged_datasets(base_dir):
+    """Removes the list of unchanged datasets, e.g. before a full harvest."""
+    path = os.path.join(base_dir, UNCHANGED_DATASETS_FILE)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def remove_documents(folder_path, dataset_names, extension="xml", store=None):
+    """Deletes the documents of datasets from the store, or from the folder without store."""
+    if store is not None:
+        store.delete_many(dataset_names)
+        store.prune()
+        return
+    for file_name in dataset_names:
+        file_path = os.path.join(folder_path, file_name + f".{extension}")
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        else:
+            print(f"File not found: {file_name}.{extension}")
+
+
+def remove_found_documents(base_dir, extension="xml", store=None):
+    """
+    Deletes the documents of the 'found' datasets of the last comparison that were kept
+    by `compare_dataset_hashes(keep_found=True)`, once the extraction has used them.
+
+    Args:
+        base_dir (str): Base directory of the portal.
+        extension (str): File extension of the documents.
+        store (MetadataStore, optional): Packed metadata store instead of `saved_metadata_xml`.
+
+    Returns:
+        int: Number of deleted documents.
+    """
+    comparison_file = os.path.join(base_dir, "comparison_result.csv")
+    if not os.path.exists(comparison_file) or os.stat(comparison_file).st_size == 0:
+        return 0
+    comparison_df = pd.read_csv(comparison_file, dtype=str, keep_default_na=False)
+    folder_path = os.path.join(base_dir, "saved_metadata_xml")
+    # Carried-over datasets have no document
+    if store is not None:
+        available = set(store.names())
+    elif os.path.isdir(folder_path):
+        available = {filename[:-(len(extension) + 1)] for filename in get_files_by_extension(folder_path, extension=extension)}
+    else:
+        available = set()
+    names = [name for name in comparison_df.loc[comparison_df["status"] == "found", "Dataset_Name"] if name in available]
+    remove_documents(folder_path, names, extension, store)
+    return len(names)
+
+
+def compare_dataset_hashes(base_dir, remove_order_file, extension="xml", portal_name="opendata.swiss", store=None, hash_mode=HASH_MODE,
+                           keep_found=False):
 
     folder_path = os.path.join(base_dir, "saved_metadata_xml")
-    latest_import = os.path.join(base_dir, "latest_import.csv")
     previous_import = os.path.join(base_dir, "previous_import.csv")
     comparison_file = os.path.join(base_dir, "comparison_result.csv")
    
@@ -57,44 +295,33 @@ def compare_dataset_hashes(base_dir, remove_order_file, extension="xml", portal_
     dataset_names = []
     dataset_hashes = []
 
-    for filename in get_files_by_extension(folder_path, extension=extension):
-        dataset_names.append(filename[:-(len(extension) + 1)])
-        file_path = os.path.join(folder_path, filename)
-        dataset_hashes.append(file_hash(file_path))
+    if store is not None and hash_mode == "semantic":
+        for name, xml_data in store.items():
+            dataset_names.append(name)
+            dataset_hashes.append(semantic_fingerprint(xml_data, portal_name))
+    elif store is not None:
+        for name, content_hash in store.hashes().items():
+            dataset_names.append(name)
+            dataset_hashes.append(content_hash)
+    else:
+        filenames = get_files_by_extension(folder_path, extension=extension)
+        file_paths = [os.path.join(folder_path, filename) for filename in filenames]
+        dataset_names = [filename[:-(len(extension) + 1)] for filename in filenames]
+        dataset_hashes = compute_file_hashes(file_paths, mode=hash_mode, portal_name=portal_name)
 
     latest_df = pd.DataFrame({"Dataset_Name": dataset_names, "dataset_hash": dataset_hashes})
-    latest_df.to_csv(latest_import, index=False)
-
-    if os.path.exists(previous_import):
-        previous_df = pd.read_csv(previous_import)
-        latest_df["Dataset_Name"] = latest_df["Dataset_Name"].astype(str)
-        previous_df["Dataset_Name"] = previous_df["Dataset_Name"].astype(str)
-
-        if not latest_df.empty:
-            comparison_df = pd.merge(latest_df, previous_df, on="Dataset_Name", how="left", suffixes=('_latest', '_previous'))
-
-            def get_status(row):
-                if pd.isna(row["dataset_hash_previous"]):
-                    return "new"
-                elif row["dataset_hash_latest"] == row["dataset_hash_previous"]:
-                    return "found"
-                else:
-                    return "changed"
-
-            comparison_df["status"] = comparison_df.apply(get_status, axis=1)
-            comparison_df.rename(columns={"dataset_hash_latest": "dataset_hash"}, inplace=True)
-            comparison_df = comparison_df.drop(columns=["dataset_hash_previous"])
-        else:
-            comparison_df = pd.DataFrame(columns=["Dataset_Name", "dataset_hash", "status"])
+    latest_df["Dataset_Name"] = latest_df["Dataset_Name"].astype(str)
 
-        removed_df = previous_df[~previous_df["Dataset_Name"].isin(latest_df["Dataset_Name"])].copy()
-        removed_df["status"] = "removed"
-        final_df = pd.concat([comparison_df, removed_df], ignore_index=True)
-        final_df.to_csv(comparison_file, index=False)
-    else:
-        latest_df["status"] = "new"
-        final_df = latest_df
+    unchanged_names = load_unchanged_datasets(base_dir)
+
+    state = ChangeStateStore(os.path.join(base_dir, CHANGE_STATE_FILE))
+    if not state.has_state() and os.path.exists(previous_import) and os.stat(previous_import).st_size > 0:
+        state.seed(pd.read_csv(previous_import, dtype=str))
+        print("Change state store seeded from previous_import.csv.")
 
+    previous_df = state.current_state() if state.has_state() else None
+    run_id = state.begin_run(portal_name)
+    final_df = classify_datasets(latest_df, previous_df, unchanged_names)
     final_df.to_csv(comparison_file, index=False)
 
     # Logging summary statistics
@@ -106,25 +333,23 @@ def compare_dataset_hashes(base_dir, remove_order_file, extension="xml", portal_
 
     # use in-memory final_df instead of reloading CSV
     df = final_df.copy()
-    files_to_remove = df[df["status"] == "found"]["Dataset_Name"].tolist()
-
-    for file_name in files_to_remove:
-        file_path = os.path.join(folder_path, file_name + f".{extension}")
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        else:
-            print(f"File not found: {file_name}.{extension}")
-
-    print("Cleanup complete.")
+    # Carried-over datasets have no file on disk
+    files_to_remove = df[(df["status"] == "found") & df["Dataset_Name"].isin(latest_df["Dataset_Name"])]["Dataset_Name"].tolist()
+    if keep_found:
+        print(f"{len(files_to_remove)} unchanged documents kept for the extraction (see remove_found_documents).")
+    else:
+        remove_documents(folder_path, files_to_remove, extension, store)
+        print("Cleanup complete.")
 
     remove_order_df = df[df["status"].isin(["changed", "removed"])]
     remove_order_df.to_csv(remove_order_file, index=False)
     print(f"Remove order metadata saved to {remove_order_file}")
 
-    valid_statuses = ["found", "changed", "new"]
-    filtered_df = df[df["status"].isin(valid_statuses)][["Dataset_Name", "dataset_hash"]]
-    filtered_df.to_csv(previous_import, index=False)
-    print("previous_import.csv has been updated with relevant dataset entries.")
+    state.commit_run(run_id, final_df)
+    state.close()
+    print(f"Change state store updated (run {run_id}).")
+
+    clear_unchanged_datasets(base_dir)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Compare file hashes and detect dataset changes.")
@@ -132,6 +357,13 @@ if __name__ == "__main__":
     parser.add_argument("--dir", type=str, required=True, help="Path to the folder containing data files")
     parser.add_argument("--removeorder", type=str, default="removeorder_metadata.csv", help="Path to the remove order metadata CSV output")
     parser.add_argument("--portal", type=str, default="opendata.swiss", help="Name of the portal for logging")
+    parser.add_argument("--hash-mode", type=str, choices=HASH_MODES, default=HASH_MODE, help="Compare raw content (sha256) or a semantic fingerprint")
+    parser.add_argument("--changes-since", type=int, default=None, help="Only print the datasets changed after this run id")
+    parser.add_argument("--keep-found", action="store_true", help="Do not delete the documents of unchanged datasets")
     args = parser.parse_args()
 
-    compare_dataset_hashes(args.dir, args.removeorder, args.ext, args.portal)
+    if args.changes_since is not None:
+        print(changes_since(args.dir, args.changes_since).to_string(index=False))
+        raise SystemExit
+
+    compare_dataset_hashes(args.dir, args.removeorder, args.ext, args.portal, hash_mode=args.hash_mode, keep_found=args.keep_found)
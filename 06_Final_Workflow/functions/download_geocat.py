@@ -7,10 +7,28 @@ import time
 import csv
 import pandas as pd
 import re
+import json
+import shutil
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functions.http_client import create_session, HostLimiter, ValidatorCache, NOT_MODIFIED
+from functions.dataset_change_detector import add_unchanged_datasets, load_previous_dataset_names
+from functions.xml_cleaner import clean_xml_data, record_clean_result
 
+PORTAL_NAME = "geocat.ch"
 CSW_URL = "https://www.geocat.ch/geonetwork/srv/deu/csw"
 WAIT_TIME = 0
+DOWNLOAD_WORKERS = 8
+MAX_REQUESTS_PER_HOST = 8
+MANIFEST_FILE = "geocat_download_manifest.csv"
+CHECKPOINT_DIR = "csw_checkpoints"
+BAD_POSITIONS_FILE = "geocat_bad_positions.json"
+FIRST_HALF_LIMIT = 15000
+VALIDATOR_CACHE_FILE = "geocat_http_validators.json"
+RECORD_STATE_FILE = "geocat_record_state.csv"
+CSV_FIELDS = ["Identifier", "Title", "Modified"]
+NOT_MODIFIED_SIZE = -1  # Manifest size of records answered with HTTP 304
 
 
 # ===========================
@@ -57,9 +75,17 @@ def is_exception_report(xml_text):
         return False
 
 def extract_title_and_id(xml_text, start_position):
+    """
+    Extracts identifier, title and modification timestamp of the records of a GetRecords response.
+    The timestamp is taken from dct:modified, or dc:date if the record has no dct:modified.
+
+    Returns:
+        tuple: (list of (identifier, title, modified), number of records, root element)
+    """
     namespaces = {
         "csw": "http://www.opengis.net/cat/csw/2.0.2",
-        "dc": "http://purl.org/dc/elements/1.1/"
+        "dc": "http://purl.org/dc/elements/1.1/",
+        "dct": "http://purl.org/dc/terms/"
     }
     try:
         if is_exception_report(xml_text):
@@ -71,9 +97,13 @@ def extract_title_and_id(xml_text, start_position):
         for record in records:
             title_el = record.find("dc:title", namespaces)
             identifier_el = record.find("dc:identifier", namespaces)
+            modified_el = record.find("dct:modified", namespaces)
+            if modified_el is None or not (modified_el.text or "").strip():
+                modified_el = record.find("dc:date", namespaces)
             title = title_el.text.strip() if title_el is not None else "(kein Titel)"
             identifier = identifier_el.text.strip() if identifier_el is not None else "(kein Identifier)"
-            results.append((identifier, title))
+            modified = (modified_el.text or "").strip() if modified_el is not None else ""
+            results.append((identifier, title, modified))
         return results, len(records), root
     except ET.ParseError as e:
         return [], 0, None
@@ -84,27 +114,185 @@ def get_total_records(xml_root):
         return int(search_results.attrib["numberOfRecordsMatched"])
     return None
 
-def robust_fetch(start, end, ascending=True, log_file=None):
-    batch_size = end - start + 1
-    try:
-        xml_data = fetch_records_sorted_by_identifier(start_position=start, max_records=batch_size, ascending=ascending)
-        title_id_pairs, _, _ = extract_title_and_id(xml_data, start)
-        return title_id_pairs
-    except Exception as e:
-        if batch_size == 1:
-            if log_file:
-                direction = "(reversed)" if not ascending else "(forward)"
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                with open(log_file, mode="a", encoding="utf-8") as log:
-                    log.write(f"[{timestamp}] FinalFetchError {direction} at position {start}: {type(e).__name__}: {e}\n")
-            return []
+# ===========================
+# ADAPTIVE PAGE SIZE
+# ===========================
+
+class AdaptivePageSizer:
+    """
+    Page-size controller for CSW GetRecords requests.
+
+    Pages use the full batch size in healthy regions. Record positions that failed on
+    their own are remembered (and persisted between runs), so later pages end right
+    before a known bad position and the bad record is requested on its own. Only a
+    page that fails unexpectedly is narrowed down, and records of successful
+    sub-ranges are never requested again.
+    """
+
+    def __init__(self, max_size, state_path=None):
+        self.max_size = max_size
+        self.state_path = state_path
+        self.bad_positions = {"asc": set(), "desc": set()}
+        self.requests = 0
+        self.failed_requests = 0
+        if state_path and os.path.exists(state_path):
+            try:
+                with open(state_path, mode="r", encoding="utf-8") as f:
+                    state = json.load(f)
+                for direction in self.bad_positions:
+                    self.bad_positions[direction] = set(state.get(direction, []))
+            except (OSError, ValueError) as e:
+                print(f"Could not read bad record positions from {state_path}: {e}")
+
+    @staticmethod
+    def _direction(ascending):
+        return "asc" if ascending else "desc"
+
+    def next_size(self, position, end, ascending):
+        """Returns the size of the next page starting at `position`, ending before known bad records."""
+        bad_positions = self.bad_positions[self._direction(ascending)]
+        if position in bad_positions:
+            return 1
+        size = min(self.max_size, end - position + 1)
+        for offset in range(1, size):
+            if position + offset in bad_positions:
+                return offset
+        return size
+
+    def record_success(self, start, end, ascending):
+        self.requests += 1
+        if start == end:
+            self.bad_positions[self._direction(ascending)].discard(start)
+
+    def record_failure(self, start, end, ascending):
+        self.requests += 1
+        self.failed_requests += 1
+        if start == end:
+            self.bad_positions[self._direction(ascending)].add(start)
+
+    def save(self):
+        if not self.state_path:
+            return
+        with open(self.state_path, mode="w", encoding="utf-8") as f:
+            json.dump({direction: sorted(positions) for direction, positions in self.bad_positions.items()}, f)
+
+def log_final_fetch_error(log_file, position, ascending, exception):
+    if log_file:
+        direction = "(reversed)" if not ascending else "(forward)"
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with open(log_file, mode="a", encoding="utf-8") as log:
+            log.write(f"[{timestamp}] FinalFetchError {direction} at position {position}: {type(exception).__name__}: {exception}\n")
+
+def robust_fetch(start, end, ascending=True, log_file=None, sizer=None):
+    """
+    Fetches the records between `start` and `end` (inclusive) and skips records that cannot be fetched.
+
+    A failed page is narrowed down by requesting its first half: if that succeeds, the bad
+    record must be in the remaining part, which is halved again without re-requesting it.
+    Records that fail on their own are logged and remembered by the `sizer`.
+
+    Returns:
+        list of tuple: (identifier, title, modified) of all fetched records.
+    """
+    if sizer is None:
+        sizer = AdaptivePageSizer(end - start + 1)
+    results = []
+    position = start
+    failing_end = None  # End of a range known to contain a failing record
+    while position <= end:
+        if failing_end is not None and position <= failing_end:
+            size = max(1, (failing_end - position + 1) // 2)
         else:
-            mid = (start + end) // 2
-            results1 = robust_fetch(start, mid, ascending, log_file)
-            results2 = robust_fetch(mid + 1, end, ascending, log_file)
-            return results1 + results2
+            failing_end = None
+            size = sizer.next_size(position, end, ascending)
+        page_end = position + size - 1
+        try:
+            xml_data = fetch_records_sorted_by_identifier(start_position=position, max_records=size, ascending=ascending)
+            title_id_pairs, _, _ = extract_title_and_id(xml_data, position)
+        except Exception as e:
+            sizer.record_failure(position, page_end, ascending)
+            if size == 1:
+                log_final_fetch_error(log_file, position, ascending, e)
+                failing_end = None
+                position += 1
+            else:
+                failing_end = page_end
+            continue
+        sizer.record_success(position, page_end, ascending)
+        results.extend(title_id_pairs)
+        position = page_end + 1
+    return results
+
+# ===========================
+# CSW PAGE CHECKPOINTS
+# ===========================
+
+def build_page_plan(total_records, batch_size, first_half_limit=FIRST_HALF_LIMIT, start_pos=1):
+    """
+    Splits the harvest into CSW pages.
+
+    The first `first_half_limit` records are fetched in ascending identifier order,
+    the remaining records in descending order (positions counted from the end).
+
+    Returns:
+        list of tuple: (start, end, ascending) per page, in harvest order.
+    """
+    plan = []
+    last_forward = min(first_half_limit, total_records)
+    start = start_pos
+    while start <= last_forward:
+        end = min(start + batch_size - 1, last_forward)
+        plan.append((start, end, True))
+        start += batch_size
+
+    total_reverse_fetch = total_records - first_half_limit
+    for i in range(0, max(total_reverse_fetch, 0), batch_size):
+        plan.append((i + 1, min(i + batch_size, total_reverse_fetch), False))
+    return plan
+
+def checkpoint_path(checkpoint_dir, start, end, ascending):
+    direction = "asc" if ascending else "desc"
+    return os.path.join(checkpoint_dir, f"{direction}_{start:06d}_{end:06d}.csv")
+
+def prepare_checkpoints(checkpoint_dir, plan_info):
+    """
+    Creates the checkpoint folder. Checkpoints of an earlier run are kept only if they
+    belong to the same page plan (same total, batch size and start position).
+    """
+    plan_path = os.path.join(checkpoint_dir, "plan.json")
+    if os.path.exists(plan_path):
+        with open(plan_path, mode="r", encoding="utf-8") as f:
+            if json.load(f) == plan_info:
+                return
+        print("Page plan changed since the interrupted run, discarding checkpoints.")
+        shutil.rmtree(checkpoint_dir)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    with open(plan_path, mode="w", encoding="utf-8") as f:
+        json.dump(plan_info, f)
+
+def write_checkpoint(path, rows):
+    """Commits the rows of a completed page atomically."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, mode="w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+def read_checkpoint(path):
+    with open(path, mode="r", encoding="utf-8", newline="") as f:
+        return [tuple(row) for row in csv.reader(f)]
 
 def download_geocat_metadata(save_dir=r"02_geocat.ch", csv_file="geocat_dataset_id_title.csv", log_file=None, start_pos=None, batch_size=1000):
+    """
+    Harvests identifier, title and modification timestamp of all geocat.ch records via CSW GetRecords.
+
+    Every completed page is committed as a checkpoint in `csw_checkpoints`. An interrupted
+    harvest resumes automatically from the first page without a checkpoint. The final CSV
+    is assembled from the checkpoints, which are removed afterwards.
+
+    `log_file` (in `save_dir`) collects the positions that could not be fetched. It is emptied
+    at the start of each harvest and kept when an interrupted harvest is resumed.
+    """
     os.makedirs(save_dir, exist_ok=True)
     path_csv = os.path.join(save_dir, csv_file)
     if log_file:
@@ -112,16 +300,9 @@ def download_geocat_metadata(save_dir=r"02_geocat.ch", csv_file="geocat_dataset_
         if not os.path.exists(log_file):
             with open(log_file, mode="w") as f:
                 f.write("")  # Leere Datei erzeugen
-        log_initialized = True
-    else:
-        log_initialized = False
-
-    all_titles_and_ids = []
-    total_fetched = 0
-    ascending = True
 
     try:
-        initial_xml = fetch_records_sorted_by_identifier(start_position=1, max_records=1, ascending=ascending)
+        initial_xml = fetch_records_sorted_by_identifier(start_position=1, max_records=1, ascending=True)
         _, _, root = extract_title_and_id(initial_xml, 1)
         total_records = get_total_records(root)
         print(f"Total records available: {total_records}")
@@ -129,66 +310,51 @@ def download_geocat_metadata(save_dir=r"02_geocat.ch", csv_file="geocat_dataset_
         print(f"Failed to fetch total number of records: {e}")
         return
 
-    first_half_limit = 15000
-
-    if start_pos:
-        ascending = True
-        start = start_pos
-        while start < first_half_limit:
-            if log_file and not log_initialized:
-                open(log_file, mode="w").close()
-                log_initialized = True
-
-            end = min(start + batch_size - 1, first_half_limit - 1)
-            title_id_pairs = robust_fetch(start, end, ascending, log_file)
-            print(f"Fetched records {start} to {end}")
-            all_titles_and_ids.extend(title_id_pairs)
-            total_fetched += len(title_id_pairs)
-            start += batch_size
-            time.sleep(WAIT_TIME)
-
-        total_reverse_fetch = total_records - first_half_limit
-        ascending = False
-        for i in range(0, total_reverse_fetch, batch_size):
-            rel_start = i + 1
-            rel_end = min(i + batch_size, total_reverse_fetch)
-            title_id_pairs = robust_fetch(rel_start, rel_end, ascending, log_file)
-            print(f"Fetched records {rel_start} to {rel_end} (reversed)")
-            all_titles_and_ids.extend(title_id_pairs[::-1])
-            total_fetched += len(title_id_pairs)
-            time.sleep(WAIT_TIME)
-    else:
-        start = 1
-        while start <= first_half_limit:
-            if log_file and not log_initialized:
-                open(log_file, mode="w").close()
-                log_initialized = True
-
-            end = min(start + batch_size - 1, first_half_limit)
-            title_id_pairs = robust_fetch(start, end, ascending, log_file)
+    start_pos = start_pos or 1
+    plan = build_page_plan(total_records, batch_size, FIRST_HALF_LIMIT, start_pos)
+    checkpoint_dir = os.path.join(save_dir, CHECKPOINT_DIR)
+    prepare_checkpoints(checkpoint_dir, {
+        "total_records": total_records,
+        "batch_size": batch_size,
+        "first_half_limit": FIRST_HALF_LIMIT,
+        "start_pos": start_pos,
+        "fields": CSV_FIELDS
+    })
+
+    committed = sum(1 for start, end, ascending in plan if os.path.exists(checkpoint_path(checkpoint_dir, start, end, ascending)))
+    if committed:
+        print(f"Resuming harvest: {committed}/{len(plan)} pages already committed.")
+    elif log_file:
+        # A new harvest starts with an empty log; a resumed one keeps the failures logged so far
+        open(log_file, mode="w").close()
+
+    sizer = AdaptivePageSizer(batch_size, os.path.join(save_dir, BAD_POSITIONS_FILE))
+    for start, end, ascending in plan:
+        path = checkpoint_path(checkpoint_dir, start, end, ascending)
+        if os.path.exists(path):
+            continue
+        title_id_pairs = robust_fetch(start, end, ascending, log_file, sizer)
+        if ascending:
             print(f"Fetched records {start} to {end}")
-            all_titles_and_ids.extend(title_id_pairs)
-            total_fetched += len(title_id_pairs)
-            start += batch_size
-            time.sleep(WAIT_TIME)
-
-        start = total_records
-        ascending = False
-        while start > first_half_limit:
-            end = max(start - batch_size + 1, first_half_limit + 1)
-            title_id_pairs = robust_fetch(end, start, ascending, log_file)
-            print(f"Fetched records {end} to {start}")
-            all_titles_and_ids.extend(title_id_pairs[::-1])
-            total_fetched += len(title_id_pairs)
-            start = end - 1
-            time.sleep(WAIT_TIME)
+        else:
+            print(f"Fetched records {start} to {end} (reversed)")
+            title_id_pairs = title_id_pairs[::-1]
+        write_checkpoint(path, title_id_pairs)
+        sizer.save()
+        time.sleep(WAIT_TIME)
+    print(f"CSW requests: {sizer.requests} ({sizer.failed_requests} failed)")
+
+    all_titles_and_ids = []
+    for start, end, ascending in plan:
+        all_titles_and_ids.extend(read_checkpoint(checkpoint_path(checkpoint_dir, start, end, ascending)))
 
     with open(path_csv, mode="w", encoding="utf-8", newline="") as f:
         writer = csv.writer(f)
-        writer.writerow(["Identifier", "Title"])
+        writer.writerow(CSV_FIELDS)
         writer.writerows(all_titles_and_ids)
+    shutil.rmtree(checkpoint_dir)
 
-    print(f"Done. Total records fetched: {total_fetched}")
+    print(f"Done. Total records fetched: {len(all_titles_and_ids)}")
     print(f"Results saved to {path_csv}")
 
 
@@ -206,30 +372,140 @@ def sanitize_filename(identifier):
     return re.sub(r'[<>:"/\\|?*]', '_', identifier)
 
 
-def fetch_and_save_metadata(identifier, save_folder):
+def fetch_and_save_metadata(identifier, save_folder, session=None, limiter=None, validators=None, store=None, clean_xml=False):
+    """
+    Downloads the XML metadata of a record and saves it without indentation and blank lines
+    (to `save_folder`, or to the MetadataStore if one is given).
+
+    With `clean_xml=True` the document is parsed once and saved in the `xml_cleaner` format,
+    replacing the separate cleaning pass. Documents that cannot be parsed are saved as downloaded.
+
+    With a ValidatorCache the request is conditional (If-None-Match / If-Modified-Since);
+    an HTTP 304 answer returns NOT_MODIFIED without writing a file.
+    """
     url = f"https://www.geocat.ch/geonetwork/srv/api/records/{identifier}/formatters/xml?approved=true"
+    http = session if session is not None else requests
+    safe_identifier = sanitize_filename(identifier)
+    headers = validators.request_headers(safe_identifier) if validators is not None else {}
     try:
-        response = requests.get(url, timeout=10)
+        if limiter is not None:
+            with limiter.limit(url):
+                response = http.get(url, headers=headers, timeout=10)
+        else:
+            response = http.get(url, headers=headers, timeout=10)
+        if response.status_code == 304:
+            return NOT_MODIFIED
         response.raise_for_status()
 
         xml_content = response.content.decode('utf-8')
         xml_content = '\n'.join([line.strip() for line in xml_content.splitlines() if line.strip()])
+        cleaned = False
+        if clean_xml:
+            cleaned_xml = clean_xml_data(xml_content.encode("utf-8"), identifier, PORTAL_NAME)
+            if cleaned_xml is not None:
+                xml_content = cleaned_xml
+                cleaned = True
+
+        if store is not None:
+            store.put(safe_identifier, xml_content)
+        else:
+            xml_path = os.path.join(save_folder, f"{safe_identifier}.xml")
 
-        safe_identifier = sanitize_filename(identifier)
-        xml_path = os.path.join(save_folder, f"{safe_identifier}.xml")
-
-        with open(xml_path, "w", encoding="utf-8") as file:
-            file.write(xml_content)
+            with open(xml_path, "w", encoding="utf-8") as file:
+                file.write(xml_content)
 
+        if cleaned:
+            record_clean_result(True, PORTAL_NAME)
+        if validators is not None:
+            validators.store(safe_identifier, response)
         return True
 
     except requests.exceptions.RequestException as e:
         print(f"Error fetching metadata for {identifier}: {e}")
-    except OSError as e:
+    except (OSError, sqlite3.Error) as e:
         print(f"Error saving metadata for {identifier}: {e}")
+    if validators is not None:
+        validators.discard(safe_identifier)
     return False
 
-def download_xml_metadata_from_csv(save_dir="01_ETL\\02_geocat.ch", csv_file="geocat_dataset_id_title.csv", max_files=None):
+
+# ===========================
+# DOWNLOAD MANIFEST
+# ===========================
+
+def load_manifest(manifest_path):
+    """
+    Returns {identifier: (filename, size)} of the downloads of an interrupted run.
+    Records answered with HTTP 304 have the size NOT_MODIFIED_SIZE and no file.
+    """
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, mode="r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                try:
+                    manifest[row["Identifier"]] = (row["Filename"], int(row["Size"]))
+                except (KeyError, TypeError, ValueError):
+                    continue  # Truncated last line of an interrupted run
+    return manifest
+
+def is_completed(identifier, manifest, save_folder, store=None):
+    """Checks if a record was downloaded by the interrupted run and its file is still intact."""
+    entry = manifest.get(identifier)
+    if entry is None:
+        return False
+    if entry[1] == NOT_MODIFIED_SIZE:
+        return True
+    if store is not None:
+        return store.get_size(sanitize_filename(identifier)) == entry[1]
+    xml_path = os.path.join(save_folder, entry[0])
+    return os.path.exists(xml_path) and os.path.getsize(xml_path) == entry[1]
+
+# ===========================
+# RECORD TIMESTAMPS
+# ===========================
+
+def load_record_state(state_path):
+    """Returns {identifier: modified} of the records saved by earlier runs."""
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, mode="r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                state[row["Identifier"]] = row["Modified"]
+    return state
+
+def save_record_state(state_path, state):
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, mode="w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Identifier", "Modified"])
+        writer.writerows(sorted(state.items()))
+    os.replace(tmp_path, state_path)
+
+def download_xml_metadata_from_csv(save_dir="01_ETL\\02_geocat.ch", csv_file="geocat_dataset_id_title.csv", max_files=None, workers=1, store=None, clean_xml=False,
+                                   full_download=False):
+    """
+    Downloads the XML metadata of all records listed in the CSV file.
+
+    Every completed download is appended to a progress manifest. If a run is interrupted,
+    the next call resumes: records whose file is on disk with a matching manifest entry
+    are skipped. The manifest is removed once a run has gone through all records.
+
+    Change-aware download: the CSW modification timestamp (column "Modified") of every saved
+    record is kept in `geocat_record_state.csv`. Records with a hash in the previous import whose
+    timestamp did not move since are not requested at all; the others are requested
+    conditionally. Skipped records and records answered with HTTP 304 are added to the
+    unchanged datasets of the change detector. With `full_download=True` every record is
+    downloaded unconditionally (e.g. to seed the persistent tables of `extracted_tables`).
+
+    Args:
+        save_dir (str): Base directory of geocat.ch.
+        csv_file (str): CSV with the record identifiers.
+        max_files (int, optional): Limit on the number of records.
+        workers (int): Number of concurrent download workers (1 = sequential).
+        store (MetadataStore, optional): Saves the XML in the packed store instead of `saved_metadata_xml`.
+        clean_xml (bool): Cleans the XML during the download (see `fetch_and_save_metadata`).
+        full_download (bool): Download every record, without skipping unchanged ones.
+    """
     save_folder = os.path.join(save_dir, "saved_metadata_xml")
     print("Save folder:", save_folder)
 
@@ -238,17 +514,102 @@ def download_xml_metadata_from_csv(save_dir="01_ETL\\02_geocat.ch", csv_file="ge
     path_csv = os.path.join(save_dir, csv_file)
     print("CSV path:", path_csv)
 
-    df_datasets = pd.read_csv(path_csv)
+    df_datasets = pd.read_csv(path_csv, dtype=str, keep_default_na=False)
+    if "Modified" not in df_datasets.columns:
+        df_datasets["Modified"] = ""  # CSV of a harvest without timestamps
     num_records = len(df_datasets) if max_files is None else min(max_files, len(df_datasets))
-
-    downloaded = 0
-    for idx, row in df_datasets.head(num_records).iterrows():
-        success = fetch_and_save_metadata(row["Identifier"], save_folder)
-        if success:
-            downloaded += 1
-            if downloaded % 500 == 0:
-                print(f"{downloaded} downloaded")
-
-    print(f"✅ Metadata retrieval completed. Total downloaded: {downloaded}/{num_records}")
-
-
+    df_datasets = df_datasets.head(num_records)
+    identifiers = df_datasets["Identifier"].tolist()
+    modified_by_identifier = dict(zip(df_datasets["Identifier"], df_datasets["Modified"]))
+
+    validator_path = os.path.join(save_dir, VALIDATOR_CACHE_FILE)
+    known_datasets = set() if full_download else load_previous_dataset_names(save_dir, validator_path)
+    validators = ValidatorCache(validator_path, known_datasets)
+    state_path = os.path.join(save_dir, RECORD_STATE_FILE)
+    record_state = load_record_state(state_path)
+
+    unchanged = [
+        identifier for identifier in identifiers
+        if modified_by_identifier[identifier]
+        and record_state.get(identifier) == modified_by_identifier[identifier]
+        and sanitize_filename(identifier) in known_datasets
+    ]
+    unchanged_set = set(unchanged)
+    print(f"{len(unchanged)} records unchanged since the last run (CSW timestamp), skipped.")
+
+    manifest_path = os.path.join(save_dir, MANIFEST_FILE)
+    manifest = load_manifest(manifest_path)
+    pending = [
+        identifier for identifier in identifiers
+        if identifier not in unchanged_set and not is_completed(identifier, manifest, save_folder, store)
+    ]
+    if manifest:
+        print(f"Resuming interrupted download: {num_records - len(unchanged) - len(pending)} records already downloaded.")
+
+    workers = max(1, workers or 1)
+    session = create_session(pool_size=min(workers, MAX_REQUESTS_PER_HOST))
+    limiter = HostLimiter(MAX_REQUESTS_PER_HOST)
+    write_header = not os.path.exists(manifest_path)
+
+    downloaded = num_records - len(unchanged) - len(pending)
+    with open(manifest_path, mode="a", encoding="utf-8", newline="") as manifest_file:
+        writer = csv.writer(manifest_file)
+        if write_header:
+            writer.writerow(["Identifier", "Filename", "Size"])
+
+        def record_success(identifier):
+            filename = f"{sanitize_filename(identifier)}.xml"
+            if store is not None:
+                size = store.get_size(sanitize_filename(identifier))
+            else:
+                size = os.path.getsize(os.path.join(save_folder, filename))
+            writer.writerow([identifier, filename, size])
+            manifest_file.flush()
+
+        def record_not_modified(identifier):
+            writer.writerow([identifier, "", NOT_MODIFIED_SIZE])
+            manifest_file.flush()
+
+        try:
+            if workers == 1:
+                results = ((identifier, fetch_and_save_metadata(identifier, save_folder, session, validators=validators, store=store, clean_xml=clean_xml))
+                           for identifier in pending)
+            else:
+                executor = ThreadPoolExecutor(max_workers=workers)
+                futures = {
+                    executor.submit(fetch_and_save_metadata, identifier, save_folder, session, limiter, validators, store, clean_xml): identifier
+                    for identifier in pending
+                }
+                results = ((futures[future], future.result()) for future in as_completed(futures))
+
+            for identifier, success in results:
+                if success == NOT_MODIFIED:
+                    record_not_modified(identifier)
+                    record_state[identifier] = modified_by_identifier[identifier]
+                    downloaded += 1
+                elif success:
+                    record_success(identifier)
+                    record_state[identifier] = modified_by_identifier[identifier]
+                    downloaded += 1
+                    if downloaded % 500 == 0:
+                        print(f"{downloaded} downloaded")
+                else:
+                    record_state.pop(identifier, None)  # Retry on the next run
+        finally:
+            if workers > 1:
+                executor.shutdown(cancel_futures=True)
+            session.close()
+            validators.save()
+            save_record_state(state_path, record_state)
+
+    not_modified = [
+        sanitize_filename(identifier)
+        for identifier, (_, size) in load_manifest(manifest_path).items()
+        if size == NOT_MODIFIED_SIZE
+    ]
+    add_unchanged_datasets(save_dir, not_modified + [sanitize_filename(identifier) for identifier in unchanged])
+
+    # The run went through all records, so the next call starts a fresh download
+    os.remove(manifest_path)
+    print(f"✅ Metadata retrieval completed. Total downloaded: {downloaded - len(not_modified)}/{num_records}, "
+          f"not modified (HTTP 304): {len(not_modified)}, unchanged timestamp: {len(unchanged)}")
@@ -12,33 +12,101 @@ metadata in RDF/XML format. It performs the following tasks:
    - Removes blank node identifiers and license elements for uniformity.
    - Sorts elements and attributes for consistent structure.
    - Prettifies and saves the final cleaned XML to disk.
+   - With `clean_xml=True` the `xml_cleaner` step is applied to the same in-memory tree,
+     so each document is parsed once and written once (fused download and cleaning).
 4. Logs success or failure of each operation for monitoring and statistics.
 
+Catalogue harvest: `download_opendata_swiss_catalog` pages through the DCAT catalogue
+(`catalog.xml`, one request per page instead of one per dataset), splits each page into
+per-dataset records with a streaming `iterparse` and saves them in the same layout
+(file name = CKAN dataset name). A page that still fails after its retries stops the
+download; the datasets of the previous import that were not saved are recorded as unchanged.
+
+Incremental harvest: with `incremental=True` only datasets whose CKAN `metadata_modified`
+is at or after the high-water mark of the last successful run are listed for download
+(via `package_search`). All other current identifiers are recorded as unchanged for the
+change detector; identifiers missing from `package_list` are reported as removed.
+The high-water mark is stored in `opendata_swiss_harvest_state.json` and only advanced
+once the download of all listed datasets succeeded.
+
+Conditional requests: the ETag / Last-Modified validators of every saved dataset are kept
+in `opendata_swiss_http_validators.json`. A dataset that is answered with HTTP 304 is not
+downloaded, cleaned or hashed again; it is recorded as unchanged for the change detector.
+
+Downloads reuse a pooled keep-alive session with retry/backoff (see `http_client`).
+With `workers > 1` the XML metadata is downloaded concurrently by a thread pool,
+limited to `MAX_REQUESTS_PER_HOST` parallel requests against the portal.
+
 Logging is handled via `error_logger` and `statistics_logger` modules.
 
 Constants:
 - PORTAL_NAME: Name of the portal being processed.
 - MAX_DATASETS: Optional limit on the number of datasets to process.
+- DOWNLOAD_WORKERS: Default number of concurrent download workers.
+- MAX_REQUESTS_PER_HOST: Maximum number of parallel requests sent to the portal.
+- HARVEST_STATE_FILE: File name of the incremental harvest state (high-water mark).
+- SEARCH_PAGE_SIZE: Number of results per `package_search` request.
+- VALIDATOR_CACHE_FILE: File name of the ETag / Last-Modified cache.
+- CATALOG_URL: Paged DCAT catalogue of the portal.
+- CATALOG_PAGE_ATTEMPTS: Number of attempts to fetch and split a catalogue page.
+- CATALOG_RETRY_DELAY: Delay in seconds before the next attempt (times the attempt number).
 
 Dependencies:
 - requests
 - csv
+- json
 - os
+- re
+- time
+- concurrent.futures
 - xml.etree.ElementTree
-- xml.dom.minidom
 - error_logger
 - statistics_logger
+- http_client
+- xml_canonicalizer
+- xml_cleaner
 """
 
 import requests
 import csv
+import json
 import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
 from functions.error_logger import log_error
-from functions.statistics_logger import log_portal_result, save_statistics, count_datasets_in_csv
+from functions.statistics_logger import log_portal_result, add_portal_counts, save_statistics, count_datasets_in_csv
+from functions.http_client import create_session, HostLimiter, ValidatorCache, NOT_MODIFIED
+from functions.xml_canonicalizer import canonicalize, to_pretty_xml, apply_pretty_layout
+from functions.xml_cleaner import clean_xml_root, serialize_cleaned_xml, record_clean_result
+from functions.dataset_change_detector import (
+    save_unchanged_datasets, clear_unchanged_datasets, add_unchanged_datasets, load_previous_dataset_names
+)
 
 PORTAL_NAME = "opendata.swiss"
+DOWNLOAD_WORKERS = 8
+MAX_REQUESTS_PER_HOST = 8
+HARVEST_STATE_FILE = "opendata_swiss_harvest_state.json"
+SEARCH_PAGE_SIZE = 1000
+VALIDATOR_CACHE_FILE = "opendata_swiss_http_validators.json"
+PACKAGE_SEARCH_URL = "https://ckan.opendata.swiss/api/3/action/package_search"
+CATALOG_URL = "https://ckan.opendata.swiss/catalog.xml"
+CATALOG_NAMESPACES = {
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "dcat": "http://www.w3.org/ns/dcat#",
+    "dct": "http://purl.org/dc/terms/",
+    "hydra": "http://www.w3.org/ns/hydra/core#",
+}
+RDF_ROOT = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}RDF"
+RDF_ABOUT = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about"
+RDF_RESOURCE = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource"
+DCAT_DATASET = "{http://www.w3.org/ns/dcat#}Dataset"
+DCAT_DATASET_PROPERTY = "{http://www.w3.org/ns/dcat#}dataset"
+HYDRA_NEXT_PAGE = "{http://www.w3.org/ns/hydra/core#}nextPage"
+CATALOG_PAGE_ATTEMPTS = 3
+CATALOG_RETRY_DELAY = 10  # seconds, multiplied by the attempt number
+UNSAFE_FILENAME_PATTERN = re.compile(r'[<>:"/\\|?*]')
 
 
 def fetch_datasets():
@@ -87,32 +155,171 @@ def save_datasets_to_csv(dataset_names, save_path):
         log_error(f"Failed to save dataset names to {save_path}", "error", e)
         log_portal_result(PORTAL_NAME, "Save Dataset Names to CSV", success=False)
 
-def gather_opendata_swiss_datasets(opendata_swiss_list_datasets_save_path):
+def to_solr_date(metadata_modified):
+    """
+    Converts a CKAN `metadata_modified` value (e.g. '2024-05-01T12:34:56.123456')
+    into the Solr date format used in `package_search` filter queries.
+    """
+    return metadata_modified[:19] + "Z"
+
+def fetch_modified_datasets(since=None, session=None):
+    """
+    Lists all datasets modified at or after `since` using the CKAN `package_search` API.
+
+    Args:
+        since (str, optional): CKAN `metadata_modified` timestamp. If None, all datasets
+            are searched (used to determine the current high-water mark).
+        session (requests.Session, optional): Pooled session to reuse connections.
+
+    Returns:
+        tuple: (list of dataset names, newest `metadata_modified` seen) or (None, None) on failure.
+    """
+    http = session if session is not None else requests
+    query = f"metadata_modified:[{to_solr_date(since)} TO *]" if since else "*:*"
+    dataset_names = []
+    newest_modified = since
+    start = 0
+    try:
+        while True:
+            params = {
+                "fq": query,
+                "fl": "name,metadata_modified",
+                "sort": "metadata_modified asc",
+                "rows": SEARCH_PAGE_SIZE,
+                "start": start
+            }
+            response = http.get(PACKAGE_SEARCH_URL, params=params, timeout=30)
+            response.raise_for_status()
+            result = response.json()["result"]
+            results = result["results"]
+            for dataset in results:
+                dataset_names.append(dataset["name"])
+                modified = dataset.get("metadata_modified")
+                if modified and (newest_modified is None or modified > newest_modified):
+                    newest_modified = modified
+            start += len(results)
+            if not results or start >= result["count"]:
+                break
+        log_portal_result(PORTAL_NAME, "Fetch Modified Datasets", success=True)
+        return dataset_names, newest_modified
+    except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+        log_error(f"Failed to fetch modified datasets from {PACKAGE_SEARCH_URL}", "error", e)
+        log_portal_result(PORTAL_NAME, "Fetch Modified Datasets", success=False)
+        return None, None
+
+def fetch_newest_modified(session=None):
+    """
+    Returns the newest `metadata_modified` timestamp of the portal, or None on failure.
+    """
+    http = session if session is not None else requests
+    params = {"fl": "name,metadata_modified", "sort": "metadata_modified desc", "rows": 1}
+    try:
+        response = http.get(PACKAGE_SEARCH_URL, params=params, timeout=30)
+        response.raise_for_status()
+        results = response.json()["result"]["results"]
+        return results[0]["metadata_modified"] if results else None
+    except (requests.exceptions.RequestException, KeyError, ValueError, IndexError) as e:
+        log_error("Failed to fetch the newest modification date", "error", e)
+        return None
+
+def load_harvest_state(state_path):
+    """Loads the incremental harvest state, or an empty state if none exists."""
+    if not os.path.exists(state_path):
+        return {}
+    try:
+        with open(state_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        log_error(f"Failed to read harvest state {state_path}, starting a full harvest", "warning", e)
+        return {}
+
+def save_harvest_state(state, state_path):
+    """Saves the incremental harvest state."""
+    with open(state_path, "w", encoding="utf-8") as file:
+        json.dump(state, file, indent=2)
+
+def commit_high_water_mark(state_path):
+    """
+    Promotes the pending high-water mark of the current run to the committed one.
+    Called after all listed datasets were downloaded successfully.
+    """
+    state = load_harvest_state(state_path)
+    if state.get("pending_high_water_mark"):
+        state["high_water_mark"] = state.pop("pending_high_water_mark")
+        save_harvest_state(state, state_path)
+        log_error(f"Harvest high-water mark advanced to {state['high_water_mark']}", "info")
+
+def gather_opendata_swiss_datasets(opendata_swiss_list_datasets_save_path, incremental=False):
     """
     Coordinates the process of fetching dataset names and saving them to a CSV file.
     Also logs statistics after the operation.
+
+    With `incremental=True` and a stored high-water mark, only new and changed datasets
+    are saved to the CSV. The remaining current datasets are recorded as unchanged for the
+    change detector, so that only datasets missing from `package_list` count as removed.
     """
+    base_dir = os.path.dirname(opendata_swiss_list_datasets_save_path)
+    state_path = os.path.join(base_dir, HARVEST_STATE_FILE)
+    state = load_harvest_state(state_path)
     dataset_names = fetch_datasets()
+    datasets_to_download = dataset_names
+    clear_unchanged_datasets(base_dir)
+
     if dataset_names:
-        save_datasets_to_csv(dataset_names, opendata_swiss_list_datasets_save_path)
+        high_water_mark = state.get("high_water_mark") if incremental else None
+        if high_water_mark:
+            changed_names, newest_modified = fetch_modified_datasets(high_water_mark)
+            if changed_names is not None:
+                current_names = set(dataset_names)
+                datasets_to_download = [name for name in dict.fromkeys(changed_names) if name in current_names]
+                unchanged_names = current_names.difference(datasets_to_download)
+                save_unchanged_datasets(base_dir, unchanged_names)
+                log_portal_result(PORTAL_NAME, "Unchanged Datasets", success=len(unchanged_names))
+                log_error(f"Incremental harvest since {high_water_mark}: {len(datasets_to_download)} new or changed, "
+                          f"{len(unchanged_names)} unchanged datasets.", "info")
+                state["pending_high_water_mark"] = newest_modified
+            else:
+                log_error("Incremental harvest failed, falling back to a full harvest.", "warning")
+                state["pending_high_water_mark"] = fetch_newest_modified()
+        else:
+            if incremental:
+                log_error("No harvest high-water mark found, starting a full harvest.", "info")
+            state["pending_high_water_mark"] = fetch_newest_modified()
+        save_harvest_state(state, state_path)
+        save_datasets_to_csv(datasets_to_download, opendata_swiss_list_datasets_save_path)
     count_datasets_in_csv(opendata_swiss_list_datasets_save_path, PORTAL_NAME)
-    log_error(f"Finished downloading and processing {len(dataset_names)} datasets.", "info")
+    log_error(f"Finished downloading and processing {len(datasets_to_download)} datasets.", "info")
     save_statistics()
 
-def fetch_xml_metadata(identifier):
+def fetch_xml_metadata(identifier, session=None, limiter=None, validators=None):
     """
     Fetches the RDF/XML metadata content for a given dataset identifier.
 
     Args:
         identifier (str): Dataset identifier.
+        session (requests.Session, optional): Pooled session to reuse connections.
+        limiter (HostLimiter, optional): Limits concurrent requests per host.
+        validators (ValidatorCache, optional): Sends a conditional request and stores the
+            ETag / Last-Modified of the response.
 
     Returns:
-        bytes or None: Raw XML content if successful, otherwise None.
+        bytes, NOT_MODIFIED or None: Raw XML content if successful, NOT_MODIFIED if the server
+        answered HTTP 304, otherwise None.
     """
     url = f"https://ckan.opendata.swiss/dataset/{identifier}.xml"
+    http = session if session is not None else requests
+    headers = validators.request_headers(identifier) if validators is not None else {}
     try:
-        response = requests.get(url, timeout=10)
+        if limiter is not None:
+            with limiter.limit(url):
+                response = http.get(url, headers=headers, timeout=10)
+        else:
+            response = http.get(url, headers=headers, timeout=10)
+        if response.status_code == 304:
+            return NOT_MODIFIED
         response.raise_for_status()
+        if validators is not None:
+            validators.store(identifier, response)
         return response.content
     except requests.exceptions.RequestException as e:
         log_error(f"Failed to fetch XML metadata for {identifier}", "error", e)
@@ -172,26 +379,18 @@ def remove_license_elements(elem):
 
 def sort_xml(elem):
     """
-    Recursively sorts XML elements and attributes for consistent ordering.
+    Sorts XML elements and attributes for consistent ordering.
+    The whole tree is canonicalised in a single bottom-up pass (see `xml_canonicalizer`).
 
     Args:
         elem (Element): Root XML element to sort.
     """
-    elem.attrib = dict(sorted(elem.attrib.items()))
-    for child in elem:
-        sort_xml(child)
-    elem[:] = sorted(
-        elem,
-        key=lambda e: (
-            e.tag,
-            sorted(e.attrib.items()),
-            ET.tostring(e, encoding='utf-8', method='xml')
-        )
-    )
+    canonicalize(elem)
 
 def prettify_xml(elem):
     """
-    Formats an XML element into a pretty-printed string.
+    Formats an XML element into a pretty-printed string without blank lines.
+    Written directly from the element tree (see `xml_canonicalizer.to_pretty_xml`).
 
     Args:
         elem (Element): Root XML element.
@@ -199,14 +398,101 @@ def prettify_xml(elem):
     Returns:
         str: Pretty-printed XML string.
     """
-    rough_string = ET.tostring(elem, encoding='utf-8')
-    parsed = minidom.parseString(rough_string)
-    return parsed.toprettyxml(indent="  ", newl="\n")
+    return to_pretty_xml(elem, indent="  ")
+
+def clean_dataset_xml(root):
+    """
+    Cleans a sorted dataset tree like `xml_cleaner` cleans the saved pretty-printed XML file.
+    The whitespace of the pretty-printed file is applied to the tree directly; only trees
+    that `apply_pretty_layout` does not support take the exact write/parse round-trip.
+
+    Args:
+        root (Element): Sorted root XML element (modified in place).
+
+    Returns:
+        str: Cleaned XML, identical to the output of `xml_cleaner.clean_xml_file`.
+    """
+    if not apply_pretty_layout(root, indent="  "):
+        root = ET.fromstring(prettify_xml(root).encode("utf-8"))
+    clean_xml_root(root)
+    return serialize_cleaned_xml(root)
 
-def download_opendata_swiss_xml(opendata_swiss_list_datasets_save_path,open_data_swiss_data_folder,MAX_DATASETS):
+def save_dataset_tree(identifier, root, open_data_swiss_data_folder, store=None, clean_xml=False):
+    """
+    Normalises the RDF/XML tree of a dataset (blank node ids and license elements removed, sorted)
+    and saves it as `<identifier>.xml`, pretty-printed or in the `xml_cleaner` format.
+
+    Args:
+        identifier (str): Dataset identifier (file name without extension).
+        root (Element): Parsed rdf:RDF root of the dataset (modified in place).
+        open_data_swiss_data_folder (str): Folder where the XML file is saved.
+        store (MetadataStore, optional): Saves the XML in the packed store instead of a file.
+        clean_xml (bool): Saves the cleaned XML instead of the pretty-printed XML.
+    """
+    remove_blank_node_ids(root)
+    remove_license_elements(root)
+    sort_xml(root)
+    sorted_xml = clean_dataset_xml(root) if clean_xml else prettify_xml(root)
+    if store is not None:
+        store.put(identifier, sorted_xml)
+    else:
+        xml_filename = os.path.join(open_data_swiss_data_folder, f"{identifier}.xml")
+        with open(xml_filename, "w", encoding="utf-8") as file:
+            file.write(sorted_xml)
+
+def download_dataset_xml(identifier, open_data_swiss_data_folder, session=None, limiter=None, validators=None, store=None, clean_xml=False):
+    """
+    Downloads, cleans, sorts and saves the XML metadata of a single dataset.
+
+    Args:
+        identifier (str): Dataset identifier.
+        open_data_swiss_data_folder (str): Folder where the XML file is saved.
+        session (requests.Session, optional): Pooled session to reuse connections.
+        limiter (HostLimiter, optional): Limits concurrent requests per host.
+        validators (ValidatorCache, optional): Cache for conditional requests.
+        store (MetadataStore, optional): Saves the XML in the packed store instead of a file.
+        clean_xml (bool): Saves the cleaned XML (`xml_cleaner` format) instead of the pretty-printed XML.
+
+    Returns:
+        bool or NOT_MODIFIED: True if the XML file was saved, NOT_MODIFIED if the dataset is
+        unchanged since the last download, otherwise False.
+    """
+    try:
+        xml_data = fetch_xml_metadata(identifier, session, limiter, validators)
+        if xml_data == NOT_MODIFIED:
+            log_portal_result(PORTAL_NAME, "XML Metadata Not Modified", success=True)
+            return NOT_MODIFIED
+        if xml_data:
+            save_dataset_tree(identifier, ET.fromstring(xml_data), open_data_swiss_data_folder, store, clean_xml)
+            log_portal_result(PORTAL_NAME, "Download XML Metadata", success=True)
+            if clean_xml:
+                record_clean_result(True, PORTAL_NAME)
+            return True
+    except Exception as e:
+        log_error(f"Failed to process {identifier}", "error", e)
+        log_portal_result(PORTAL_NAME, "Download XML Metadata", success=False)
+    # Without a saved file the validators must not suppress the next download
+    if validators is not None:
+        validators.discard(identifier)
+    return False
+
+def download_opendata_swiss_xml(opendata_swiss_list_datasets_save_path,open_data_swiss_data_folder,MAX_DATASETS,workers=1,store=None,clean_xml=False,full_download=False):
     """
     Orchestrates downloading and processing of XML metadata for datasets listed in CSV.
     Saves cleaned and sorted XML files to disk.
+
+    With `workers > 1` the datasets are downloaded concurrently over a shared pooled
+    session, with at most `MAX_REQUESTS_PER_HOST` parallel requests to the portal.
+    The achieved requests per second are reported to the statistics logger.
+
+    With a MetadataStore the XML is saved in the packed store instead of the folder.
+    With `clean_xml=True` the XML is cleaned during the download, so no separate
+    `xml_cleaner.process_folder` pass is needed.
+
+    Conditional requests are only sent for datasets with a hash in the previous import;
+    datasets answered with HTTP 304 are added to the unchanged datasets of this run.
+    With `full_download=True` no conditional requests are sent (e.g. to seed the persistent
+    tables of `extracted_tables`).
     """
 
 
@@ -218,25 +504,236 @@ def download_opendata_swiss_xml(opendata_swiss_list_datasets_save_path,open_data
     if MAX_DATASETS is not None:
         identifiers = identifiers[:MAX_DATASETS]
 
-    log_error(f"Starting download of {len(identifiers)} dataset metadata files...", "info")
-    for index, identifier in enumerate(identifiers, start=1):
-        try:
-            xml_data = fetch_xml_metadata(identifier)
-            if xml_data:
-                metadata = parse_xml_metadata(xml_data)
-                root = ET.fromstring(xml_data)
-                remove_blank_node_ids(root)
-                remove_license_elements(root)
-                sort_xml(root)
-                sort_xml(root)  # Ensure full document-level sorting
-                sorted_xml = prettify_xml(root)
-                sorted_xml = "\n".join([line for line in sorted_xml.splitlines() if line.strip()])
-                xml_filename = os.path.join(open_data_swiss_data_folder, f"{identifier}.xml")
-                with open(xml_filename, "w", encoding="utf-8") as file:
-                    file.write(sorted_xml)
-                log_portal_result(PORTAL_NAME, "Download XML Metadata", success=True)
-        except Exception as e:
-            log_error(f"Failed to process {identifier}", "error", e)
-            log_portal_result(PORTAL_NAME, "Download XML Metadata", success=False)
-    log_error(f"All XML metadata files have been successfully saved in {open_data_swiss_data_folder}", "info")
+    workers = max(1, workers or 1)
+    session = create_session(pool_size=min(workers, MAX_REQUESTS_PER_HOST))
+    limiter = HostLimiter(MAX_REQUESTS_PER_HOST)
+    base_dir = os.path.dirname(opendata_swiss_list_datasets_save_path)
+    validator_path = os.path.join(base_dir, VALIDATOR_CACHE_FILE)
+    validators = ValidatorCache(validator_path, set() if full_download else load_previous_dataset_names(base_dir, validator_path))
+    not_modified = []
+
+    log_error(f"Starting download of {len(identifiers)} dataset metadata files with {workers} worker(s)...", "info")
+    start_time = time.perf_counter()
+    failed = 0
+    try:
+        if workers == 1:
+            for identifier in identifiers:
+                result = download_dataset_xml(identifier, open_data_swiss_data_folder, session, validators=validators, store=store, clean_xml=clean_xml)
+                if result == NOT_MODIFIED:
+                    not_modified.append(identifier)
+                elif not result:
+                    failed += 1
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(download_dataset_xml, identifier, open_data_swiss_data_folder, session, limiter, validators, store, clean_xml): identifier
+                    for identifier in identifiers
+                }
+                for index, future in enumerate(as_completed(futures), start=1):
+                    result = future.result()
+                    if result == NOT_MODIFIED:
+                        not_modified.append(futures[future])
+                    elif not result:
+                        failed += 1
+                    if index % 1000 == 0:
+                        log_error(f"{index}/{len(identifiers)} dataset metadata files processed", "info")
+    finally:
+        session.close()
+        add_unchanged_datasets(base_dir, not_modified)
+        validators.save()
+
+    elapsed = time.perf_counter() - start_time
+    requests_per_second = len(identifiers) / elapsed if elapsed > 0 else 0
+    log_portal_result(PORTAL_NAME, "Download Requests per Second", success=int(round(requests_per_second)))
+    log_error(f"Downloaded {len(identifiers)} dataset metadata files in {elapsed:.1f}s ({requests_per_second:.1f} requests/s)", "info")
+    log_error(f"{len(not_modified)} datasets not modified since the last download (HTTP 304)", "info")
+    if failed == 0:
+        log_error(f"All XML metadata files have been successfully saved in {open_data_swiss_data_folder}", "info")
+        commit_high_water_mark(os.path.join(os.path.dirname(opendata_swiss_list_datasets_save_path), HARVEST_STATE_FILE))
+    else:
+        log_error(f"{failed} XML metadata files could not be downloaded, harvest high-water mark not advanced", "warning")
+    save_statistics()
+
+def _ckan_dataset_name(uri):
+    """Returns the CKAN name of a `.../dataset/<name>` URI, else None."""
+    if not uri or "/dataset/" not in uri:
+        return None
+    name = uri.split("/dataset/", 1)[1].split("?", 1)[0].split("#", 1)[0].strip("/").split("/", 1)[0]
+    return name or None
+
+def catalog_record_name(dataset_element):
+    """
+    Returns the file name (without extension) of a dataset of the catalogue: the CKAN name
+    (the name of the per-dataset download and of the previous imports) from the
+    `.../dataset/<name>` URI in rdf:about or dcat:landingPage, else the sanitised dct:identifier.
+
+    Args:
+        dataset_element (Element): dcat:Dataset element.
+
+    Returns:
+        str or None: Dataset name, None if the dataset has neither.
+    """
+    name = _ckan_dataset_name(dataset_element.get(RDF_ABOUT, ""))
+    if name:
+        return name
+    for landing_page in dataset_element.findall("dcat:landingPage", CATALOG_NAMESPACES):
+        name = _ckan_dataset_name(landing_page.get(RDF_RESOURCE) or (landing_page.text or "").strip())
+        if name:
+            return name
+    identifier = dataset_element.find("dct:identifier", CATALOG_NAMESPACES)
+    if identifier is not None and identifier.text and identifier.text.strip():
+        name = UNSAFE_FILENAME_PATTERN.sub("_", identifier.text.strip())
+        # Not the CKAN name: the dataset is reported as removed and new against a per-dataset download
+        log_error(f"No CKAN dataset name in the catalogue record of {identifier.text.strip()}, saved as {name}", "warning")
+        return name
+    return None
+
+def iter_catalog_records(source, page_info):
+    """
+    Stream-parses a page of the DCAT catalogue and yields one rdf:RDF record per dataset.
+
+    The dcat:Dataset elements are detached from the catalogue as soon as they are complete,
+    so the memory use does not grow with the size of the page.
+
+    Args:
+        source (file object): RDF/XML of a catalogue page.
+        page_info (dict): Receives "next_page" (hydra:nextPage) if the catalogue has more pages.
+
+    Yields:
+        tuple: (dataset name or None, rdf:RDF root containing the dcat:Dataset)
+    """
+    parents = []
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            parents.append(element)
+            continue
+        parents.pop()
+        if element.tag == HYDRA_NEXT_PAGE:
+            page_info["next_page"] = (element.text or "").strip() or None
+        elif element.tag == DCAT_DATASET and parents and parents[-1].tag == DCAT_DATASET_PROPERTY:
+            parents[-1].remove(element)
+            record = ET.Element(RDF_ROOT)
+            record.append(element)
+            yield catalog_record_name(element), record
+
+def save_catalog_page(session, page, open_data_swiss_data_folder, store=None, clean_xml=False, limit=None):
+    """
+    Fetches one page of the DCAT catalogue and saves its datasets.
+
+    Args:
+        session (requests.Session): HTTP session.
+        page (int): Page number.
+        open_data_swiss_data_folder (str): Folder where the XML files are saved.
+        store (MetadataStore, optional): Saves the XML in the packed store instead of the folder.
+        clean_xml (bool): Saves the cleaned XML instead of the pretty-printed XML.
+        limit (int, optional): Stop after this number of datasets.
+
+    Returns:
+        tuple: (names of the saved datasets, number of failed datasets, next page URI or None,
+        number of records on the page)
+
+    Raises:
+        requests.exceptions.RequestException, ET.ParseError: If the page cannot be fetched or parsed.
+    """
+    page_info = {}
+    saved_names = []
+    failed = 0
+    records = 0
+    with session.get(CATALOG_URL, params={"page": page}, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        for name, record in iter_catalog_records(response.raw, page_info):
+            records += 1
+            if name is None:
+                log_error(f"Dataset without name or identifier on catalogue page {page}", "error")
+                failed += 1
+            else:
+                try:
+                    save_dataset_tree(name, record, open_data_swiss_data_folder, store, clean_xml)
+                    saved_names.append(name)
+                except Exception as e:
+                    log_error(f"Failed to process {name}", "error", e)
+                    failed += 1
+            if limit is not None and len(saved_names) + failed >= limit:
+                break
+    return saved_names, failed, page_info.get("next_page"), records
+
+def download_opendata_swiss_catalog(open_data_swiss_data_folder, MAX_DATASETS=None, store=None, clean_xml=False):
+    """
+    Downloads the metadata of all datasets from the paged DCAT catalogue (`catalog.xml`) instead
+    of one request per dataset, and saves every dataset in the `saved_metadata_xml` layout of
+    `download_opendata_swiss_xml` (same normalisation, file name = CKAN dataset name).
+
+    Each page is streamed and split with `iterparse` (see `iter_catalog_records`). The catalogue
+    is a full snapshot, so the unchanged datasets of an incremental harvest are cleared; the
+    harvest high-water mark is advanced if all pages and datasets were saved.
+
+    A page that fails (request error or invalid XML, also partway through the stream) is fetched
+    again up to CATALOG_PAGE_ATTEMPTS times. If it still fails, the download stops and all datasets
+    of the previous import that were not saved in this run are recorded as unchanged, so the change
+    detector carries them over as 'found' instead of reporting the unfetched pages as 'removed'.
+
+    Args:
+        open_data_swiss_data_folder (str): Folder where the XML files are saved.
+        MAX_DATASETS (int, optional): Stop after this number of datasets.
+        store (MetadataStore, optional): Saves the XML in the packed store instead of the folder.
+        clean_xml (bool): Saves the cleaned XML (`xml_cleaner` format) instead of the pretty-printed XML.
+
+    Returns:
+        int: Number of saved datasets.
+    """
+    os.makedirs(open_data_swiss_data_folder, exist_ok=True)
+    base_dir = os.path.dirname(open_data_swiss_data_folder)
+    clear_unchanged_datasets(base_dir)
+    session = create_session(pool_size=1)
+    saved_names = set()
+    failed = 0
+    page_failed = False
+    page = 1
+    start_time = time.perf_counter()
+    log_error(f"Starting catalogue download from {CATALOG_URL}...", "info")
+    try:
+        while MAX_DATASETS is None or len(saved_names) + failed < MAX_DATASETS:
+            limit = None if MAX_DATASETS is None else MAX_DATASETS - len(saved_names) - failed
+            for attempt in range(1, CATALOG_PAGE_ATTEMPTS + 1):
+                try:
+                    page_names, page_failures, next_page, records = save_catalog_page(
+                        session, page, open_data_swiss_data_folder, store, clean_xml, limit)
+                    break
+                except (requests.exceptions.RequestException, ET.ParseError) as e:
+                    log_error(f"Failed to fetch catalogue page {page} (attempt {attempt}/{CATALOG_PAGE_ATTEMPTS})", "error", e)
+                    if attempt < CATALOG_PAGE_ATTEMPTS:
+                        time.sleep(CATALOG_RETRY_DELAY * attempt)
+            else:
+                log_portal_result(PORTAL_NAME, "Fetch Catalogue Page", success=False)
+                page_failed = True
+                break
+            log_portal_result(PORTAL_NAME, "Fetch Catalogue Page", success=True)
+            add_portal_counts(PORTAL_NAME, "Download XML Metadata", success=len(page_names), fail=page_failures)
+            if clean_xml:
+                for _ in page_names:
+                    record_clean_result(True, PORTAL_NAME)
+            saved_names.update(page_names)
+            failed += page_failures
+            if not records or not next_page:
+                break
+            page += 1
+            if page % 50 == 0:
+                log_error(f"{page} catalogue pages, {len(saved_names)} datasets saved", "info")
+    finally:
+        session.close()
+
+    if page_failed:
+        # The datasets of the pages that were not fetched are unknown, not removed
+        unfetched = load_previous_dataset_names(base_dir) - saved_names
+        add_unchanged_datasets(base_dir, unfetched)
+        log_error(f"Catalogue download stopped at page {page}; {len(unfetched)} datasets of the previous import are kept as unchanged", "error")
+
+    elapsed = time.perf_counter() - start_time
+    log_error(f"Saved {len(saved_names)} datasets from {page} catalogue pages in {elapsed:.1f}s", "info")
+    if failed == 0 and not page_failed:
+        commit_high_water_mark(os.path.join(base_dir, HARVEST_STATE_FILE))
+    else:
+        log_error(f"{failed} datasets failed or catalogue incomplete, harvest high-water mark not advanced", "warning")
     save_statistics()
+    return len(saved_names)
@@ -1,16 +1,90 @@
+import io
 import os
 import xml.etree.ElementTree as ET
-import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from functions.error_logger import log_error
-from functions.statistics_logger import log_portal_result, save_statistics
+from functions.statistics_logger import log_portal_result, save_statistics, add_portal_counts
+from functions.metadata_store import iter_documents, document_names
+from functions.field_mapping import (
+    FieldMapping, Text, TextList, FirstOf, LocalizedText, LocalizedLists, Group, Ref, Source, register_mapping
+)
+from functions.table_io import table_path, TABLE_FORMAT
+from functions.extracted_tables import datasets_to_extract, seed_extraction, extracted_table_path, upsert_table, export_table
+from functions.row_sink import RowSink
+
+# Parallel extraction: number of documents per chunk sent to a worker process
+EXTRACTION_CHUNK_SIZE = 200
+DATASET_TIMESTAMP_COLUMNS = ["dataset_issued"]
+
+
+GEOCAT_NAMESPACES = {
+    "gmd": "http://www.isotc211.org/2005/gmd",
+    "gco": "http://www.isotc211.org/2005/gco",
+    "che": "http://www.geocat.ch/2008/che",
+    "xsi": "http://www.w3.org/2001/XMLSchema-instance"
+}
+
+# Field mapping of an ISO 19139 / GM03 record; the field order is the order of the `extract_metadata` tuple
+GEOCAT_MAPPING = FieldMapping(GEOCAT_NAMESPACES, {
+    "file_identifier": Text(".//gmd:fileIdentifier/gco:CharacterString"),
+    "dataset_language": FirstOf(
+        Text(".//gmd:language/gmd:LanguageCode"),
+        Text(".//gmd:language/gco:CharacterString"),
+    ),
+    "titles": LocalizedText(
+        "dataset_title",
+        ".//gmd:identificationInfo//gmd:citation//gmd:title/gco:CharacterString",
+        ".//gmd:identificationInfo//gmd:citation//gmd:title/gmd:PT_FreeText",
+    ),
+    "descriptions": LocalizedText(
+        "dataset_description",
+        ".//gmd:identificationInfo//gmd:abstract/gco:CharacterString",
+        ".//gmd:identificationInfo//gmd:abstract/gmd:PT_FreeText",
+    ),
+    "publisher_name": FirstOf(
+        Text(".//gmd:contact//gmd:organisationName/gco:CharacterString"),
+        Text(".//gmd:pointOfContact//gmd:organisationName/gco:CharacterString"),
+    ),
+    "publisher_url": FirstOf(
+        Text(".//gmd:pointOfContact//gmd:contactInfo//gmd:CI_Contact//gmd:onlineResource//gmd:linkage/gco:CharacterString"),
+        Text(".//gmd:contact//gmd:contactInfo//gmd:CI_Contact//gmd:onlineResource//gmd:CI_OnlineResource//gmd:linkage/gmd:URL"),
+        Text(".//gmd:contact//gmd:contactInfo//gmd:CI_Contact//gmd:onlineResource//gmd:CI_OnlineResource//gmd:linkage[@xsi:type='che:PT_FreeURL_PropertyType']/gmd:URL"),
+    ),
+    "dataset_theme": TextList(".//gmd:topicCategory/gmd:MD_TopicCategoryCode"),
+    "issued_date": FirstOf(
+        Text(".//gmd:identificationInfo//gmd:citation/gmd:CI_Citation/gmd:date/gmd:CI_Date/gmd:date/gco:Date"),
+        Text(".//gmd:identificationInfo//gmd:citation/gmd:CI_Citation/gmd:date/gmd:CI_Date/gmd:date/gco:DateTime"),
+    ),
+    "keywords": LocalizedLists(".//gmd:descriptiveKeywords/gmd:MD_Keywords/gmd:keyword"),
+    "distributions": Group(".//gmd:distributionInfo/gmd:MD_Distribution/gmd:transferOptions//gmd:CI_OnlineResource", {
+        "dataset_identifier": Ref("file_identifier"),
+        "xml_filename": Source(),
+        "distribution_format": Text("gmd:protocol/gco:CharacterString", strip=False, empty=""),
+        "distribution_download_url": Text("gmd:linkage/gmd:URL", strip=False, empty=""),
+        "distribution_title_UNKNOWN": Text("gmd:name/gco:CharacterString", strip=False, empty=""),
+        "distribution_description_UNKNOWN": Text("gmd:description/gco:CharacterString", strip=False, empty=""),
+    }),
+    "contact_points": Group((
+        ".//gmd:identificationInfo//gmd:pointOfContact//gmd:CI_ResponsibleParty",
+        ".//gmd:identificationInfo/che:CHE_MD_DataIdentification/gmd:pointOfContact/che:CHE_CI_ResponsibleParty",
+    ), {
+        "contact_name": Text("gmd:organisationName/gco:CharacterString", strip=False, empty=""),
+        "contact_email": Text(".//gmd:electronicMailAddress/gco:CharacterString", strip=False, empty=""),
+    }),
+})
+register_mapping("geocat.ch", GEOCAT_MAPPING)
 
 
 def extract_metadata(xml_file):
     """
     Extract metadata fields from a GeoCat XML metadata file.
 
+    The fields are declared in `GEOCAT_MAPPING` and evaluated by the `field_mapping` engine
+    on a single `PathIndex` of the document (one traversal, compiled paths).
+
     Parameters:
-        xml_file (str): Path to the XML metadata file.
+        xml_file (str or file object): Path to the XML metadata file, or a binary file object.
 
     Returns:
         tuple: A tuple containing extracted values.
@@ -22,206 +96,212 @@ def extract_metadata(xml_file):
         log_error(f"Failed to parse XML file: {xml_file}", exception=e)
         raise
 
-    namespace = {
-        "gmd": "http://www.isotc211.org/2005/gmd",
-        "gco": "http://www.isotc211.org/2005/gco",
-        "che": "http://www.geocat.ch/2008/che",
-        "xsi": "http://www.w3.org/2001/XMLSchema-instance"
+    record = GEOCAT_MAPPING.extract_root(root, xml_file)
+    return tuple(record.values())
+
+def build_rows(filename, source):
+    """
+    Extract the output rows of one GeoCat XML document.
+
+    Parameters:
+        filename (str): File name of the document (`xml_filename` column).
+        source (str or file object): Path to the XML file, or a binary file object.
+
+    Returns:
+        tuple: (dataset row, list of distribution rows, list of contact point rows)
+    """
+    (
+        file_id, lang, titles, descs, pub_name, pub_url,
+        theme, date, keywords, dists, contacts
+    ) = extract_metadata(source)
+
+    entry = {
+        "dataset_identifier": file_id,
+        "dataset_language": lang,
+        "dataset_publisher_name": pub_name,
+        "dataset_publisher_URL": pub_url,
+        "dataset_theme": theme,
+        "dataset_issued": date,
+        "xml_filename": filename,
+        "origin": "geocat.ch"
     }
+    entry.update(titles)
+    entry.update(descs)
+    for code, words in keywords.items():
+        entry[f"dataset_keyword_{code}"] = words
 
-    def safe_find_text(path, default="N/A"):
-        try:
-            el = root.find(path, namespace)
-            return el.text.strip() if el is not None and el.text else default
-        except Exception as e:
-            log_error(f"Error extracting path '{path}' in {xml_file}", exception=e)
-            return default
+    for d in dists:
+        d.update({"xml_filename": filename, "origin": "geocat.ch"})
 
-    def safe_find_all(path):
-        try:
-            return root.findall(path, namespace)
-        except Exception as e:
-            log_error(f"Error finding all elements at '{path}' in {xml_file}", exception=e)
-            return []
+    for c in contacts:
+        c.update({"dataset_identifier": file_id,"xml_filename": filename, "origin": "geocat.ch"})
 
-    file_identifier = safe_find_text(".//gmd:fileIdentifier/gco:CharacterString")
+    return entry, dists, contacts
 
-    dataset_language = safe_find_text(".//gmd:language/gmd:LanguageCode")
-    if dataset_language == "N/A":
-        dataset_language = safe_find_text(".//gmd:language/gco:CharacterString")
 
-    titles = {}
-    titles["dataset_title"] = safe_find_text(".//gmd:identificationInfo//gmd:citation//gmd:title/gco:CharacterString")
-    try:
-        title_localized_element = root.find(".//gmd:identificationInfo//gmd:citation//gmd:title/gmd:PT_FreeText", namespace)
-        if title_localized_element is not None:
-            for text_group in title_localized_element.findall("gmd:textGroup/gmd:LocalisedCharacterString", namespace):
-                locale = text_group.attrib.get("locale", "").replace("#", "").strip()
-                if text_group.text:
-                    titles[f"dataset_title_{locale}"] = text_group.text.strip()
-    except Exception as e:
-        log_error(f"Failed to extract localized titles from {xml_file}", exception=e)
+def extract_chunk(documents):
+    """
+    Worker: extract a chunk of GeoCat XML documents.
 
-    descriptions = {}
-    descriptions["dataset_description"] = safe_find_text(".//gmd:identificationInfo//gmd:abstract/gco:CharacterString")
-    try:
-        description_localized_element = root.find(".//gmd:identificationInfo//gmd:abstract/gmd:PT_FreeText", namespace)
-        if description_localized_element is not None:
-            for text_group in description_localized_element.findall("gmd:textGroup/gmd:LocalisedCharacterString", namespace):
-                locale = text_group.attrib.get("locale", "").replace("#", "").strip()
-                if text_group.text:
-                    descriptions[f"dataset_description_{locale}"] = text_group.text.strip()
-    except Exception as e:
-        log_error(f"Failed to extract localized descriptions from {xml_file}", exception=e)
-
-    issued_date = safe_find_text(".//gmd:identificationInfo//gmd:citation/gmd:CI_Citation/gmd:date/gmd:CI_Date/gmd:date/gco:Date")
-    if issued_date == "N/A":
-        issued_date = safe_find_text(".//gmd:identificationInfo//gmd:citation/gmd:CI_Citation/gmd:date/gmd:CI_Date/gmd:date/gco:DateTime")
-
-    publisher_name = "N/A"
-    for path in [
-        ".//gmd:contact//gmd:organisationName/gco:CharacterString",
-        ".//gmd:pointOfContact//gmd:organisationName/gco:CharacterString"
-    ]:
-        val = safe_find_text(path)
-        if val != "N/A":
-            publisher_name = val
-            break
-
-    publisher_url = "N/A"
-    for path in [
-        ".//gmd:pointOfContact//gmd:contactInfo//gmd:CI_Contact//gmd:onlineResource//gmd:linkage/gco:CharacterString",
-        ".//gmd:contact//gmd:contactInfo//gmd:CI_Contact//gmd:onlineResource//gmd:CI_OnlineResource//gmd:linkage/gmd:URL",
-        ".//gmd:contact//gmd:contactInfo//gmd:CI_Contact//gmd:onlineResource//gmd:CI_OnlineResource//gmd:linkage[@xsi:type='che:PT_FreeURL_PropertyType']/gmd:URL"
-    ]:
-        val = safe_find_text(path)
-        if val != "N/A":
-            publisher_url = val
-            break
-
-    dataset_theme = [el.text.strip() for el in safe_find_all(".//gmd:topicCategory/gmd:MD_TopicCategoryCode") if el is not None and el.text]
-    if not dataset_theme:
-        dataset_theme = ["N/A"]
-
-    keywords = {"UNKNOWN": []}
-    for keyword_element in safe_find_all(".//gmd:descriptiveKeywords/gmd:MD_Keywords/gmd:keyword"):
-        try:
-            keyword_text_element = keyword_element.find("gco:CharacterString", namespace)
-            if keyword_text_element is not None and keyword_text_element.text:
-                keywords["UNKNOWN"].append(keyword_text_element.text.strip())
-            localized_texts = keyword_element.findall("gmd:PT_FreeText/gmd:textGroup/gmd:LocalisedCharacterString", namespace)
-            for text_element in localized_texts:
-                lang_code = text_element.attrib.get("locale", "").replace("#", "").strip()
-                if text_element.text and lang_code:
-                    keywords.setdefault(lang_code, []).append(text_element.text.strip())
-        except Exception as e:
-            log_error(f"Failed to extract keyword from element in {xml_file}", exception=e)
+    The statistics of a worker process are not visible to the main process,
+    so the counts are returned and aggregated by `extract_and_save_all_geocat`.
 
-    distribution_formats = []
-    for el in safe_find_all(".//gmd:distributionInfo/gmd:MD_Distribution/gmd:transferOptions//gmd:CI_OnlineResource"):
-        try:
-            distribution_formats.append({
-                "dataset_identifier": file_identifier,
-                "xml_filename": xml_file,   
-                "distribution_format": el.findtext("gmd:protocol/gco:CharacterString", default="N/A", namespaces=namespace),
-                "distribution_download_url": el.findtext("gmd:linkage/gmd:URL", default="N/A", namespaces=namespace),
-                "distribution_title_UNKNOWN": el.findtext("gmd:name/gco:CharacterString", default="N/A", namespaces=namespace),
-                "distribution_description_UNKNOWN": el.findtext("gmd:description/gco:CharacterString", default="N/A", namespaces=namespace)
-            })
-        except Exception as e:
-            log_error(f"Failed to extract distribution format in {xml_file}", exception=e)
+    Parameters:
+        documents (list): (file name, file path or XML bytes) pairs.
 
-    contact_points = []
-    contact_elements = safe_find_all(".//gmd:identificationInfo//gmd:pointOfContact//gmd:CI_ResponsibleParty")
-    contact_elements += safe_find_all(".//gmd:identificationInfo/che:CHE_MD_DataIdentification/gmd:pointOfContact/che:CHE_CI_ResponsibleParty")
-    for el in contact_elements:
+    Returns:
+        tuple: (dataset rows, distribution rows, contact point rows, number of extracted documents,
+        number of failed documents)
+    """
+    dataset_rows, distribution_rows, contact_rows = [], [], []
+    failed = 0
+    for filename, source in documents:
         try:
-            contact_points.append({
-                "contact_name": el.findtext("gmd:organisationName/gco:CharacterString", default="N/A", namespaces=namespace),
-                "contact_email": el.findtext(".//gmd:electronicMailAddress/gco:CharacterString", default="N/A", namespaces=namespace)
-            })
+            entry, dists, contacts = build_rows(filename, io.BytesIO(source) if isinstance(source, bytes) else source)
         except Exception as e:
-            log_error(f"Failed to extract contact point in {xml_file}", exception=e)
-    
-    return (
-        file_identifier,
-        dataset_language,
-        titles,
-        descriptions,
-        publisher_name,
-        publisher_url,
-        dataset_theme,
-        issued_date,
-        keywords,
-        distribution_formats,
-        contact_points
-    )
-
-def extract_and_save_all_geocat(input_folder, output_folder):
+            log_error(f"Failed to process {filename}", exception=e)
+            failed += 1
+            continue
+        dataset_rows.append(entry)
+        distribution_rows.extend(dists)
+        contact_rows.extend(contacts)
+    return dataset_rows, distribution_rows, contact_rows, len(dataset_rows), failed
+
+
+def iter_document_chunks(input_folder, store=None, chunk_size=EXTRACTION_CHUNK_SIZE, names=None):
+    """Yields the documents of a folder or store (only `names` if given) in chunks of (file name, file path or XML bytes) pairs."""
+    chunk = []
+    for filename, source in iter_documents(input_folder, store, names=names):
+        chunk.append((filename, source.getvalue() if isinstance(source, io.BytesIO) else source))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def extract_and_save_all_geocat(input_folder, output_folder, store=None, workers=1, table_format=TABLE_FORMAT, incremental=False, export_all=False):
     portal_name = "geocat.ch"
     success_count = 0
     fail_count = 0
     """
-    Extract metadata from all XML files in the input folder and save results to CSV files.
+    Extract metadata from all XML files in the input folder and save results to CSV files
+    (or Parquet files with list and timestamp columns, see `table_io`).
+
+    With `workers > 1` chunks of documents are extracted by a process pool; the row batches are
+    merged in chunk order, so the output is identical to the sequential extraction. On Windows the
+    calling script must guard its entry point with `if __name__ == "__main__":`.
+
+    With `incremental=True` only the 'new' and 'changed' datasets of `comparison_result.csv` in
+    `output_folder` are parsed, and the rows are also upserted into the persistent tables of
+    `extracted_tables`; without persistent tables all documents are parsed to seed them (see
+    `extracted_tables.seed_extraction`). With `export_all=True` the complete persistent tables
+    are written as the per-run tables afterwards (e.g. to load a new database).
 
     Parameters:
         input_folder (str): Folder containing GeoCat XML files.
         output_folder (str): Folder to save output CSV files.
+        store (MetadataStore, optional): Read the XML documents from the packed store instead of the folder.
+        workers (int): Number of worker processes (1 = sequential).
+        table_format (str): "csv" or "parquet".
+        incremental (bool): Extract only the new and changed datasets and upsert the persistent tables.
+        export_all (bool): Write the complete persistent tables as the per-run tables.
     """
     log_error(f"Start extraction form geocat.ch XML files", level="info")
 
-    dataset_data, distribution_data, contact_data = [], [], []
-
-    for filename in os.listdir(input_folder):
-        if filename.endswith(".xml"):
-            file_path = os.path.join(input_folder, filename)
-            try:
-                (
-                    file_id, lang, titles, descs, pub_name, pub_url,
-                    theme, date, keywords, dists, contacts
-                ) = extract_metadata(file_path)
-            except Exception as e:
-                log_error(f"Failed to process {file_path}", exception=e)
-                log_portal_result(portal_name, "Files Extracted", success=False)
-                fail_count += 1
-                continue
-
-            entry = {
-                "dataset_identifier": file_id,
-                "dataset_language": lang,
-                "dataset_publisher_name": pub_name,
-                "dataset_publisher_URL": pub_url,
-                "dataset_theme": theme,
-                "dataset_issued": date,
-                "xml_filename": filename,
-                "origin": "geocat.ch"
-            }
-            entry.update(titles)
-            entry.update(descs)
-            for code, words in keywords.items():
-                entry[f"dataset_keyword_{code}"] = words
-
-            dataset_data.append(entry)
-            log_portal_result(portal_name, "Files Extracted", success=True)
-            success_count += 1
-
-            for d in dists:
-                d.update({"xml_filename": filename, "origin": "geocat.ch"})
-                distribution_data.append(d)
-
-            for c in contacts:
-                c.update({"dataset_identifier": file_id,"xml_filename": filename, "origin": "geocat.ch"})
-                contact_data.append(c)
+    delta = datasets_to_extract(output_folder, "geocat_dataset_metadata") if incremental else None
+    names, replaced_files = delta if delta is not None else (None, set())
+    run_files, seed = None, False
+    if delta is not None:
+        log_error(f"Incremental extraction of {len(names)} new or changed datasets", level="info")
+    elif incremental:
+        run_files, seed = seed_extraction(output_folder, document_names(input_folder, store), portal_name)
 
     os.makedirs(output_folder, exist_ok=True)
+    # The rows are streamed to the tables (see `row_sink`) instead of being collected for the whole catalogue
+    dataset_sink = RowSink(table_path(output_folder, "geocat_dataset_metadata", table_format),
+                           timestamp_columns=DATASET_TIMESTAMP_COLUMNS)
+    distribution_sink = RowSink(table_path(output_folder, "geocat_distribution_metadata", table_format))
+    contact_sink = RowSink(table_path(output_folder, "geocat_contact_point_metadata", table_format))
+    sinks = [dataset_sink, distribution_sink, contact_sink]
+    if seed:
+        # All rows of the seed run go to the persistent tables
+        seed_sinks = [
+            RowSink(extracted_table_path(output_folder, "geocat_dataset_metadata", table_format),
+                    timestamp_columns=DATASET_TIMESTAMP_COLUMNS),
+            RowSink(extracted_table_path(output_folder, "geocat_distribution_metadata", table_format)),
+            RowSink(extracted_table_path(output_folder, "geocat_contact_point_metadata", table_format)),
+        ]
+        sinks += seed_sinks
+
+    def write_rows(dataset_rows, distribution_rows, contact_rows):
+        if seed:
+            seed_sinks[0].write_rows(dataset_rows)
+            seed_sinks[1].write_rows(distribution_rows)
+            seed_sinks[2].write_rows(contact_rows)
+        if run_files is not None:
+            dataset_rows = [row for row in dataset_rows if row["xml_filename"] in run_files]
+            distribution_rows = [row for row in distribution_rows if row["xml_filename"] in run_files]
+            contact_rows = [row for row in contact_rows if row["xml_filename"] in run_files]
+        dataset_sink.write_rows(dataset_rows)
+        distribution_sink.write_rows(distribution_rows)
+        contact_sink.write_rows(contact_rows)
+        if delta is not None:
+            replaced_files.update(entry["xml_filename"] for entry in dataset_rows)
+
+    try:
+        if workers > 1:
+            def merge(result):
+                nonlocal success_count, fail_count
+                dataset_rows, distribution_rows, contact_rows, extracted, failed = result
+                write_rows(dataset_rows, distribution_rows, contact_rows)
+                add_portal_counts(portal_name, "Files Extracted", success=extracted, fail=failed)
+                success_count += extracted
+                fail_count += failed
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Bounded number of chunks in flight, merged in submission order
+                pending = deque()
+                for chunk in iter_document_chunks(input_folder, store, names=names):
+                    pending.append(executor.submit(extract_chunk, chunk))
+                    if len(pending) >= 2 * workers:
+                        merge(pending.popleft().result())
+                while pending:
+                    merge(pending.popleft().result())
+        else:
+            for filename, source in iter_documents(input_folder, store, names=names):
+                try:
+                    entry, dists, contacts = build_rows(filename, source)
+                except Exception as e:
+                    log_error(f"Failed to process {filename}", exception=e)
+                    log_portal_result(portal_name, "Files Extracted", success=False)
+                    fail_count += 1
+                    continue
+
+                write_rows([entry], dists, contacts)
+                log_portal_result(portal_name, "Files Extracted", success=True)
+                success_count += 1
+    except BaseException:
+        # No partial tables (and no spool files) after a failed extraction
+        for sink in sinks:
+            sink.discard()
+        raise
 
     try:
-        pd.DataFrame(dataset_data).to_csv(os.path.join(output_folder, "geocat_dataset_metadata.csv"), index=False)
-        pd.DataFrame(distribution_data).to_csv(os.path.join(output_folder, "geocat_distribution_metadata.csv"), index=False)
-        pd.DataFrame(contact_data).to_csv(os.path.join(output_folder, "geocat_contact_point_metadata.csv"), index=False)
-        log_portal_result(portal_name, "Rows in Datasets CSV", success=len(dataset_data))
-        log_portal_result(portal_name, "Rows in Distributions CSV", success=len(distribution_data))
-        log_portal_result(portal_name, "Rows in Contact Points CSV", success=len(contact_data))
+        for sink in sinks:
+            sink.close()
+        if delta is not None:
+            upsert_table(output_folder, "geocat_dataset_metadata", dataset_sink.frame(), replaced_files, table_format,
+                         timestamp_columns=DATASET_TIMESTAMP_COLUMNS)
+            upsert_table(output_folder, "geocat_distribution_metadata", distribution_sink.frame(), replaced_files, table_format)
+            upsert_table(output_folder, "geocat_contact_point_metadata", contact_sink.frame(), replaced_files, table_format)
+        if export_all:
+            export_table(output_folder, "geocat_dataset_metadata", table_format, timestamp_columns=DATASET_TIMESTAMP_COLUMNS)
+            export_table(output_folder, "geocat_distribution_metadata", table_format)
+            export_table(output_folder, "geocat_contact_point_metadata", table_format)
+        log_portal_result(portal_name, "Rows in Datasets CSV", success=dataset_sink.rows)
+        log_portal_result(portal_name, "Rows in Distributions CSV", success=distribution_sink.rows)
+        log_portal_result(portal_name, "Rows in Contact Points CSV", success=contact_sink.rows)
         save_statistics()
         log_error("GeoCat metadata extraction completed successfully.", level="info")
     except Exception as e:
@@ -234,11 +314,11 @@ def extract_and_save_all_geocat(input_folder, output_folder):
 def main():
     """
     Main entry point for standalone use.
-    Extracts metadata from default folder and writes output CSVs to current directory.
+    Extracts metadata from default folder (in parallel) and writes output CSVs to current directory.
     """
     input_folder = "saved_metadata_xml"
     output_folder = "."
-    extract_and_save_all_geocat(input_folder, output_folder)
+    extract_and_save_all_geocat(input_folder, output_folder, workers=os.cpu_count() or 1)
     log_error("GeoCat metadata extraction completed successfully.", level="info")
 
 
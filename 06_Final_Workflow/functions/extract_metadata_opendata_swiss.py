@@ -3,221 +3,175 @@
 This module provides functionality to extract metadata from DCAT-AP-CH compliant XML files,
 including dataset-level metadata, distribution information, and contact points.
 
-It uses Python's ElementTree for XML parsing and pandas for organizing and exporting metadata to CSV files.
+It uses the `field_mapping` engine (one ElementTree parse and one traversal per file) and streams the rows to CSV or Parquet tables with `row_sink`.
 
 Functions:
-- extract_multilang_elements: Extract multilingual fields like title, description, keywords.
-- extract_text / extract_attribute / extract_list: Utility functions for safe XML value extraction.
-- extract_identifier / extract_issued_date / extract_publisher: Specific metadata field extractors.
-- extract_distributions: Extracts distribution metadata linked to a dataset.
-- extract_contact_points: Extracts organization or individual contact metadata.
-- extract_metadata_from_xml: Master function that parses and extracts metadata from a single XML file.
-- extract_and_save_all: Batch processes all XML files in a folder and saves the resulting CSVs.
+- extract_metadata_from_xml: Extracts the dataset, distribution and contact point metadata of a single XML file
+  with the declarative `OPENDATA_SWISS_MAPPING` (see `field_mapping`).
+- extract_and_save_all: Batch processes all XML files in a folder (or a MetadataStore) and streams the resulting
+  rows to the tables (`row_sink`), as CSV or, with `table_format="parquet"`, as Parquet with list and timestamp columns.
+  With `incremental=True` only the 'new' and 'changed' datasets of `comparison_result.csv` are parsed and
+  upserted into the persistent tables of `extracted_tables` (all documents are parsed to seed them if they do not exist).
 
 Run this file as a script to process metadata from the default "saved_metadata_xml/" folder and output results to base folder.
 """
 from functions.error_logger import log_error  # Import here to make it safe in non-logging contexts
 from functions.statistics_logger import log_portal_result, save_statistics
-import xml.etree.ElementTree as ET
-import pandas as pd
 import os
-
-def extract_multilang_elements(element_name, dataset_element, namespace, default_label):
-    elements = {}
-    collected_values = {}
-    for element in dataset_element.findall(f".//{element_name}", namespace):
-        lang_attr = element.get("{http://www.w3.org/XML/1998/namespace}lang", "unknown").upper()
-        text_value = element.text.strip() if element.text else "N/A"
-        collected_values.setdefault(lang_attr, []).append(text_value)
-    for lang, values in collected_values.items():
-        elements[f"{default_label}_{lang}"] = ", ".join(values)
-    if not elements:
-        elements[f"{default_label}_UNKNOWN"] = "N/A"
-    return elements
-
-def extract_text(element, tag, namespace, default="N/A"):
-    found_element = element.find(tag, namespace)
-    return found_element.text.strip() if found_element is not None and found_element.text else default
-
-def extract_attribute(element, tag, attribute, namespace, default="N/A"):
-    found_element = element.find(tag, namespace)
-    return found_element.get(attribute, default) if found_element is not None else default
-
-def extract_identifier(dataset_element, namespace):
-    identifier_element = dataset_element.find("dct:identifier", namespace)
-    return identifier_element.text if identifier_element is not None else "N/A"
-
-def extract_list(element, tag, namespace):
-    return [elem.text.strip() for elem in element.findall(tag, namespace) if elem.text] or ["N/A"]
-
-def extract_issued_date(distribution_element, namespace):
-    issued_element = distribution_element.find(".//dct:issued", namespace)
-    return issued_element.text if issued_element is not None else "N/A"
-
-def extract_publisher(dataset_element, namespace):
-    publisher_element = dataset_element.find("dct:publisher/foaf:Organization", namespace)
-    if publisher_element is not None:
-        publisher_url = publisher_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about", "N/A")
-        publisher_name_element = publisher_element.find("foaf:name", namespace)
-        publisher_name = publisher_name_element.text.strip() if publisher_name_element is not None else "N/A"
-    else:
-        publisher_url, publisher_name = "N/A", "N/A"
-    return {"dataset_publisher_url": publisher_url, "dataset_publisher_name": publisher_name}
-
-def extract_distributions(dataset_element, namespace, dataset_id):
-    distributions = []
-    for distribution_element in dataset_element.findall(".//dcat:Distribution", namespace):
-        access_url_element = distribution_element.find("dcat:accessURL", namespace)
-        access_url = access_url_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if access_url_element is not None else "N/A"
-        license_element = distribution_element.find("dct:license", namespace)
-        license_url = license_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if license_element is not None else "N/A"
-        rights_element = distribution_element.find("dct:rights", namespace)
-        rights_text = rights_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if rights_element is not None else "N/A"
-        byte_size_element = distribution_element.find("dcat:byteSize", namespace)
-        byte_size = byte_size_element.text if byte_size_element is not None else "N/A"
-        format_element = distribution_element.find("dct:format", namespace)
-        format_url = format_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if format_element is not None else "N/A"
-        media_type_element = distribution_element.find("dcat:mediaType", namespace)
-        media_type = media_type_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if media_type_element is not None else "N/A"
-        modified_element = distribution_element.find("dct:modified", namespace)
-        modified_date = modified_element.text if modified_element is not None else "N/A"
-        languages = [lang.text.strip() for lang in distribution_element.findall("dct:language", namespace) if lang.text] or ["N/A"]
-        distribution_titles = extract_multilang_elements("dct:title", distribution_element, namespace, "distribution_title")
-        distribution_descriptions = extract_multilang_elements("dct:description", distribution_element, namespace, "distribution_description")
-        distribution_identifier_element = distribution_element.find("dct:identifier", namespace)
-        distribution_identifier = distribution_identifier_element.text.strip() if distribution_identifier_element is not None else "N/A"
-        download_url_element = distribution_element.find("dcat:downloadURL", namespace)
-        download_url = download_url_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if download_url_element is not None else "N/A"
-        documentation_element = distribution_element.find(".//foaf:page/foaf:Document", namespace)
-        documentation_url = documentation_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about", "N/A") if documentation_element is not None else "N/A"
-        distribution_temporal_resolution_element = distribution_element.find("dcat:temporalResolution", namespace)
-        distribution_temporal_resolution = distribution_temporal_resolution_element.text if distribution_temporal_resolution_element is not None else "N/A"
-        coverage_elements = [elem.text.strip() for elem in distribution_element.findall("{http://purl.org/dc/terms/}coverage") if elem.text]
-        coverage = coverage_elements if coverage_elements else ["N/A"]
-        distribution_entry = {
-            "dataset_identifier": dataset_id,
-            "distribution_id": distribution_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about", "N/A"),
-            "distribution_issued_date": extract_issued_date(distribution_element, namespace),
-            "distribution_modified_date": modified_date,
-            "distribution_access_url": access_url,
-            "distribution_license": license_url,
-            "distribution_rights": rights_text,
-            "distribution_byte_size": byte_size,
-            "distribution_format": format_url,
-            "distribution_media_type": media_type,
-            "distribution_language": languages,
-            "distribution_download_url": download_url,
-            "distribution_coverage": coverage,
-            "distribution_temporal_resolution": distribution_temporal_resolution,
-            "distribution_documentation": documentation_url,
-            "distribution_identifier": distribution_identifier,
-            "origin": "opendata.swiss"
-        }
-        distribution_entry.update(distribution_titles)
-        distribution_entry.update(distribution_descriptions)
-        distributions.append(distribution_entry)
-    return distributions
-
-def extract_contact_points(dataset_element, namespace, dataset_id):
-    contact_points = []
-    for contact_element in dataset_element.findall(".//dcat:contactPoint", namespace):
-        organization_element = contact_element.find("vcard:Organization", namespace)
-        individual_element = contact_element.find("vcard:Individual", namespace)
-        if organization_element is not None:
-            contact_type = "Organization"
-            email_element = organization_element.find("vcard:hasEmail", namespace)
-            email = email_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if email_element is not None else "N/A"
-            name_element = organization_element.find("vcard:fn", namespace)
-            name = name_element.text.strip() if name_element is not None else "N/A"
-        elif individual_element is not None:
-            contact_type = "Individual"
-            email_element = individual_element.find("vcard:hasEmail", namespace)
-            email = email_element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource", "N/A") if email_element is not None else "N/A"
-            name_element = individual_element.find("vcard:fn", namespace)
-            name = name_element.text.strip() if name_element is not None else "N/A"
-        else:
-            continue
-        contact_points.append({
-            "dataset_identifier": dataset_id,
-            "contact_type": contact_type,
-            "contact_email": email,
-            "contact_name": name,
-            "origin": "opendata.swiss"
-        })
-    return contact_points
+from contextlib import ExitStack
+from functions.metadata_store import iter_documents, document_names
+from functions.field_mapping import FieldMapping, Text, Attribute, TextList, Multilang, Group, Ref, Constant, Matched, register_mapping
+from functions.table_io import table_path, TABLE_FORMAT
+from functions.extracted_tables import datasets_to_extract, seed_extraction, extracted_table_path, upsert_table, export_table
+from functions.row_sink import RowSink
+
+DISTRIBUTION_TIMESTAMP_COLUMNS = ["distribution_issued_date", "distribution_modified_date"]
+
+RDF_ABOUT = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about"
+RDF_RESOURCE = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource"
+OPENDATA_SWISS_NAMESPACES = {
+    "dct": "http://purl.org/dc/terms/",
+    "foaf": "http://xmlns.com/foaf/0.1/",
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "dcat": "http://www.w3.org/ns/dcat#",
+    "vcard": "http://www.w3.org/2006/vcard/ns#",
+    "xml": "http://www.w3.org/XML/1998/namespace",
+    "schema": "http://schema.org/",
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+}
+
+# Field mapping of a DCAT-AP-CH dataset. Multilingual fields use `.//`, so the dataset titles and
+# descriptions also contain those of its distributions (as the former extractor did).
+OPENDATA_SWISS_MAPPING = FieldMapping(OPENDATA_SWISS_NAMESPACES, {
+    "dataset_identifier": Text("dct:identifier", strip=False),
+    "origin": Constant("opendata.swiss"),
+    "dataset_language": TextList("dct:language"),
+    "dataset_keyword": Multilang(".//dcat:keyword"),
+    "dataset_description": Multilang(".//dct:description"),
+    "dataset_title": Multilang(".//dct:title"),
+    "distributions": Group(".//dcat:Distribution", {
+        "dataset_identifier": Ref("dataset_identifier"),
+        "distribution_id": Attribute(".", RDF_ABOUT),
+        "distribution_issued_date": Text(".//dct:issued", strip=False),
+        "distribution_modified_date": Text("dct:modified", strip=False),
+        "distribution_access_url": Attribute("dcat:accessURL", RDF_RESOURCE),
+        "distribution_license": Attribute("dct:license", RDF_RESOURCE),
+        "distribution_rights": Attribute("dct:rights", RDF_RESOURCE),
+        "distribution_byte_size": Text("dcat:byteSize", strip=False),
+        "distribution_format": Attribute("dct:format", RDF_RESOURCE),
+        "distribution_media_type": Attribute("dcat:mediaType", RDF_RESOURCE),
+        "distribution_language": TextList("dct:language"),
+        "distribution_download_url": Attribute("dcat:downloadURL", RDF_RESOURCE),
+        "distribution_coverage": TextList("dct:coverage"),
+        "distribution_temporal_resolution": Text("dcat:temporalResolution", strip=False),
+        "distribution_documentation": Attribute(".//foaf:page/foaf:Document", RDF_ABOUT),
+        "distribution_identifier": Text("dct:identifier"),
+        "origin": Constant("opendata.swiss"),
+        "distribution_title": Multilang(".//dct:title"),
+        "distribution_description": Multilang(".//dct:description"),
+    }),
+    "contact_points": Group(".//dcat:contactPoint", {
+        "dataset_identifier": Ref("dataset_identifier"),
+        "contact_type": Matched(),
+        "contact_email": Attribute("vcard:hasEmail", RDF_RESOURCE),
+        "contact_name": Text("vcard:fn"),
+        "origin": Constant("opendata.swiss"),
+    }, variants=(("vcard:Organization", "Organization"), ("vcard:Individual", "Individual"))),
+}, scope=".//dcat:Dataset")
+register_mapping("opendata.swiss", OPENDATA_SWISS_MAPPING)
 
 def extract_metadata_from_xml(xml_file, xml_filename):
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
-    namespace = {
-        "dct": "http://purl.org/dc/terms/",
-        "foaf": "http://xmlns.com/foaf/0.1/",
-        "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
-        "dcat": "http://www.w3.org/ns/dcat#",
-        "vcard": "http://www.w3.org/2006/vcard/ns#",
-        "xml": "http://www.w3.org/XML/1998/namespace",
-        "schema": "http://schema.org/",
-        "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
-    }
-    dataset_element = root.find(".//dcat:Dataset", namespace)
-    if dataset_element is None:
+    # xml_file: file path or binary file object (e.g. a document of the MetadataStore)
+    dataset_metadata = OPENDATA_SWISS_MAPPING.extract(xml_file)
+    if dataset_metadata is None:
         return {}, [], []
-    dataset_id = extract_identifier(dataset_element, namespace)
-    sorted_keywords = extract_multilang_elements("dcat:keyword", dataset_element, namespace, "dataset_keyword")
-    dataset_descriptions = extract_multilang_elements("dct:description", dataset_element, namespace, "dataset_description")
-    dataset_titles = extract_multilang_elements("dct:title", dataset_element, namespace, "dataset_title")
-    distributions = extract_distributions(dataset_element, namespace, dataset_id)
-    contact_points = extract_contact_points(dataset_element, namespace, dataset_id)
-    dataset_language = [lang.text.strip() for lang in dataset_element.findall("dct:language", namespace) if lang.text] or ["N/A"]
-    dataset_metadata = {
-        "dataset_identifier": dataset_id,
-        "origin": "opendata.swiss",
-        "dataset_language" : dataset_language
-    }
-    dataset_metadata.update(sorted_keywords)
-    dataset_metadata.update(dataset_descriptions)
-    dataset_metadata.update(dataset_titles)
+    distributions = dataset_metadata.pop("distributions")
+    contact_points = dataset_metadata.pop("contact_points")
     return dataset_metadata, distributions, contact_points
 
-def extract_and_save_all_opendata_swiss(folder_path, output_folder):
-    
+def extract_and_save_all_opendata_swiss(folder_path, output_folder, store=None, table_format=TABLE_FORMAT, incremental=False, export_all=False):
+    """
+    Extracts the metadata of all XML files and writes the dataset, distribution and contact point tables.
+    The rows are streamed to the tables (see `row_sink`), so the memory use does not grow with the catalogue.
+
+    With `incremental=True` only the 'new' and 'changed' datasets of `comparison_result.csv` are parsed and
+    upserted into the persistent tables of `extracted_tables`; without persistent tables all documents are
+    parsed to seed them (see `extracted_tables.seed_extraction`). With `export_all=True` the complete
+    persistent tables are written as the per-run tables afterwards (e.g. to load a new database).
+
+    Returns:
+        tuple: Paths of the dataset, distribution and contact point tables.
+    """
     log_error(f"Start extraction form opendata.swiss XML files", level="info")
-    dataset_data = []
-    distribution_data = []
-    contact_point_data = []
+    # Incremental extraction: output_folder is the base directory with comparison_result.csv
+    delta = datasets_to_extract(output_folder, "opendata_dataset_metadata") if incremental else None
+    names, replaced_files = delta if delta is not None else (None, set())
+    run_files, seed = None, False
+    if delta is not None:
+        log_error(f"Incremental extraction of {len(names)} new or changed datasets", level="info")
+    elif incremental:
+        run_files, seed = seed_extraction(output_folder, document_names(folder_path, store), "opendata.swiss")
     try:
-        for filename in os.listdir(folder_path):
-            if filename.endswith(".xml"):
-                file_path = os.path.join(folder_path, filename)
-                dataset_metadata, distributions, contact_points = extract_metadata_from_xml(file_path, filename)
+        os.makedirs(output_folder, exist_ok=True)
+        dataset_sink = RowSink(table_path(output_folder, "opendata_dataset_metadata", table_format))
+        distribution_sink = RowSink(table_path(output_folder, "opendata_distribution_metadata", table_format),
+                                    timestamp_columns=DISTRIBUTION_TIMESTAMP_COLUMNS)
+        contact_point_sink = RowSink(table_path(output_folder, "opendata_contact_point_metadata", table_format))
+        sinks = [dataset_sink, distribution_sink, contact_point_sink]
+        if seed:
+            # All rows of the seed run go to the persistent tables
+            seed_sinks = [
+                RowSink(extracted_table_path(output_folder, "opendata_dataset_metadata", table_format)),
+                RowSink(extracted_table_path(output_folder, "opendata_distribution_metadata", table_format),
+                        timestamp_columns=DISTRIBUTION_TIMESTAMP_COLUMNS),
+                RowSink(extracted_table_path(output_folder, "opendata_contact_point_metadata", table_format)),
+            ]
+            sinks += seed_sinks
+        files_extracted = 0
+        with ExitStack() as stack:
+            for sink in sinks:
+                stack.enter_context(sink)
+            for filename, source in iter_documents(folder_path, store, names=names):
+                dataset_metadata, distributions, contact_points = extract_metadata_from_xml(source, filename)
                 dataset_metadata["xml_filename"] = filename
                 for d in distributions:
                     d["xml_filename"] = filename
                 for c in contact_points:
                     c["xml_filename"] = filename
-                dataset_data.append(dataset_metadata)
-                distribution_data.extend(distributions)
-                contact_point_data.extend(contact_points)
-
-        df_dataset = pd.DataFrame(dataset_data)
-        df_distribution = pd.DataFrame(distribution_data)
-        df_contact_point = pd.DataFrame(contact_point_data)
-        os.makedirs(output_folder, exist_ok=True)
-        df_dataset.to_csv(os.path.join(output_folder, "opendata_dataset_metadata.csv"), index=False)
-        df_distribution.to_csv(os.path.join(output_folder, "opendata_distribution_metadata.csv"), index=False)
-        df_contact_point.to_csv(os.path.join(output_folder, "opendata_contact_point_metadata.csv"), index=False)
+                files_extracted += 1
+                if seed:
+                    seed_sinks[0].write(dataset_metadata)
+                    seed_sinks[1].write_rows(distributions)
+                    seed_sinks[2].write_rows(contact_points)
+                if run_files is not None and filename not in run_files:
+                    continue
+                dataset_sink.write(dataset_metadata)
+                distribution_sink.write_rows(distributions)
+                contact_point_sink.write_rows(contact_points)
+                if delta is not None:
+                    replaced_files.add(filename)
+
+        if delta is not None:
+            upsert_table(output_folder, "opendata_dataset_metadata", dataset_sink.frame(), replaced_files, table_format)
+            upsert_table(output_folder, "opendata_distribution_metadata", distribution_sink.frame(), replaced_files, table_format,
+                         timestamp_columns=DISTRIBUTION_TIMESTAMP_COLUMNS)
+            upsert_table(output_folder, "opendata_contact_point_metadata", contact_point_sink.frame(), replaced_files, table_format)
+        if export_all:
+            export_table(output_folder, "opendata_dataset_metadata", table_format)
+            export_table(output_folder, "opendata_distribution_metadata", table_format, timestamp_columns=DISTRIBUTION_TIMESTAMP_COLUMNS)
+            export_table(output_folder, "opendata_contact_point_metadata", table_format)
 
         log_error(f"All files from '{folder_path}' extracted and saved to '{output_folder}'.", level="info")
         log_error("Metadata extraction and CSV export completed successfully.", level="info")
 
 
-        log_portal_result("opendata.swiss", "Files Extracted", success=len(dataset_data))
-        log_portal_result("opendata.swiss", "Rows in Datasets CSV", success=len(df_dataset))
-        log_portal_result("opendata.swiss", "Rows in Distributions CSV", success=len(df_distribution))
-        log_portal_result("opendata.swiss", "Rows in Contact Points CSV", success=len(df_contact_point))
+        log_portal_result("opendata.swiss", "Files Extracted", success=files_extracted)
+        log_portal_result("opendata.swiss", "Rows in Datasets CSV", success=dataset_sink.rows)
+        log_portal_result("opendata.swiss", "Rows in Distributions CSV", success=distribution_sink.rows)
+        log_portal_result("opendata.swiss", "Rows in Contact Points CSV", success=contact_point_sink.rows)
         save_statistics()
 
-        return df_dataset, df_distribution, df_contact_point
+        return dataset_sink.path, distribution_sink.path, contact_point_sink.path
 
 
 
@@ -232,14 +186,12 @@ if __name__ == "__main__":
     output_folder = ""
 
     try:
-        df_dataset, df_distribution, df_contact_point = extract_and_save_all_opendata_swiss(folder_path, output_folder)
+        dataset_path, distribution_path, contact_point_path = extract_and_save_all_opendata_swiss(folder_path, output_folder)
 
-        print("Extracted Dataset Metadata:")
-        print(df_dataset)
-        print("Extracted Distribution Metadata:")
-        print(df_distribution)
+        print(f"Extracted Dataset Metadata: {dataset_path}")
+        print(f"Extracted Distribution Metadata: {distribution_path}")
+        print(f"Extracted Contact Point Metadata: {contact_point_path}")
 
     except Exception as e:
         log_error("An error occurred during metadata extraction.", level="error", exception=e)
         raise
-
@@ -0,0 +1,206 @@
+"""
+Module: Extracted Tables
+
+Persistent per-portal tables of extracted metadata for the incremental extraction.
+
+The extractors write the rows of the documents they parsed to the per-run tables
+(`<portal>_dataset_metadata.csv`, ...), which the transform, merge and load steps consume.
+In incremental mode they only parse the datasets that `dataset_change_detector` marked
+'new' or 'changed' in `comparison_result.csv`, and in addition upsert the rows into
+persistent tables in `<base_dir>/extracted_tables`, which hold the extracted metadata of
+every current dataset:
+
+- Rows of re-extracted, changed and removed datasets (matched by `xml_filename`) are dropped.
+- Rows with the dataset identifier of a re-extracted dataset are dropped (e.g. renamed files).
+- The new rows are appended.
+
+The change detector deletes the documents of unchanged ('found') datasets, and datasets
+skipped by the download as unchanged have no document at all, so a persistent table can only
+be seeded by a run that downloaded every dataset and kept the 'found' documents
+(`compare_dataset_hashes(keep_found=True)`). Without a persistent table the extractors
+therefore seed it (see `seed_extraction`): all documents in the folder are extracted into the
+persistent tables, while the per-run tables only get the 'new' and 'changed' datasets, the
+delta that is loaded into the database. `export_table` writes a complete persistent table as
+the per-run table, e.g. to load every current dataset into a new database.
+
+Usage:
+    delta = datasets_to_extract(base_dir, "geocat_dataset_metadata")
+    if delta is None:
+        run_files, seed = seed_extraction(base_dir, document_names(folder, store), "geocat.ch")
+        ...  # extract all documents; rows of `run_files` (all if None) to the per-run tables,
+        ...  # all rows to extracted_table_path(base_dir, "geocat_dataset_metadata", table_format) if seed
+    else:
+        names, replaced_files = delta
+        ...  # extract the documents of `names`
+        upsert_table(base_dir, "geocat_dataset_metadata", rows_df, replaced_files | extracted_files)
+
+Constants:
+- EXTRACTED_TABLES_FOLDER: Folder of the persistent tables in the base directory of a portal.
+- COMPARISON_FILE: Result of the change detector in the base directory of a portal.
+- EXTRACT_STATUSES: Statuses of the datasets that are extracted.
+- REPLACED_STATUSES: Statuses of the datasets whose rows are replaced or dropped.
+- MISSING_IDENTIFIERS: Identifier placeholders that are not used as upsert keys.
+
+Functions:
+- extracted_table_exists: Returns True if a persistent table exists.
+- extracted_table_path: Returns the path of a persistent table in the requested format.
+- datasets_to_extract: Reads the datasets to extract from the change detector result.
+- seed_extraction: Plans the extraction that seeds the persistent tables.
+- upsert_table: Upserts rows into a persistent extracted table.
+- export_table: Writes a persistent table as the per-run table.
+
+Dependencies:
+- os
+- pandas
+- table_io
+"""
+
+import os
+
+import pandas as pd
+
+from functions.error_logger import log_error
+from functions.table_io import table_path, resolve_table_path, read_table, write_table, TABLE_FORMAT
+
+EXTRACTED_TABLES_FOLDER = "extracted_tables"
+COMPARISON_FILE = "comparison_result.csv"
+EXTRACT_STATUSES = ("new", "changed")
+REPLACED_STATUSES = ("new", "changed", "removed")
+MISSING_IDENTIFIERS = {"", "N/A"}
+
+
+def extracted_table_exists(base_dir, table_name):
+    """Returns True if the persistent table `table_name` of a portal exists (in any format)."""
+    return os.path.exists(resolve_table_path(os.path.join(base_dir, EXTRACTED_TABLES_FOLDER, table_name + ".csv")))
+
+
+def extracted_table_path(base_dir, table_name, table_format=TABLE_FORMAT):
+    """Returns the path of the persistent table `table_name` of a portal (see `table_io.table_path`)."""
+    return table_path(os.path.join(base_dir, EXTRACTED_TABLES_FOLDER), table_name, table_format)
+
+
+def _read_comparison(base_dir):
+    path = os.path.join(base_dir, COMPARISON_FILE)
+    if not os.path.exists(path) or os.stat(path).st_size == 0:
+        return None
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def datasets_to_extract(base_dir, table_name, extension="xml"):
+    """
+    Reads the datasets to extract from `comparison_result.csv` of the last change detection.
+
+    Args:
+        base_dir (str): Base directory of the portal.
+        table_name (str): Persistent table that must exist for an incremental extraction.
+        extension (str): File extension of the documents (part of `xml_filename`).
+
+    Returns:
+        tuple or None: (names of the 'new' and 'changed' datasets, file names of the 'new',
+        'changed' and 'removed' datasets), None if all documents have to be extracted
+        (no comparison result or no persistent table yet, see `seed_extraction`).
+    """
+    if not extracted_table_exists(base_dir, table_name):
+        return None
+    comparison_df = _read_comparison(base_dir)
+    if comparison_df is None:
+        return None
+    names = comparison_df.loc[comparison_df["status"].isin(EXTRACT_STATUSES), "Dataset_Name"].tolist()
+    replaced = comparison_df.loc[comparison_df["status"].isin(REPLACED_STATUSES), "Dataset_Name"]
+    return names, {f"{name}.{extension}" for name in replaced}
+
+
+def seed_extraction(base_dir, available_names, portal_name, extension="xml"):
+    """
+    Plans the extraction of all documents in the folder that seeds the persistent tables.
+
+    The per-run tables only get the rows of the 'new' and 'changed' datasets of `comparison_result.csv`.
+    The persistent tables get the rows of all documents, which is only complete if every 'found'
+    dataset still has its document; otherwise a warning is logged and the persistent tables are
+    seeded by a later run.
+
+    Args:
+        base_dir (str): Base directory of the portal.
+        available_names (set): Names of the datasets with a document in the folder or store.
+        portal_name (str): Portal name for the log.
+        extension (str): File extension of the documents (part of `xml_filename`).
+
+    Returns:
+        tuple: (file names of the datasets for the per-run tables, None for all documents;
+        True if the persistent tables can be seeded)
+    """
+    comparison_df = _read_comparison(base_dir)
+    if comparison_df is None:
+        return None, True
+    run_files = {f"{name}.{extension}" for name in comparison_df.loc[comparison_df["status"].isin(EXTRACT_STATUSES), "Dataset_Name"]}
+    found = set(comparison_df.loc[comparison_df["status"] == "found", "Dataset_Name"])
+    missing = found - set(available_names)
+    if missing:
+        log_error(f"Extracted tables of {portal_name} not seeded: {len(missing)} unchanged datasets have no document. "
+                  f"The seed run needs a full download and the 'found' documents (compare_dataset_hashes(keep_found=True)); "
+                  f"01_ETL_script does both while the extracted tables are missing", "warning")
+    return run_files, not missing
+
+
+def upsert_table(base_dir, name, rows_df, replaced_files, table_format=TABLE_FORMAT, timestamp_columns=(), key="dataset_identifier"):
+    """
+    Upserts extracted rows into the persistent table `name` of a portal.
+
+    Args:
+        base_dir (str): Base directory of the portal.
+        name (str): Table name without extension, e.g. "opendata_dataset_metadata".
+        rows_df (DataFrame): Rows of the re-extracted datasets.
+        replaced_files (set): `xml_filename` values whose existing rows are dropped.
+        table_format (str): "csv" or "parquet".
+        timestamp_columns (iterable): Columns stored as timestamps in Parquet (see `table_io.write_table`).
+        key (str): Dataset identifier column.
+
+    Returns:
+        int: Number of rows in the table.
+    """
+    folder = os.path.join(base_dir, EXTRACTED_TABLES_FOLDER)
+    existing_path = resolve_table_path(os.path.join(folder, name + ".csv"))
+    os.makedirs(folder, exist_ok=True)
+    existing_df = pd.DataFrame()
+    if os.path.exists(existing_path) and os.stat(existing_path).st_size > 0:
+        try:
+            existing_df = read_table(existing_path, dtype=str, keep_default_na=False)
+        except pd.errors.EmptyDataError:
+            pass
+        except Exception as e:
+            log_error(f"Failed to read extracted table {existing_path}, it is rebuilt from this run", "error", e)
+
+    if not existing_df.empty:
+        dropped = pd.Series(False, index=existing_df.index)
+        if "xml_filename" in existing_df.columns:
+            dropped |= existing_df["xml_filename"].isin(replaced_files)
+        if key in existing_df.columns and key in rows_df.columns:
+            keys = set(rows_df[key].dropna().astype(str)) - MISSING_IDENTIFIERS
+            dropped |= existing_df[key].isin(keys)
+        rows_df = pd.concat([existing_df[~dropped], rows_df], ignore_index=True)
+
+    write_table(rows_df, table_path(folder, name, table_format), timestamp_columns=timestamp_columns)
+    return len(rows_df)
+
+
+def export_table(base_dir, name, table_format=TABLE_FORMAT, timestamp_columns=()):
+    """
+    Writes the persistent table `name` as the per-run table of the portal (e.g. "opendata_dataset_metadata.csv"),
+    so the transform, merge and load steps process every current dataset instead of the delta of the run.
+
+    Args:
+        base_dir (str): Base directory of the portal.
+        name (str): Table name without extension.
+        table_format (str): "csv" or "parquet".
+        timestamp_columns (iterable): Columns stored as timestamps in Parquet (see `table_io.write_table`).
+
+    Returns:
+        str or None: Path of the per-run table, None if there is no persistent table.
+    """
+    if not extracted_table_exists(base_dir, name):
+        log_error(f"Extracted table {name} does not exist, the per-run table keeps the delta of this run", "warning")
+        return None
+    df = read_table(resolve_table_path(os.path.join(base_dir, EXTRACTED_TABLES_FOLDER, name + ".csv")), dtype=str, keep_default_na=False)
+    path = table_path(base_dir, name, table_format)
+    write_table(df, path, timestamp_columns=timestamp_columns)
+    return path
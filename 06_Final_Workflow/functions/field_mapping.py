@@ -0,0 +1,414 @@
+"""
+Module: Field Mapping
+
+Declarative metadata extraction. A portal describes its fields once as a `FieldMapping`
+(field name -> spec) and registers it under its name; the mapping is compiled into a
+plan (every path of every field resolved against the namespaces and compiled once per
+process) and evaluated on a single `PathIndex` per document, i.e. one traversal of the
+tree, however many fields the mapping has.
+
+Specs:
+- Text / Attribute: text or attribute of the first match of a path.
+- TextList: stripped texts of all matches, or a default list.
+- FirstOf: first spec whose value is not the placeholder (fallback paths).
+- Multilang: texts grouped by `xml:lang`, merged into the record as `<field>_<LANG>`.
+- LocalizedText / LocalizedLists: ISO 19139 PT_FreeText values by locale.
+- Constant / Source / Ref / Matched: fixed values, the document source, a value of the
+  enclosing record, the variant matched by a group.
+- Group: one record per match of a path (scoped: the fields of the group are evaluated
+  relative to the matched element), optionally restricted to the first matching variant.
+
+Adding a portal (e.g. a cantonal catalogue) means writing a mapping, not an extractor:
+
+    MAPPING = FieldMapping(namespaces, {
+        "dataset_identifier": Text("dct:identifier"),
+        "dataset_title": Multilang("dct:title"),
+        "distributions": Group("dcat:distribution/dcat:Distribution", {
+            "dataset_identifier": Ref("dataset_identifier"),
+            "distribution_download_url": Attribute("dcat:downloadURL", RDF_RESOURCE),
+        }),
+    }, scope=".//dcat:Dataset")
+    register_mapping("canton.example", MAPPING)
+    record = get_mapping("canton.example").extract(source)
+
+Functions:
+- register_mapping: Registers the mapping of a portal.
+- get_mapping: Returns the mapping of a portal.
+
+Dependencies:
+- xml.etree.ElementTree
+- xml_path_index
+"""
+
+import xml.etree.ElementTree as ET
+
+from functions.error_logger import log_error
+from functions.xml_path_index import PathIndex, compile_plan
+
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+MISSING = "N/A"
+
+MAPPINGS = {}
+
+
+class Spec:
+    """Base class of the field specs."""
+
+    default = MISSING
+    # Dict-valued specs whose items are merged into the record as `<field>_<key>`
+    merge = False
+
+    def paths(self):
+        """Returns the paths the spec evaluates (for the compiled plan)."""
+        return ()
+
+    def evaluate(self, state, context):
+        raise NotImplementedError
+
+    def fallback(self):
+        """Value used when the evaluation fails."""
+        return list(self.default) if isinstance(self.default, (list, tuple)) else self.default
+
+
+class Text(Spec):
+    """
+    Text of the first element matching `path`.
+
+    With `strip=True` the text is stripped and `default` is returned for a missing element
+    or empty text; with `strip=False` the raw text is returned, `empty` if it is None.
+    """
+
+    def __init__(self, path, default=MISSING, strip=True, empty=None):
+        self.path = path
+        self.default = default
+        self.strip = strip
+        self.empty = empty
+
+    def paths(self):
+        return (self.path,)
+
+    def evaluate(self, state, context):
+        element = state.index.find(self.path, context)
+        if self.strip:
+            return element.text.strip() if element is not None and element.text else self.default
+        if element is None:
+            return self.default
+        return element.text if element.text is not None else self.empty
+
+
+class Attribute(Spec):
+    """Attribute of the first element matching `path` ("." for the context element)."""
+
+    def __init__(self, path, attribute, default=MISSING):
+        self.path = path
+        self.attribute = attribute
+        self.default = default
+
+    def paths(self):
+        return (self.path,)
+
+    def evaluate(self, state, context):
+        element = state.index.find(self.path, context)
+        return element.get(self.attribute, self.default) if element is not None else self.default
+
+
+class TextList(Spec):
+    """Stripped, non-empty texts of all elements matching `path`, or a copy of `default`."""
+
+    def __init__(self, path, default=(MISSING,)):
+        self.path = path
+        self.default = default
+
+    def paths(self):
+        return (self.path,)
+
+    def evaluate(self, state, context):
+        return [element.text.strip() for element in state.index.findall(self.path, context) if element.text] or list(self.default)
+
+
+class FirstOf(Spec):
+    """Value of the first spec that does not return `missing`."""
+
+    def __init__(self, *specs, missing=MISSING):
+        self.specs = specs
+        self.default = missing
+
+    def paths(self):
+        return tuple(path for spec in self.specs for path in spec.paths())
+
+    def evaluate(self, state, context):
+        for spec in self.specs:
+            value = spec.evaluate(state, context)
+            if value != self.default:
+                return value
+        return self.default
+
+
+class Multilang(Spec):
+    """
+    Texts of all elements matching `path`, grouped by `xml:lang` (upper case, UNKNOWN without
+    attribute) and joined with ", "; merged into the record as `<field>_<LANG>`.
+    """
+
+    merge = True
+
+    def __init__(self, path, separator=", "):
+        self.path = path
+        self.separator = separator
+
+    def paths(self):
+        return (self.path,)
+
+    def evaluate(self, state, context):
+        collected = {}
+        for element in state.index.findall(self.path, context):
+            language = element.get(XML_LANG, "unknown").upper()
+            collected.setdefault(language, []).append(element.text.strip() if element.text else MISSING)
+        if not collected:
+            return {"UNKNOWN": MISSING}
+        return {language: self.separator.join(values) for language, values in collected.items()}
+
+    def fallback(self):
+        return {"UNKNOWN": MISSING}
+
+
+class LocalizedText(Spec):
+    """
+    ISO 19139 text with translations: `{name: text of path, "<name>_<locale>": translation}`.
+    The translations are the `entry` elements of the first `free_text_path` match.
+    """
+
+    def __init__(self, name, path, free_text_path, entry="gmd:textGroup/gmd:LocalisedCharacterString", locale_attribute="locale"):
+        self.name = name
+        self.text = Text(path)
+        self.free_text_path = free_text_path
+        self.entry = entry
+        self.locale_attribute = locale_attribute
+
+    def paths(self):
+        return (self.text.path, self.free_text_path, self.entry)
+
+    def evaluate(self, state, context):
+        values = {self.name: self.text.evaluate(state, context)}
+        free_text = state.index.find(self.free_text_path, context)
+        if free_text is not None:
+            for element in state.index.findall(self.entry, free_text):
+                locale = element.attrib.get(self.locale_attribute, "").replace("#", "").strip()
+                if element.text:
+                    values[f"{self.name}_{locale}"] = element.text.strip()
+        return values
+
+    def fallback(self):
+        return {self.name: MISSING}
+
+
+class LocalizedLists(Spec):
+    """
+    ISO 19139 keywords: for every element matching `path`, its `text_path` text is added to
+    the "UNKNOWN" list and its `localized_path` translations to the list of their locale.
+    """
+
+    def __init__(self, path, text_path="gco:CharacterString",
+                 localized_path="gmd:PT_FreeText/gmd:textGroup/gmd:LocalisedCharacterString", locale_attribute="locale"):
+        self.path = path
+        self.text_path = text_path
+        self.localized_path = localized_path
+        self.locale_attribute = locale_attribute
+
+    def paths(self):
+        return (self.path, self.text_path, self.localized_path)
+
+    def evaluate(self, state, context):
+        values = {"UNKNOWN": []}
+        for element in state.index.findall(self.path, context):
+            text_element = state.index.find(self.text_path, element)
+            if text_element is not None and text_element.text:
+                values["UNKNOWN"].append(text_element.text.strip())
+            for localized in state.index.findall(self.localized_path, element):
+                locale = localized.attrib.get(self.locale_attribute, "").replace("#", "").strip()
+                if localized.text and locale:
+                    values.setdefault(locale, []).append(localized.text.strip())
+        return values
+
+    def fallback(self):
+        return {"UNKNOWN": []}
+
+
+class Constant(Spec):
+    """Fixed value."""
+
+    def __init__(self, value):
+        self.default = value
+
+    def evaluate(self, state, context):
+        return self.default
+
+
+class Source(Spec):
+    """The source the document was read from (file path or file object)."""
+
+    default = None
+
+    def evaluate(self, state, context):
+        return state.source
+
+
+class Ref(Spec):
+    """Value of a field of the enclosing record (declared before the group)."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def evaluate(self, state, context):
+        # parents[-1] is the record being built, parents[-2] the record enclosing the group
+        return state.parents[-2][self.name]
+
+
+class Matched(Spec):
+    """Label of the variant matched by the enclosing group."""
+
+    def evaluate(self, state, context):
+        return state.labels[-1]
+
+
+class Group(Spec):
+    """
+    One record per element matching `path` (a path or a tuple of paths, whose matches are
+    concatenated). The fields are evaluated relative to the matched element, or with
+    `variants` ((path, label) pairs) relative to the first variant found in it; elements
+    without a variant are skipped.
+    """
+
+    default = ()
+
+    def __init__(self, path, fields, variants=None):
+        self.group_paths = (path,) if isinstance(path, str) else tuple(path)
+        self.fields = fields
+        self.variants = variants
+
+    def paths(self):
+        paths = list(self.group_paths)
+        paths.extend(path for path, _ in self.variants or ())
+        paths.extend(path for spec in self.fields.values() for path in spec.paths())
+        return tuple(paths)
+
+    def evaluate(self, state, context):
+        records = []
+        for path in self.group_paths:
+            for element in state.index.findall(path, context):
+                label = None
+                if self.variants:
+                    for variant_path, variant_label in self.variants:
+                        variant = state.index.find(variant_path, element)
+                        if variant is not None:
+                            element, label = variant, variant_label
+                            break
+                    else:
+                        continue
+                state.labels.append(label)
+                try:
+                    records.append(_evaluate_fields(self.fields, state, element))
+                finally:
+                    state.labels.pop()
+        return records
+
+
+class _State:
+    """Evaluation state of one document."""
+
+    def __init__(self, index, source):
+        self.index = index
+        self.source = source
+        self.parents = []
+        self.labels = []
+
+
+def _evaluate_fields(fields, state, context):
+    record = {}
+    state.parents.append(record)
+    try:
+        for name, spec in fields.items():
+            try:
+                value = spec.evaluate(state, context)
+            except Exception as e:
+                log_error(f"Failed to extract '{name}' from {state.source}", exception=e)
+                value = spec.fallback()
+            if spec.merge:
+                for key, item in value.items():
+                    record[f"{name}_{key}"] = item
+            else:
+                record[name] = value
+    finally:
+        state.parents.pop()
+    return record
+
+
+class FieldMapping:
+    """
+    Declarative mapping of a portal: field name -> spec, evaluated relative to `scope`
+    (the first match of a path, or the root element).
+    """
+
+    def __init__(self, namespaces, fields, scope=None):
+        """
+        Compiles the mapping into its plan.
+
+        Args:
+            namespaces (dict): Prefix to namespace URI mapping used by the paths.
+            fields (dict): Field name -> spec, in output order.
+            scope (str, optional): Path of the element the fields are relative to.
+        """
+        self.namespaces = namespaces
+        self.fields = fields
+        self.scope = scope
+        paths = ([scope] if scope else []) + [path for spec in fields.values() for path in spec.paths()]
+        # Distinct paths in first-use order, compiled once; all of them are answered from the same PathIndex
+        self.plan = compile_plan(dict.fromkeys(paths), namespaces)
+        self.unsupported = tuple(path for path, steps in self.plan.items() if steps is None)
+
+    def extract(self, source):
+        """
+        Parses a document and extracts its record.
+
+        Args:
+            source (str or file object): File path or binary file object.
+
+        Returns:
+            dict or None: Record (groups as lists of records), None if the scope element is missing.
+        """
+        return self.extract_root(ET.parse(source).getroot(), source)
+
+    def extract_root(self, root, source=None):
+        """Extracts the record of a parsed document (see `extract`)."""
+        state = _State(PathIndex(root, self.namespaces, self.plan), source)
+        context = root if self.scope is None else state.index.find(self.scope)
+        if context is None:
+            return None
+        return _evaluate_fields(self.fields, state, context)
+
+
+def register_mapping(portal_name, mapping):
+    """
+    Registers the mapping of a portal.
+
+    Args:
+        portal_name (str): Portal name, e.g. "geocat.ch".
+        mapping (FieldMapping): Mapping of the portal.
+    """
+    MAPPINGS[portal_name] = mapping
+
+
+def get_mapping(portal_name):
+    """
+    Returns the mapping of a portal.
+
+    Args:
+        portal_name (str): Portal name.
+
+    Returns:
+        FieldMapping: Registered mapping.
+    """
+    try:
+        return MAPPINGS[portal_name]
+    except KeyError:
+        raise KeyError(f"No field mapping registered for '{portal_name}' (registered: {', '.join(sorted(MAPPINGS))})") from None
@@ -0,0 +1,168 @@
+"""
+Module: HTTP Client
+
+Shared HTTP helpers for the download modules. It provides:
+
+1. Pooled keep-alive sessions, so repeated requests to the same portal reuse
+   their TCP/TLS connections instead of opening a new one per dataset.
+2. Automatic retry with exponential backoff for transient failures
+   (connection errors, HTTP 429 and 5xx responses).
+3. A per-host concurrency limiter, so that concurrent downloads never send
+   more than a fixed number of parallel requests to a single portal.
+4. A validator cache for conditional requests: the ETag and Last-Modified headers
+   are stored per dataset, so unchanged metadata is answered with HTTP 304
+   instead of transferring the full document again.
+
+Constants:
+- RETRY_TOTAL: Number of retries per request.
+- RETRY_BACKOFF_FACTOR: Backoff factor between retries (0.5 -> 0.5s, 1s, 2s, ...).
+- RETRY_STATUS_CODES: HTTP status codes that trigger a retry.
+- MAX_REQUESTS_PER_HOST: Default number of parallel requests per host.
+- NOT_MODIFIED: Returned by the fetch functions if the server answered HTTP 304.
+
+Dependencies:
+- requests
+- urllib3
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+MAX_REQUESTS_PER_HOST = 8
+NOT_MODIFIED = "not_modified"
+
+
+def create_session(pool_size=10, retries=RETRY_TOTAL, backoff_factor=RETRY_BACKOFF_FACTOR):
+    """
+    Creates a requests session with a connection pool and retry/backoff handling.
+
+    Args:
+        pool_size (int): Maximum number of pooled keep-alive connections per host.
+        retries (int): Number of retries for failed requests.
+        backoff_factor (float): Exponential backoff factor between retries.
+
+    Returns:
+        requests.Session: Configured session that can be shared between threads.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(["GET", "POST"]),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class HostLimiter:
+    """
+    Limits the number of concurrent requests per host.
+
+    Usage:
+        limiter = HostLimiter(max_per_host=4)
+        with limiter.limit(url):
+            response = session.get(url, timeout=10)
+    """
+
+    def __init__(self, max_per_host=MAX_REQUESTS_PER_HOST):
+        self.max_per_host = max_per_host
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore_for(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
+
+    @contextmanager
+    def limit(self, url):
+        """Blocks until a request slot for the host of `url` is available."""
+        semaphore = self._semaphore_for(url)
+        with semaphore:
+            yield
+
+
+class ValidatorCache:
+    """
+    Stores the ETag / Last-Modified validators per dataset identifier in a JSON file.
+
+    Usage:
+        cache = ValidatorCache(path)
+        response = session.get(url, headers=cache.request_headers(identifier))
+        if response.status_code == 304:
+            ...  # unchanged since the last download
+        else:
+            cache.store(identifier, response)
+        cache.save()
+    """
+
+    def __init__(self, path, known_identifiers=None):
+        """
+        Args:
+            path (str): JSON file holding the validators.
+            known_identifiers (set, optional): Identifiers with a known previous state. Conditional
+                requests are only sent for these, so a 304 never hides a dataset that was not
+                processed completely before.
+        """
+        self.path = path
+        self.known_identifiers = known_identifiers
+        self._validators = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    self._validators = json.load(file)
+            except (OSError, ValueError):
+                self._validators = {}
+
+    def request_headers(self, identifier):
+        """Returns the conditional request headers for an identifier (empty if none are stored)."""
+        if self.known_identifiers is not None and identifier not in self.known_identifiers:
+            return {}
+        with self._lock:
+            validators = self._validators.get(identifier)
+        if not validators:
+            return {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def store(self, identifier, response):
+        """Stores the validators of a successful response."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        with self._lock:
+            if etag or last_modified:
+                self._validators[identifier] = {"etag": etag, "last_modified": last_modified}
+            else:
+                self._validators.pop(identifier, None)
+
+    def discard(self, identifier):
+        """Removes the validators of an identifier, e.g. if its download could not be processed."""
+        with self._lock:
+            self._validators.pop(identifier, None)
+
+    def save(self):
+        """Writes the validators to the JSON file."""
+        with self._lock:
+            with open(self.path, "w", encoding="utf-8") as file:
+                json.dump(self._validators, file)
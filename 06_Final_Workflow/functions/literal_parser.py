@@ -0,0 +1,107 @@
+"""
+Module: Literal Parser
+
+Memoised parsing of the list literals in the CSV metadata tables. List fields (languages,
+coverage, keywords, ...) are stored as their Python repr, e.g. "['de', 'fr']", and most
+columns hold only a few distinct values across all rows. `parse_literal` parses every
+distinct text once with `ast.literal_eval` (safe, no code is executed) and answers repeated
+texts from a bounded cache; parse errors are cached as well.
+
+The cached values are shared, so callers get a copy of every list, dict or set and can
+modify it.
+
+Usage:
+    if may_be_list_literal(value):
+        languages = sorted(parse_list(value))
+
+Constants:
+- LITERAL_CACHE_SIZE: Maximum number of distinct texts kept in the cache.
+- LIST_LITERAL_PREFIXES: First non-whitespace characters of texts `ast.literal_eval` can parse into a list.
+
+Functions:
+- parse_literal: Parses a Python literal (memoised `ast.literal_eval`).
+- parse_list: Parses a list literal, raises ValueError for anything else.
+- may_be_list_literal: Returns False for texts that cannot be list literals.
+
+Dependencies:
+- ast
+- copy
+- functools
+"""
+
+import ast
+import copy
+from functools import lru_cache
+
+LITERAL_CACHE_SIZE = 4096
+# A list display, possibly in parentheses or after a comment or line continuation
+LIST_LITERAL_PREFIXES = ("[", "(", "#", "\\")
+
+
+@lru_cache(maxsize=LITERAL_CACHE_SIZE)
+def _parse(text):
+    try:
+        return True, ast.literal_eval(text)
+    except (ValueError, SyntaxError) as e:
+        # The exception itself is not kept: re-raising the same instance would extend its traceback
+        return False, (type(e), e.args)
+
+
+def _copy(value):
+    if isinstance(value, list):
+        if all(isinstance(item, (str, int, float)) for item in value):
+            return list(value)
+        return copy.deepcopy(value)
+    if isinstance(value, (dict, set, tuple)):
+        return copy.deepcopy(value)
+    return value
+
+
+def parse_literal(text):
+    """
+    Parses a Python literal like `ast.literal_eval`, once per distinct text.
+
+    Args:
+        text (str): Literal, e.g. "['de', 'fr']". Other values are parsed without the cache.
+
+    Returns:
+        object: Parsed value (lists, dicts and sets are copies).
+
+    Raises:
+        ValueError, SyntaxError: As `ast.literal_eval`, if the text is not a literal.
+    """
+    if not isinstance(text, str):
+        return ast.literal_eval(text)
+    parsed, result = _parse(text)
+    if not parsed:
+        error_type, args = result
+        raise error_type(*args)
+    return _copy(result)
+
+
+def parse_list(text):
+    """
+    Parses a list literal (see `parse_literal`).
+
+    Args:
+        text (str): List literal, e.g. "['de', 'fr']".
+
+    Returns:
+        list: Parsed list (a copy).
+
+    Raises:
+        ValueError: If the text is not a list literal.
+    """
+    try:
+        value = parse_literal(text)
+    except (ValueError, SyntaxError) as e:
+        raise ValueError(f"Not a list literal: {text!r}") from e
+    if not isinstance(value, list):
+        raise ValueError(f"Not a list literal: {text!r}")
+    return value
+
+
+def may_be_list_literal(text):
+    """Returns False if `ast.literal_eval(text)` cannot return a list (see `LIST_LITERAL_PREFIXES`)."""
+    return text.lstrip()[:1] in LIST_LITERAL_PREFIXES
+
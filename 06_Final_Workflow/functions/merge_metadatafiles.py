@@ -2,6 +2,7 @@ import pandas as pd
 from typing import List
 import os
 from functions.error_logger import log_error
+from functions.table_io import find_tables, read_table
 
 # Column definitions for each metadata type
 DATASET_COLUMNS = [
@@ -131,12 +132,12 @@ CONTACT_POINT_COLUMNS = [
 
 def merge_csv_files(input_files: List[str], output_file: str, required_columns: List[str]) -> None:
     """
-    Merge multiple CSV files into one, keeping all required columns in a fixed order.
+    Merge multiple CSV or Parquet files into one CSV, keeping all required columns in a fixed order.
     """
     try:
         dataframes = []
         for file in input_files:
-            df = pd.read_csv(file)
+            df = read_table(file)
             for col in required_columns:
                 if col not in df.columns:
                     df[col] = ""
@@ -158,51 +159,36 @@ def merge_csv_files(input_files: List[str], output_file: str, required_columns:
 
 
 def merge_dataset_metadata(folders: List[str], output_dir: str) -> None:
-    suffix = '_dataset_metadata.csv'
-    input_paths = [
-        os.path.join(folder, file)
-        for folder in folders
-        for file in os.listdir(folder)
-        if file.endswith(suffix)
-    ]
+    suffix = '_dataset_metadata'
+    input_paths = find_tables(folders, suffix)
 
     if input_paths:
         output_file = os.path.join(output_dir, "merged_dataset_metadata.csv")
         merge_csv_files(input_paths, output_file, required_columns=DATASET_COLUMNS)
     else:
-        log_error(f"No dataset metadata files found with suffix  '{output_file}'", level="error")
+        log_error(f"No dataset metadata files found with suffix '{suffix}'", level="error")
 
 
 def merge_distribution_metadata(folders: List[str], output_dir: str) -> None:
-    suffix = '_distribution_metadata.csv'
-    input_paths = [
-        os.path.join(folder, file)
-        for folder in folders
-        for file in os.listdir(folder)
-        if file.endswith(suffix)
-    ]
+    suffix = '_distribution_metadata'
+    input_paths = find_tables(folders, suffix)
 
     if input_paths:
         output_file = os.path.join(output_dir, "merged_distribution_metadata.csv")
         merge_csv_files(input_paths, output_file, required_columns=DISTRIBUTION_COLUMNS)
     else:
-        log_error(f"No distribution metadata files found with suffix   '{output_file}'", level="error")
+        log_error(f"No distribution metadata files found with suffix '{suffix}'", level="error")
 
 
 def merge_contact_point_metadata(folders: List[str], output_dir: str) -> None:
-    suffix = '_contact_point_metadata.csv'
-    input_paths = [
-        os.path.join(folder, file)
-        for folder in folders
-        for file in os.listdir(folder)
-        if file.endswith(suffix)
-    ]
+    suffix = '_contact_point_metadata'
+    input_paths = find_tables(folders, suffix)
 
     if input_paths:
         output_file = os.path.join(output_dir, "merged_contact_point_metadata.csv")
         merge_csv_files(input_paths, output_file, required_columns=CONTACT_POINT_COLUMNS)
     else:
-        log_error(f"No contact point metadata files found with suffix '{output_file}'", level="error")
+        log_error(f"No contact point metadata files found with suffix '{suffix}'", level="error")
 
 
 
@@ -0,0 +1,309 @@
+"""
+Module: Metadata Store
+
+Packed, content-addressed store for the XML metadata of a portal. It replaces the
+tens of thousands of small files in `saved_metadata_xml` by a single SQLite file:
+
+- `blobs`: zlib-compressed document per SHA-256 hash of its (uncompressed) content.
+  Identical documents are stored only once.
+- `records`: maps every dataset name (the former file name without `.xml`) to the hash
+  and size of its document.
+
+The hash is the same SHA-256 that `dataset_change_detector.file_hash` computes for a
+file with the same content, so the change detector reads the hashes from the index
+instead of hashing every document again.
+
+The store offers random access by dataset name (`get`, `put`, `delete`) and bulk
+iteration in name order (`items`). A connection can be shared between the download
+worker threads; writes are serialised by a lock.
+
+Usage:
+    with MetadataStore(os.path.join(base_dir, METADATA_STORE_FILE)) as store:
+        store.put("dataset-name", xml_bytes)
+        for name, data in store.items():
+            ...
+
+Constants:
+- METADATA_STORE_FILE: Default file name of the store in the base directory of a portal.
+- COMPRESSION_LEVEL: zlib compression level of the documents.
+- ITERATION_BATCH_SIZE: Number of documents read per query by `items`.
+- IMPORT_BATCH_SIZE: Number of files moved per transaction by `import_folder`.
+
+Functions:
+- iter_documents: Iterates over the documents of a store or of a folder of loose files.
+- document_names: Returns the dataset names of the documents of a store or of a folder of loose files.
+
+Dependencies:
+- io
+- sqlite3
+- zlib
+- hashlib
+"""
+
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import zlib
+
+METADATA_STORE_FILE = "saved_metadata.sqlite"
+COMPRESSION_LEVEL = 6
+ITERATION_BATCH_SIZE = 500
+IMPORT_BATCH_SIZE = 500
+
+
+class MetadataStore:
+    """
+    SQLite pack store with random access by dataset name and bulk iteration.
+    """
+
+    def __init__(self, path):
+        """
+        Opens (and if necessary creates) the store.
+
+        Args:
+            path (str): Path of the SQLite file.
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                data BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS records (
+                name TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                size INTEGER NOT NULL
+            );
+        """)
+        self._connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def __contains__(self, name):
+        return self.get_hash(name) is not None
+
+    def close(self):
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def _put(self, name, data):
+        if isinstance(data, str):
+            # Same bytes as a file written in text mode (CRLF on Windows), so the hashes match
+            # those of the loose files of earlier runs and of `import_folder`
+            data = data.replace("\n", os.linesep).encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        self._connection.execute(
+            "INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, ?)",
+            (content_hash, zlib.compress(data, COMPRESSION_LEVEL))
+        )
+        self._connection.execute(
+            "INSERT OR REPLACE INTO records (name, hash, size) VALUES (?, ?, ?)",
+            (name, content_hash, len(data))
+        )
+        return content_hash
+
+    def put(self, name, data):
+        """
+        Stores the document of a dataset, replacing an existing one.
+
+        Args:
+            name (str): Dataset name.
+            data (bytes or str): XML document (str is stored UTF-8 encoded with the line endings of
+                text mode files, i.e. `os.linesep`).
+
+        Returns:
+            str: SHA-256 hash of the document.
+        """
+        with self._lock:
+            content_hash = self._put(name, data)
+            self._connection.commit()
+        return content_hash
+
+    def put_many(self, items):
+        """Stores several (name, data) pairs in a single transaction."""
+        with self._lock:
+            for name, data in items:
+                self._put(name, data)
+            self._connection.commit()
+
+    def get(self, name):
+        """
+        Returns the document of a dataset.
+
+        Args:
+            name (str): Dataset name.
+
+        Returns:
+            bytes or None: XML document, None if the dataset is not in the store.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT blobs.data FROM records JOIN blobs ON blobs.hash = records.hash WHERE records.name = ?",
+                (name,)
+            ).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    def get_hash(self, name):
+        """Returns the SHA-256 hash of the document of a dataset, or None."""
+        with self._lock:
+            row = self._connection.execute("SELECT hash FROM records WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def get_size(self, name):
+        """Returns the size in bytes of the document of a dataset, or None."""
+        with self._lock:
+            row = self._connection.execute("SELECT size FROM records WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def names(self):
+        """Returns all dataset names in name order."""
+        with self._lock:
+            return [row[0] for row in self._connection.execute("SELECT name FROM records ORDER BY name")]
+
+    def hashes(self):
+        """Returns {dataset name: SHA-256 hash} of all documents."""
+        with self._lock:
+            return dict(self._connection.execute("SELECT name, hash FROM records"))
+
+    def items(self):
+        """
+        Iterates over all documents in name order.
+
+        Yields:
+            tuple: (dataset name, XML document as bytes)
+        """
+        # Materialise the index first, so that documents can be replaced while iterating
+        names = self.names()
+        for start in range(0, len(names), ITERATION_BATCH_SIZE):
+            batch = names[start:start + ITERATION_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows = dict(self._connection.execute(
+                    f"SELECT records.name, blobs.data FROM records JOIN blobs ON blobs.hash = records.hash "
+                    f"WHERE records.name IN ({placeholders})",
+                    batch
+                ))
+            for name in batch:
+                if name in rows:
+                    yield name, zlib.decompress(rows[name])
+
+    def delete(self, name):
+        """Removes a dataset from the index; its document is released by `prune`."""
+        self.delete_many([name])
+
+    def delete_many(self, names):
+        with self._lock:
+            self._connection.executemany("DELETE FROM records WHERE name = ?", ((name,) for name in names))
+            self._connection.commit()
+
+    def prune(self):
+        """
+        Removes documents that are no longer referenced by any dataset.
+
+        Returns:
+            int: Number of removed documents.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM records)"
+            )
+            self._connection.commit()
+            return cursor.rowcount
+
+    def import_folder(self, folder_path, extension="xml"):
+        """
+        Moves the documents of a folder of loose files into the store (file name = dataset name).
+
+        Args:
+            folder_path (str): Folder with the files, e.g. a former `saved_metadata_xml`.
+            extension (str): File extension to include.
+
+        Returns:
+            int: Number of imported documents.
+        """
+        if not os.path.isdir(folder_path):
+            return 0
+        suffix = f".{extension.lower()}"
+        filenames = [f for f in os.listdir(folder_path) if f.lower().endswith(suffix)]
+        # Bounded batches: the files of a batch are deleted once the batch is committed
+        for start in range(0, len(filenames), IMPORT_BATCH_SIZE):
+            batch = filenames[start:start + IMPORT_BATCH_SIZE]
+            items = []
+            for filename in batch:
+                with open(os.path.join(folder_path, filename), "rb") as file:
+                    items.append((filename[:-len(suffix)], file.read()))
+            self.put_many(items)
+            for filename in batch:
+                os.remove(os.path.join(folder_path, filename))
+        return len(filenames)
+
+def iter_documents(folder_path, store=None, extension="xml", names=None):
+    """
+    Iterates over the XML documents of a portal, from the store if one is given, else from the folder.
+
+    Args:
+        folder_path (str): Folder with loose files (used without store).
+        store (MetadataStore, optional): Packed metadata store.
+        extension (str): File extension of the loose files.
+        names (iterable, optional): Only these datasets, in this order; missing ones are skipped.
+
+    Yields:
+        tuple: (file name, source) where source is a file path or a binary file object,
+        both accepted by `ElementTree.parse`. The file name is `<dataset name>.<extension>`.
+    """
+    if names is not None:
+        for name in names:
+            if store is not None:
+                data = store.get(name)
+                if data is not None:
+                    yield f"{name}.{extension}", io.BytesIO(data)
+            else:
+                path = os.path.join(folder_path, f"{name}.{extension}")
+                if os.path.exists(path):
+                    yield f"{name}.{extension}", path
+        return
+    if store is not None:
+        for name, data in store.items():
+            yield f"{name}.{extension}", io.BytesIO(data)
+        return
+    for filename in os.listdir(folder_path):
+        if filename.endswith(f".{extension}"):
+            yield filename, os.path.join(folder_path, filename)
+
+
+def document_names(folder_path, store=None, extension="xml"):
+    """
+    Returns the dataset names of the documents of a portal, from the store if one is given, else from the folder.
+
+    Args:
+        folder_path (str): Folder with loose files (used without store).
+        store (MetadataStore, optional): Packed metadata store.
+        extension (str): File extension of the loose files.
+
+    Returns:
+        set of str: Dataset names (file names without extension).
+    """
+    if store is not None:
+        return set(store.names())
+    if not os.path.isdir(folder_path):
+        return set()
+    suffix = f".{extension}"
+    return {filename[:-len(suffix)] for filename in os.listdir(folder_path) if filename.endswith(suffix)}
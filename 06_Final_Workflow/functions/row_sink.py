@@ -0,0 +1,157 @@
+"""
+Module: Row Sink
+
+Streaming writer for the rows of the extractors. Instead of collecting every dataset,
+distribution and contact point dict of a catalogue in lists and building the DataFrames
+at the end, the extractors hand their rows to a `RowSink`:
+
+- Rows are buffered and flushed in batches of `batch_size` to a JSON Lines spool file
+  next to the table, so the memory held by the sink does not grow with the catalogue.
+- The columns are the union of the row keys in first-seen order, i.e. the same column
+  order as `pd.DataFrame(rows)`. The set of columns is only known after the last row
+  (e.g. the title languages of opendata.swiss), hence the spool.
+- On `close` the table is written from the spool batch by batch: a CSV (missing keys are
+  empty cells, exactly like `pd.DataFrame(rows).to_csv`) or a Parquet table with the column
+  types of `table_io.write_table` (`table_io.write_parquet_batches`: one pass over the spool
+  collects the column types, a second one writes the row groups).
+
+Row values must be JSON values (text, numbers, None, lists).
+
+Usage:
+    with RowSink(table_path(output_folder, "geocat_dataset_metadata", table_format)) as sink:
+        for row in rows:
+            sink.write(row)
+    print(sink.rows, sink.columns)
+
+Constants:
+- ROW_BATCH_SIZE: Default number of rows buffered before they are spooled.
+
+Dependencies:
+- json
+- os
+- tempfile
+- pandas
+- table_io
+"""
+
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from functions.table_io import read_table, write_table, write_parquet_batches, TABLE_EXTENSIONS
+
+ROW_BATCH_SIZE = 1000
+
+
+class RowSink:
+    """
+    Buffered, spooled writer of the rows of one table.
+    """
+
+    def __init__(self, path, timestamp_columns=(), batch_size=ROW_BATCH_SIZE):
+        """
+        Args:
+            path (str): Output path of the table (.csv or .parquet, see `table_io.table_path`).
+            timestamp_columns (iterable): Columns stored as timestamps in Parquet (see `table_io.write_table`).
+            batch_size (int): Number of rows buffered before they are written to the spool file.
+        """
+        self.path = path
+        self.timestamp_columns = timestamp_columns
+        self.batch_size = batch_size
+        self.rows = 0
+        self._columns = {}
+        self._buffer = []
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        descriptor, self._spool_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".jsonl", dir=directory)
+        self._spool = os.fdopen(descriptor, "w", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # A failed extraction does not leave a partial table
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    @property
+    def columns(self):
+        """Columns of the table in first-seen order."""
+        return list(self._columns)
+
+    def write(self, row):
+        """Adds a row (dict of column -> value)."""
+        for column in row:
+            if column not in self._columns:
+                self._columns[column] = None
+        self._buffer.append(row)
+        self.rows += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def write_rows(self, rows):
+        """Adds several rows."""
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        """Writes the buffered rows to the spool file."""
+        if self._buffer:
+            self._spool.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in self._buffer)
+            self._buffer = []
+
+    def _spooled_batches(self):
+        with open(self._spool_path, encoding="utf-8") as spool:
+            batch = []
+            for line in spool:
+                batch.append(json.loads(line))
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    def close(self):
+        """
+        Writes the table and removes the spool file.
+
+        Returns:
+            str: Path of the table.
+        """
+        self.flush()
+        self._spool.close()
+        try:
+            columns = self.columns
+            if not self.rows:
+                write_table(pd.DataFrame(), self.path)
+            elif self.path.endswith(TABLE_EXTENSIONS["parquet"]):
+                write_parquet_batches(self._spooled_batches, self.path, columns, timestamp_columns=self.timestamp_columns)
+            else:
+                with open(self.path, "w", encoding="utf-8", newline="") as file:
+                    for number, batch in enumerate(self._spooled_batches()):
+                        pd.DataFrame(batch, columns=columns).to_csv(file, index=False, header=number == 0)
+        finally:
+            os.remove(self._spool_path)
+        return self.path
+
+    def frame(self):
+        """
+        Reads the written table back, e.g. the rows of an incremental run for `extracted_tables.upsert_table`.
+        Text cells are read as they were written ("N/A" stays text).
+
+        Returns:
+            DataFrame: Rows of the table (empty without rows).
+        """
+        if not self.rows:
+            return pd.DataFrame()
+        return read_table(self.path, dtype=str, keep_default_na=False)
+
+    def discard(self):
+        """Removes the spool file without writing the table."""
+        self._spool.close()
+        if os.path.exists(self._spool_path):
+            os.remove(self._spool_path)
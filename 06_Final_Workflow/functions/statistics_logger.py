@@ -1,25 +1,33 @@
 import csv
+import multiprocessing
 import os
+import threading
 from datetime import datetime
 
 # Define CSV file name
 CSV_FILE = "06_Final_Workflow\data\portal_statistics.csv"
 
-# Clear the log file before each run
-if os.path.exists(CSV_FILE):
-    with open(CSV_FILE, "w") as file:
-        file.truncate(0)  # Clears the file content
+# Worker processes (e.g. of xml_cleaner.process_folder) import this module again;
+# only the main process may reset the statistics file
+if multiprocessing.parent_process() is None:
+    # Clear the log file before each run
+    if os.path.exists(CSV_FILE):
+        with open(CSV_FILE, "w") as file:
+            file.truncate(0)  # Clears the file content
 
 
-# Check if file exists; if not, create it with headers
-if not os.path.exists(CSV_FILE):
-    with open(CSV_FILE, mode="w", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        writer.writerow(["Timestamp", "Portal Name", "Step Name", "Successful", "Failed"])  # Header row
+    # Check if file exists; if not, create it with headers
+    if not os.path.exists(CSV_FILE):
+        with open(CSV_FILE, mode="w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["Timestamp", "Portal Name", "Step Name", "Successful", "Failed"])  # Header row
 
 # Dictionary to store statistics temporarily
 portal_stats = {}
 
+# Guards portal_stats when results are logged from download worker threads
+_stats_lock = threading.Lock()
+
 def log_portal_result(portal_name, step_name, success=True):
     """
     Log results for a given portal and step into the dictionary.
@@ -34,16 +42,39 @@ def log_portal_result(portal_name, step_name, success=True):
     """
     key = (portal_name, step_name)
 
-    if key not in portal_stats:
-        portal_stats[key] = {"success": 0, "fail": 0}
+    with _stats_lock:
+        if key not in portal_stats:
+            portal_stats[key] = {"success": 0, "fail": 0}
+
+        if isinstance(success, bool):  # Standard success tracking
+            if success:
+                portal_stats[key]["success"] += 1
+            else:
+                portal_stats[key]["fail"] += 1
+        elif isinstance(success, int):  # Special case for dataset count
+            portal_stats[key]["success"] = success
+
+def add_portal_counts(portal_name, step_name, success=0, fail=0):
+    """
+    Add aggregated success/failure counts for a given portal and step, e.g. the results
+    reported back by worker processes.
+
+    Args:
+        portal_name (str): The name of the portal.
+        step_name (str): The step the counts belong to.
+        success (int): Number of successful items.
+        fail (int): Number of failed items.
+
+    Returns:
+        None
+    """
+    key = (portal_name, step_name)
 
-    if isinstance(success, bool):  # Standard success tracking
-        if success:
-            portal_stats[key]["success"] += 1
-        else:
-            portal_stats[key]["fail"] += 1
-    elif isinstance(success, int):  # Special case for dataset count
-        portal_stats[key]["success"] = success
+    with _stats_lock:
+        if key not in portal_stats:
+            portal_stats[key] = {"success": 0, "fail": 0}
+        portal_stats[key]["success"] += success
+        portal_stats[key]["fail"] += fail
 
 def count_datasets_in_csv(csv_path, portal_name):
     """
@@ -80,12 +111,13 @@ def save_statistics():
     Returns:
         None
     """
-    with open(CSV_FILE, mode="a", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        
-        for (portal, step), stats in portal_stats.items():
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            writer.writerow([timestamp, portal, step, stats["success"], stats["fail"]])
-
-    # Clear dictionary after saving to prevent duplicate entries
-    portal_stats.clear()
+    with _stats_lock:
+        with open(CSV_FILE, mode="a", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+
+            for (portal, step), stats in portal_stats.items():
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                writer.writerow([timestamp, portal, step, stats["success"], stats["fail"]])
+
+        # Clear dictionary after saving to prevent duplicate entries
+        portal_stats.clear()
@@ -0,0 +1,342 @@
+"""
+Module: Table IO
+
+Reading and writing of the intermediate metadata tables (extracted and transformed
+metadata) as CSV or Parquet.
+
+In CSV, list fields (languages, coverage, ...) are stored as their Python repr and
+timestamps as text, so the transform stage decodes every cell again. Parquet keeps
+real list and timestamp columns, which removes that parse cost and makes the files
+smaller. Parquet needs `pyarrow`; without it the tables are written as CSV.
+
+Values that Arrow cannot store in a typed column are written like `to_csv` would:
+
+- A column mixing lists with empty values becomes a list column with nulls.
+- A column mixing lists with other values stores the lists as their repr.
+- Any other column Arrow cannot convert (e.g. mixed numbers and text) is stored as text.
+
+Readers get the same Python values as from a CSV written by the extractors (text cells
+that `read_csv` treats as missing, such as "N/A", are read as missing values), except
+that list cells are lists (not repr strings) and timestamp columns hold `Timestamp`s.
+
+Usage:
+    path = table_path(output_folder, "geocat_dataset_metadata", table_format)
+    write_table(df, path, timestamp_columns=["dataset_issued"])
+    df = read_table(resolve_table_path(path), dtype=str)
+
+Constants:
+- TABLE_FORMATS: Supported table formats.
+- TABLE_FORMAT: Default table format.
+- TABLE_EXTENSIONS: File extension per table format.
+- PLACEHOLDER_VALUES: Values treated as missing when a timestamp column is converted.
+- CSV_NA_VALUES: Strings `pandas.read_csv` reads as missing values.
+
+Functions:
+- parquet_available: Returns True if Parquet files can be written.
+- table_path: Returns the path of a table in the requested (available) format.
+- resolve_table_path: Returns the most recent existing file of a table.
+- find_tables: Lists the tables with a given name suffix in folders.
+- write_table: Writes a DataFrame as CSV or Parquet.
+- write_parquet_batches: Writes row batches as one Parquet table with the column types of `write_table`.
+- read_table: Reads a CSV or Parquet table.
+
+Dependencies:
+- importlib
+- os
+- numpy
+- pandas
+- pyarrow (optional)
+"""
+
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+
+from functions.error_logger import log_error
+
+TABLE_FORMATS = ("csv", "parquet")
+TABLE_FORMAT = "csv"
+TABLE_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet"}
+PLACEHOLDER_VALUES = {"", "N/A", "[N/A]", "['N/A']"}
+# Timestamp resolutions of pandas, coarsest first
+_TIMESTAMP_UNITS = ("s", "ms", "us", "ns")
+# Default missing-value strings of pandas.read_csv
+CSV_NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+
+def parquet_available():
+    """Returns True if `pyarrow` is installed, i.e. Parquet tables can be written and read."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def table_path(folder, name, table_format=TABLE_FORMAT):
+    """
+    Returns the path of a table in the requested format. Parquet falls back to CSV (with a
+    warning) if `pyarrow` is not installed.
+
+    Args:
+        folder (str): Output folder.
+        name (str): Table name without extension, e.g. "opendata_dataset_metadata".
+        table_format (str): "csv" or "parquet".
+
+    Returns:
+        str: Path of the table file.
+    """
+    if table_format not in TABLE_FORMATS:
+        raise ValueError(f"Unknown table format '{table_format}', expected one of {TABLE_FORMATS}")
+    if table_format == "parquet" and not parquet_available():
+        log_error(f"pyarrow is not installed, {name} is written as CSV", "warning")
+        table_format = "csv"
+    return os.path.join(folder, name + TABLE_EXTENSIONS[table_format])
+
+
+def resolve_table_path(path):
+    """
+    Returns the most recently written file of a table: the given path or the same table
+    in the other format (e.g. `x.parquet` for `x.csv`).
+
+    Args:
+        path (str): Path of the table in any format.
+
+    Returns:
+        str: Existing path of the table, or `path` if no file of the table exists.
+    """
+    stem = os.path.splitext(path)[0]
+    candidates = [stem + extension for extension in TABLE_EXTENSIONS.values() if os.path.exists(stem + extension)]
+    if not candidates:
+        return path
+    return max(candidates, key=os.path.getmtime)
+
+
+def find_tables(folders, suffix):
+    """
+    Lists the tables whose name ends with `suffix` (without extension) in the folders,
+    one file per table (see `resolve_table_path`).
+
+    Args:
+        folders (list): Folders to search.
+        suffix (str): Name suffix, e.g. "_dataset_metadata".
+
+    Returns:
+        list: Paths of the tables, in folder order.
+    """
+    paths = []
+    for folder in folders:
+        stems = sorted({
+            os.path.splitext(file)[0]
+            for file in os.listdir(folder)
+            if os.path.splitext(file)[1] in TABLE_EXTENSIONS.values() and os.path.splitext(file)[0].endswith(suffix)
+        })
+        paths.extend(resolve_table_path(os.path.join(folder, stem)) for stem in stems)
+    return paths
+
+
+def _is_list(value):
+    return isinstance(value, (list, tuple, np.ndarray))
+
+
+def _is_empty(value):
+    if isinstance(value, float):
+        return np.isnan(value)
+    return value is None or value is pd.NA or value is pd.NaT or (isinstance(value, str) and value == "")
+
+
+def _arrow_column(series, pa):
+    """Returns the values of a column in a form Arrow can store (see the module docstring)."""
+    values = series.astype(object)
+    is_list = values.map(_is_list)
+    if is_list.any() and not is_list.all():
+        if values[~is_list].map(_is_empty).all():
+            values = values.where(is_list, None)
+        else:
+            values = values.map(lambda value: str(list(value)) if _is_list(value) else value)
+    if is_list.any():
+        values = values.map(lambda value: list(value) if _is_list(value) else value)
+    try:
+        pa.array(values, from_pandas=True)
+        return values
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+        return values.map(lambda value: value if _is_empty(value) else str(value))
+
+
+def _timestamp_column(series):
+    """Converts ISO date strings to timestamps; returns None if any value is not a date."""
+    values = series.astype(object)
+    missing = values.map(lambda value: _is_empty(value) or str(value).strip() in PLACEHOLDER_VALUES)
+    try:
+        parsed = pd.to_datetime(values[~missing].map(str), format="ISO8601")
+    except (ValueError, TypeError):
+        return None
+    return parsed.reindex(series.index)
+
+
+def write_table(df, path, timestamp_columns=()):
+    """
+    Writes a DataFrame as CSV or Parquet, depending on the extension of `path`.
+
+    Args:
+        df (DataFrame): Table to write.
+        path (str): Output path (.csv or .parquet).
+        timestamp_columns (iterable): Columns stored as timestamps in Parquet if all their
+            values are ISO dates (placeholders become null); otherwise they stay text.
+    """
+    if not path.endswith(TABLE_EXTENSIONS["parquet"]):
+        df.to_csv(path, index=False)
+        return
+    import pyarrow as pa
+
+    table = pd.DataFrame(index=df.index)
+    for column in df.columns:
+        timestamps = _timestamp_column(df[column]) if column in timestamp_columns else None
+        table[column] = timestamps if timestamps is not None else _arrow_column(df[column], pa)
+    table.to_parquet(path, index=False, engine="pyarrow")
+
+
+class _ColumnProfile:
+    """What `write_table` needs to know about all values of a column, collected batch by batch."""
+
+    def __init__(self, timestamp):
+        self.lists = False
+        self.non_lists = False  # non-empty values that are not lists
+        self.text = False
+        self.missing = False
+        self.samples = {}  # one value per kind, for the type inference
+        self.timestamp = timestamp
+        self.timestamp_unit = None
+        self.timestamp_tz = None
+
+    def add(self, series):
+        values = series.astype(object)
+        is_list = values.map(_is_list)
+        self.lists = self.lists or bool(is_list.any())
+        self.non_lists = self.non_lists or not values[~is_list].map(_is_empty).all()
+        self.missing = self.missing or bool(values.isna().any())
+        for value in values:
+            if _is_list(value):
+                kind = ("list",) + tuple(sorted({type(item).__name__ for item in value}))
+            elif pd.isna(value):
+                continue
+            else:
+                kind = type(value).__name__
+            self.samples.setdefault(kind, value)
+        if self.timestamp:
+            self._add_timestamps(series)
+
+    def _add_timestamps(self, series):
+        timestamps = _timestamp_column(series)
+        if timestamps is None:
+            self.timestamp = False
+        elif timestamps.notna().any():
+            # The whole column is parsed with the finest unit of its values; mixed time zones stay text
+            unit, tz = timestamps.dt.unit, timestamps.dt.tz
+            if self.timestamp_unit is None:
+                self.timestamp_unit, self.timestamp_tz = unit, tz
+            elif str(tz) != str(self.timestamp_tz):
+                self.timestamp = False
+            else:
+                self.timestamp_unit = max(unit, self.timestamp_unit, key=_TIMESTAMP_UNITS.index)
+
+    @property
+    def timestamp_dtype(self):
+        if self.timestamp_unit is None:
+            # Column without dates (only placeholders)
+            return _timestamp_column(pd.Series([], dtype=object)).dtype
+        if self.timestamp_tz is None:
+            return np.dtype(f"datetime64[{self.timestamp_unit}]")
+        return pd.DatetimeTZDtype(self.timestamp_unit, self.timestamp_tz)
+
+    def convert(self, series):
+        """Converts the values of a batch like `write_table` converts the whole column."""
+        if self.timestamp:
+            timestamps = _timestamp_column(series)
+            if timestamps.isna().all():
+                return pd.Series(pd.NaT, index=series.index, dtype=self.timestamp_dtype)
+            return timestamps.astype(self.timestamp_dtype)
+        values = series.astype(object)
+        if self.lists and self.non_lists:
+            values = values.map(lambda value: str(list(value)) if _is_list(value) else value)
+        elif self.lists:
+            values = values.map(lambda value: list(value) if _is_list(value) else None)
+        if self.text:
+            values = values.map(lambda value: value if _is_empty(value) else str(value))
+        return values
+
+    def arrow_type(self, pa):
+        """Returns the Arrow type of the column, after all batches were added."""
+        if self.timestamp:
+            return pa.Array.from_pandas(pd.Series([], dtype=self.timestamp_dtype)).type
+        # Inferred like the column of the whole table, e.g. numbers with missing values are floats
+        samples = pd.Series(list(self.samples.values()) + [None] * self.missing)
+        try:
+            return pa.array(self.convert(samples), from_pandas=True).type
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+            # Like `_arrow_column`: a column Arrow cannot convert is stored as text
+            self.text = True
+            return pa.Array.from_pandas(self.convert(samples)).type
+
+
+def write_parquet_batches(batches, path, columns, timestamp_columns=()):
+    """
+    Writes row batches as one Parquet table, with the column types `write_table` would choose for
+    the whole table, without holding the table in memory: a first pass over the batches collects
+    the column types, a second pass converts and writes them with `pyarrow.parquet.ParquetWriter`.
+
+    Args:
+        batches (callable): Returns a new iterator over the batches (lists of row dicts) on every call.
+        path (str): Output path (.parquet).
+        columns (list): Columns in output order (missing keys are null).
+        timestamp_columns (iterable): Columns stored as timestamps if all their values are ISO dates.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    profiles = {column: _ColumnProfile(column in timestamp_columns) for column in columns}
+    for batch in batches():
+        df = pd.DataFrame(batch, columns=columns, dtype=object)
+        for column in columns:
+            profiles[column].add(df[column])
+    schema = pa.schema([pa.field(column, profiles[column].arrow_type(pa)) for column in columns])
+
+    writer = None
+    try:
+        for batch in batches():
+            df = pd.DataFrame(batch, columns=columns, dtype=object)
+            table = pd.DataFrame({column: profiles[column].convert(df[column]) for column in columns}, index=df.index)
+            arrow_table = pa.Table.from_pandas(table, schema=schema, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, arrow_table.schema)
+            writer.write_table(arrow_table)
+        if writer is None:
+            writer = pq.ParquetWriter(path, schema)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def read_table(path, **csv_options):
+    """
+    Reads a CSV or Parquet table, depending on the extension of `path`. List cells of
+    Parquet tables are returned as Python lists.
+
+    Args:
+        path (str): Table path (.csv or .parquet).
+        **csv_options: Options passed to `pandas.read_csv` (e.g. `dtype=str`).
+
+    Returns:
+        DataFrame: Table.
+    """
+    if not path.endswith(TABLE_EXTENSIONS["parquet"]):
+        return pd.read_csv(path, **csv_options)
+    df = pd.read_parquet(path, engine="pyarrow")
+    na_filter = csv_options.get("na_filter", True) and csv_options.get("keep_default_na", True)
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = df[column].map(lambda value: value.tolist() if isinstance(value, np.ndarray) else value)
+        if na_filter and (df[column].dtype == object or pd.api.types.is_string_dtype(df[column].dtype)):
+            df[column] = df[column].map(lambda value: None if isinstance(value, str) and value in CSV_NA_VALUES else value)
+    return df
@@ -8,8 +8,9 @@ It includes the following features:
 - Normalization of language codes (e.g., 'deu' -> 'de')
 - Merging alternate-language columns (e.g., 'dataset_description_GE' into 'dataset_description_DE')
 - ISO formatting of date fields
-- Cleaning of placeholder values like 'N/A'
+- Cleaning of placeholder values like 'N/A' (column-wise; only list literals are parsed)
 - Error logging via a shared logger
+- CSV or Parquet files (see `table_io`); Parquet list and timestamp columns are used as they are
 
 Typical usage:
     from transform_metadata_geocat import process_dataset_metadata, clean_csv_file
@@ -20,10 +21,12 @@ You can also run the module as a script to process and clean all expected geocat
     python transform_metadata_geocat.py
 """
 
+import numpy as np
 import pandas as pd
-import ast
 from datetime import datetime
 from functions.error_logger import log_error, log_start_message
+from functions.table_io import resolve_table_path, read_table, write_table
+from functions.literal_parser import parse_literal, may_be_list_literal, LIST_LITERAL_PREFIXES
 
 # Language code mappings
 language_mapping = {
@@ -51,9 +54,11 @@ values_to_remove = {"N/A", "[N/A]"}
 
 def parse_language_column(lang_value):
     """Parses and normalizes a language code or list of codes, mapping them to standard short codes."""
+    if isinstance(lang_value, list):
+        return sorted([language_mapping.get(lang, lang) for lang in lang_value])
     if isinstance(lang_value, str):
         try:
-            lang_list = ast.literal_eval(lang_value) if lang_value.startswith("[") else [lang_value]
+            lang_list = parse_literal(lang_value) if lang_value.startswith("[") else [lang_value]
             return sorted([language_mapping.get(lang, lang) for lang in lang_list])
         except Exception as e:
             log_error("Failed to parse language column", exception=e)
@@ -89,10 +94,14 @@ def transform_date(date_str):
 
 def clean_value(value):
     """Cleans a cell value by removing 'N/A', parsing lists, and trimming whitespace."""
+    if isinstance(value, list):
+        return [item for item in value if str(item).strip() not in values_to_remove] or ""
     try:
         if pd.isna(value) or str(value).strip() in values_to_remove:
             return ""
-        parsed_value = ast.literal_eval(value)
+        if isinstance(value, str) and not may_be_list_literal(value):
+            return value.strip()
+        parsed_value = parse_literal(value)
         if isinstance(parsed_value, list):
             parsed_value = [item for item in parsed_value if str(item).strip() not in values_to_remove]
             return parsed_value if parsed_value else ""
@@ -103,6 +112,44 @@ def clean_value(value):
     return str(value).strip()
 
 
+def clean_column(series):
+    """
+    Cleans a column like `series.map(clean_value)`, with column-wise string operations.
+
+    Text values are stripped and placeholders emptied in bulk; only values that can be list
+    literals (see `literal_parser.LIST_LITERAL_PREFIXES`) are parsed, once per distinct value. Other values
+    (lists and timestamps of Parquet tables) are cleaned one by one.
+
+    Args:
+        series (Series): Column of a metadata table.
+
+    Returns:
+        Series: Cleaned column (object dtype).
+    """
+    values = series.astype(object)
+    result = np.full(len(values), "", dtype=object)
+    missing = values.isna().to_numpy(dtype=bool)
+    is_text = values.map(type).eq(str).to_numpy()
+    other = ~missing & ~is_text
+    if other.any():
+        result[other] = values[other].map(clean_value).to_numpy()
+
+    if is_text.any():
+        positions = np.flatnonzero(is_text)
+        text = values[is_text]
+        stripped = text.str.strip()
+        kept = ~stripped.isin(values_to_remove).to_numpy()
+        parsed = kept & stripped.str[:1].isin(LIST_LITERAL_PREFIXES).to_numpy()
+        plain = kept & ~parsed
+        result[positions[plain]] = stripped.to_numpy()[plain]
+        if parsed.any():
+            candidates = text.to_numpy()[parsed]
+            cleaned = {value: clean_value(value) for value in dict.fromkeys(candidates)}
+            for position, value in zip(positions[parsed], candidates):
+                # Every cell gets its own list
+                result[position] = list(cleaned[value]) if isinstance(cleaned[value], list) else cleaned[value]
+    return pd.Series(result, index=series.index, name=series.name)
+
 
 def process_dataset_metadata(file_path):
     """Processes a dataset CSV file by parsing language codes, merging columns, and formatting dates.
@@ -111,7 +158,8 @@ def process_dataset_metadata(file_path):
         file_path (str): Path to the dataset metadata CSV file.
     """
     try:
-        df = pd.read_csv(file_path, dtype=str)
+        file_path = resolve_table_path(file_path)
+        df = read_table(file_path, dtype=str)
         
         # Rename dataset_title to dataset_title_UNKNOWN if it exists
         if "dataset_title" in df.columns:
@@ -134,7 +182,7 @@ def process_dataset_metadata(file_path):
             if col in df.columns:
                 df[col] = df[col].apply(transform_date)
 
-        df.to_csv(file_path, index=False)
+        write_table(df, file_path)
         print(f"Processed and saved: {file_path}")
         success_message = "Geocat metadata transformation completed successfully."
         log_error(success_message, level="info")
@@ -143,15 +191,17 @@ def process_dataset_metadata(file_path):
 
 
 def clean_csv_file(file_path):
-    """Cleans a CSV file by applying value normalization to each cell.
+    """Cleans a CSV file by applying value normalization to each cell (see `clean_column`).
 
     Args:
         file_path (str): Path to the CSV file to be cleaned.
     """
     try:
-        df = pd.read_csv(file_path, dtype=str)
-        df = df.applymap(clean_value)
-        df.to_csv(file_path, index=False)
+        file_path = resolve_table_path(file_path)
+        df = read_table(file_path, dtype=str)
+        for column in df.columns:
+            df[column] = clean_column(df[column])
+        write_table(df, file_path)
         print(f"Cleaned values in: {file_path}")
     except Exception as e:
         log_error(f"Failed to clean CSV file: {file_path}", exception=e)
@@ -3,25 +3,33 @@ Module for post-processing CSV metadata files extracted from DCAT-AP-CH XML meta
 Includes:
 - Sorting language fields
 - Formatting ISO date strings
-- Cleaning values like 'N/A' and empty list strings
+- Cleaning values like 'N/A' and empty list strings (list literals are parsed once per
+  distinct value, see `literal_parser`)
 
 Use `postprocess_all()` to apply all steps.
+
+The files can be CSV or Parquet (see `table_io`); a Parquet table is read with its
+list and timestamp columns and written back as Parquet.
 """
 
 import pandas as pd
-import ast
 from datetime import datetime
 import os
 import xml.etree.ElementTree as ET
 from functions.error_logger import log_error  # Import log_error from error_logger.py
+from functions.table_io import resolve_table_path, read_table, write_table
+from functions.literal_parser import parse_literal, parse_list, may_be_list_literal
 
 
 values_to_remove = {"N/A", "[N/A]","['N/A']"}
 
 def sort_languages_in_column(df, column):
-    """Sorts and normalizes language entries in a column if the values are lists."""
+    """Sorts and normalizes language entries in a column if the values are lists.
+
+    Text values must be list literals (parsed with the memoised `parse_list`, ValueError otherwise).
+    """
     if column in df.columns:
-        df[column] = df[column].apply(lambda x: sorted(eval(x)) if isinstance(x, str) else x)
+        df[column] = df[column].apply(lambda x: sorted(parse_list(x)) if isinstance(x, str) else sorted(x) if isinstance(x, list) else x)
     return df
 
 def transform_date(date_str):
@@ -29,6 +37,8 @@ def transform_date(date_str):
     try:
         if pd.isna(date_str) or str(date_str).strip() == "":
             return "N/A"
+        if isinstance(date_str, datetime):
+            return date_str.strftime("%Y-%m-%dT%H:%M:%S")
         return datetime.fromisoformat(date_str).strftime("%Y-%m-%dT%H:%M:%S")
     except Exception:
         return date_str
@@ -40,8 +50,10 @@ def clean_value(value):
 
     if pd.isna(value) or str(value).strip() in values_to_remove:
         return ""
+    if isinstance(value, str) and not may_be_list_literal(value):
+        return value.strip()
     try:
-        parsed_value = ast.literal_eval(value)
+        parsed_value = parse_literal(value)
         if isinstance(parsed_value, list):
             parsed_value = [item for item in parsed_value if str(item).strip() not in values_to_remove]
             return parsed_value if parsed_value else ""
@@ -53,6 +65,7 @@ import os
 
 def process_dataset_metadata(path):
     """Cleans and transforms the dataset metadata CSV file at the given path."""
+    path = resolve_table_path(path)
     if not os.path.exists(path):
         log_error(f"File not found: {path}", "error")
         return
@@ -60,7 +73,7 @@ def process_dataset_metadata(path):
         log_error(f"File is empty: {path}", "error")
         return
     try:
-        df = pd.read_csv(path, dtype=str)
+        df = read_table(path, dtype=str)
         ...
     except pd.errors.EmptyDataError:
         log_error(f"EmptyDataError: No columns to parse in file: {path}", "error")
@@ -73,6 +86,7 @@ import pandas as pd
 
 def process_distribution_metadata(path):
     """Cleans and transforms the distribution metadata CSV file at the given path."""
+    path = resolve_table_path(path)
     if not os.path.exists(path):
         log_error(f"File not found: {path}", "error")
         return
@@ -81,14 +95,14 @@ def process_distribution_metadata(path):
         return
 
     try:
-        df = pd.read_csv(path, dtype=str)
+        df = read_table(path, dtype=str)
         df = sort_languages_in_column(df, "distribution_language")
         for col in ["distribution_issued_date", "distribution_modified_date"]:
             if col in df.columns:
                 df[col] = df[col].apply(transform_date)
         for col in df.columns:
             df[col] = df[col].map(clean_value)
-        df.to_csv(path, index=False)
+        write_table(df, path)
         print(f"Processed: {path}")
     except Exception as e:
         log_error(f"Failed to process distribution metadata: {path}", "error", e)
@@ -96,6 +110,7 @@ def process_distribution_metadata(path):
 
 def process_contact_metadata(path):
     """Cleans and transforms the contact metadata CSV file at the given path."""
+    path = resolve_table_path(path)
     if not os.path.exists(path):
         log_error(f"File not found: {path}", "error")
         return
@@ -104,10 +119,10 @@ def process_contact_metadata(path):
         return
 
     try:
-        df = pd.read_csv(path, dtype=str)
+        df = read_table(path, dtype=str)
         for col in df.columns:
             df[col] = df[col].map(clean_value)
-        df.to_csv(path, index=False)
+        write_table(df, path)
         print(f"Processed: {path}")
     except Exception as e:
         log_error(f"Failed to process contact metadata: {path}", "error", e)
@@ -0,0 +1,278 @@
+"""
+Module: XML Canonicalizer
+
+Canonical ordering of metadata XML trees, so that the same metadata always produces
+the same file (and therefore the same hash in `dataset_change_detector`).
+
+The ordering is identical to the former recursive `sort_xml` of the opendata.swiss
+downloader: attributes are sorted by name and the children of every element are sorted
+by (tag, sorted attributes, serialised subtree). Instead of serialising every subtree
+again at every tree level, the tree is processed in a single bottom-up pass and a
+subtree is only serialised when it is needed to break a tie between siblings with the
+same tag and attributes (e.g. several keywords in the same language).
+
+`to_pretty_xml` writes the canonical tree as indented XML without blank lines. Its
+output is byte-identical to the former ElementTree -> minidom -> `toprettyxml` round-trip
+followed by removing blank lines, but it is produced directly from the element tree.
+
+`apply_pretty_layout` changes the text and tails of a tree in place so that it equals the
+tree obtained by parsing the output of `to_pretty_xml` again. This lets the cleaning step
+work on the downloaded tree without a write/parse round-trip.
+
+Functions:
+- canonicalize: Sorts attributes and children of a whole tree in place.
+- to_pretty_xml: Serialises a tree as indented XML without blank lines.
+- apply_pretty_layout: Applies the whitespace of `to_pretty_xml` + parsing to a tree in place.
+
+Dependencies:
+- xml.etree.ElementTree
+"""
+
+import re
+import xml.etree.ElementTree as ET
+
+# Characters at which str.splitlines() breaks lines
+_LINE_BREAKS = re.compile(r"[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+# Attribute values with these characters change when they are parsed again
+_ATTRIBUTE_WHITESPACE = re.compile(r"[\t\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+# Well-known prefixes of ElementTree, used if its registry (filled by ET.register_namespace) is not available
+_DEFAULT_NAMESPACE_MAP = {
+    "http://www.w3.org/XML/1998/namespace": "xml",
+    "http://www.w3.org/1999/xhtml": "html",
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#": "rdf",
+    "http://schemas.xmlsoap.org/wsdl/": "wsdl",
+    "http://www.w3.org/2001/XMLSchema": "xs",
+    "http://www.w3.org/2001/XMLSchema-instance": "xsi",
+    "http://purl.org/dc/elements/1.1/": "dc",
+}
+
+
+def _postorder(root):
+    """Returns all elements of the tree so that every element comes after its descendants."""
+    preorder = []
+    stack = [root]
+    while stack:
+        elem = stack.pop()
+        preorder.append(elem)
+        stack.extend(elem)
+    preorder.reverse()
+    return preorder
+
+
+def _sort_children(elem):
+    """
+    Sorts the children of an element whose subtrees are already canonical.
+
+    Args:
+        elem (Element): Parent element.
+    """
+    keys = [(child.tag, list(child.attrib.items())) for child in elem]
+    seen = {}
+    for index, (tag, attributes) in enumerate(keys):
+        seen.setdefault((tag, tuple(attributes)), []).append(index)
+
+    # The serialised subtree is only compared when tag and attributes are equal,
+    # so it is only computed for siblings that share both.
+    tie_breakers = [b""] * len(keys)
+    for indices in seen.values():
+        if len(indices) > 1:
+            for index in indices:
+                tie_breakers[index] = ET.tostring(elem[index], encoding='utf-8', method='xml')
+
+    order = sorted(range(len(keys)), key=lambda i: (keys[i][0], keys[i][1], tie_breakers[i]))
+    elem[:] = [elem[i] for i in order]
+
+
+def canonicalize(root):
+    """
+    Sorts XML attributes and child elements of the whole tree in place for consistent ordering.
+
+    Args:
+        root (Element): Root XML element to sort.
+
+    Returns:
+        Element: The same root element, now in canonical order.
+    """
+    for elem in _postorder(root):
+        if len(elem.attrib) > 1:
+            elem.attrib = dict(sorted(elem.attrib.items()))
+        if len(elem) > 1:
+            _sort_children(elem)
+    return root
+
+
+def _escape(text):
+    """Escapes character data and attribute values the way minidom writes them."""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if "\"" in text:
+        text = text.replace("\"", "&quot;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def _normalize_newlines(text):
+    """Applies the end-of-line handling of an XML parser to character data."""
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _write_element(elem, indent, addindent, qnames, out):
+    tag = qnames[elem.tag]
+    start = [indent, "<", tag]
+    for key, value in elem.items():
+        start.append(' %s="%s"' % (qnames[key], _escape(value)))
+    _write_children(elem, tag, "".join(start), indent, addindent, qnames, out)
+
+
+def _write_children(elem, tag, start, indent, addindent, qnames, out):
+    text = elem.text
+    if not len(elem):
+        if text:
+            out.append("%s>%s</%s>\n" % (start, _escape(_normalize_newlines(text)), tag))
+        else:
+            out.append(start + "/>\n")
+        return
+
+    out.append(start + ">\n")
+    child_indent = indent + addindent
+    # Whitespace-only text nodes would only produce blank lines, so they are skipped
+    if text and text.strip():
+        out.append("%s%s\n" % (child_indent, _escape(_normalize_newlines(text))))
+    for child in elem:
+        _write_element(child, child_indent, addindent, qnames, out)
+        tail = child.tail
+        if tail and tail.strip():
+            out.append("%s%s\n" % (child_indent, _escape(_normalize_newlines(tail))))
+    out.append("%s</%s>\n" % (indent, tag))
+
+
+def _qualified_names(root):
+    """
+    Allocates the namespace prefixes of a tree like `ET.tostring` does (registered prefixes,
+    else ns0, ns1, ... in document order).
+
+    Returns:
+        tuple: ({qualified name: serialised name}, {namespace URI: prefix})
+    """
+    # Same allocation as ElementTree's private _namespaces, kept here so the output (and the
+    # change detector hashes) do not depend on a private API
+    registered = getattr(ET, "_namespace_map", _DEFAULT_NAMESPACE_MAP)
+    qnames = {None: None}
+    namespaces = {}
+
+    def add_qname(qname):
+        if qname[:1] == "{":
+            uri, tag = qname[1:].rsplit("}", 1)
+            prefix = namespaces.get(uri)
+            if prefix is None:
+                prefix = registered.get(uri)
+                if prefix is None:
+                    prefix = "ns%d" % len(namespaces)
+                if prefix != "xml":
+                    namespaces[uri] = prefix
+            qnames[qname] = "%s:%s" % (prefix, tag) if prefix else tag
+        else:
+            qnames[qname] = qname
+
+    for elem in root.iter():
+        tag = elem.tag
+        if isinstance(tag, ET.QName):
+            tag = tag.text
+        if isinstance(tag, str) and tag not in qnames:
+            add_qname(tag)
+        for key, value in elem.items():
+            if isinstance(key, ET.QName):
+                key = key.text
+            if key not in qnames:
+                add_qname(key)
+            if isinstance(value, ET.QName) and value.text not in qnames:
+                add_qname(value.text)
+        if isinstance(elem.text, ET.QName) and elem.text.text not in qnames:
+            add_qname(elem.text.text)
+    return qnames, namespaces
+
+
+def to_pretty_xml(root, indent="  "):
+    """
+    Serialises an XML tree as indented XML without blank lines.
+
+    Args:
+        root (Element): Root XML element.
+        indent (str): Indentation per tree level.
+
+    Returns:
+        str: Pretty-printed XML string (without trailing newline).
+    """
+    # Prefixes as allocated by ET.tostring (and therefore by the former minidom round-trip)
+    qnames, namespaces = _qualified_names(root)
+
+    tag = qnames[root.tag]
+    start = ["<", tag]
+    for uri, prefix in sorted(namespaces.items(), key=lambda item: item[1]):
+        start.append(' xmlns:%s="%s"' % (prefix, _escape(uri)))
+    for key, value in root.items():
+        start.append(' %s="%s"' % (qnames[key], _escape(value)))
+
+    out = ['<?xml version="1.0" ?>\n']
+    _write_children(root, tag, "".join(start), "", indent, qnames, out)
+    return "\n".join([line for line in "".join(out).splitlines() if line.strip()])
+
+
+def _pretty_text(text):
+    """
+    Returns the text of a leaf element as it is read back from `to_pretty_xml` output:
+    line breaks become "\\n" and whitespace-only lines inside the text are dropped.
+    """
+    text = _normalize_newlines(text)
+    if not _LINE_BREAKS.search(text):
+        return text
+    # The first and last line share their line with the start and end tag, so they are always kept
+    lines = ("<" + text + ">").splitlines()
+    middle = [line for line in lines[1:-1] if line.strip()]
+    return "\n".join([lines[0][1:]] + middle + [lines[-1][:-1]])
+
+
+def apply_pretty_layout(root, indent="  "):
+    """
+    Changes the text and tails of a tree in place to match `ET.fromstring(to_pretty_xml(root, indent))`.
+
+    Trees with mixed content (non-whitespace text next to child elements) or attribute values
+    containing tabs or line breaks are left unchanged, as the parser would rewrite them.
+
+    Args:
+        root (Element): Root XML element.
+        indent (str): Indentation per tree level.
+
+    Returns:
+        bool: True if the layout was applied, False if the tree is not supported and unchanged.
+    """
+    for elem in root.iter():
+        for value in elem.attrib.values():
+            if _ATTRIBUTE_WHITESPACE.search(value):
+                return False
+        if len(elem):
+            if elem.text and elem.text.strip():
+                return False
+            for child in elem:
+                if child.tail and child.tail.strip():
+                    return False
+
+    stack = [(root, "")]
+    while stack:
+        elem, elem_indent = stack.pop()
+        if len(elem):
+            child_indent = elem_indent + indent
+            elem.text = "\n" + child_indent
+            for child in elem:
+                child.tail = "\n" + child_indent
+                stack.append((child, child_indent))
+            elem[-1].tail = "\n" + elem_indent
+        else:
+            elem.text = _pretty_text(elem.text) if elem.text else None
+    root.tail = None
+    return True
@@ -1,111 +1,233 @@
 import os
-import re
+import threading
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
 from functions.error_logger import log_error  # Import log_error from error_logger.py
-from functions.statistics_logger import log_portal_result, save_statistics  # Import statistics tracking
+from functions.statistics_logger import log_portal_result, save_statistics, add_portal_counts  # Import statistics tracking
+from functions.metadata_store import MetadataStore
+from functions.text_sanitizer import sanitize_text, sanitize_tail, sanitize_attribute
 
 # Counters for successful and failed XML files
 success_count = 0
 error_count = 0
+_count_lock = threading.Lock()  # Documents are also cleaned by download worker threads
 
 # Define the portal name for tracking (Update as needed)
 PORTAL_NAME = "opendata.swiss"  # Change this dynamically based on the process
 
-def remove_html_tags(text):
-    """Remove HTML tags from a string while preserving its content."""
-    clean = re.compile('<.*?>')
-    return re.sub(clean, '', text)
+# Parallel cleaning: number of shards per worker process (smaller shards balance the load)
+SHARDS_PER_WORKER = 4
 
-def clean_xml_file(file_path):
-    """Clean an XML file by removing HTML tags and formatting it properly."""
-    global success_count, error_count  # Access the counters
+def clean_xml_file(file_path, portal_name=None):
+    """
+    Clean an XML file by removing HTML tags and formatting it properly.
 
+    Returns:
+        bool: True if the file was cleaned, otherwise False.
+    """
     if not os.path.exists(file_path):
         log_error(f"File not found: {file_path}", "error")
-        log_portal_result(PORTAL_NAME, "Clean XML Files", success=False)
-        error_count += 1
-        return
+        record_clean_result(False, portal_name)
+        return False
+
+    with open(file_path, "rb") as file:
+        cleaned_xml = clean_xml_data(file.read(), file_path, portal_name)
+    if cleaned_xml is None:
+        return False
+
+    try:
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(cleaned_xml)
+        record_clean_result(True, portal_name)
+        return True
+    except Exception as e:
+        log_error(f"Error writing cleaned XML for {file_path}", "error", e)
+        record_clean_result(False, portal_name)
+        return False
+
+def record_clean_result(success, portal_name=None):
+    """Counts a cleaned (or failed) document for the statistics."""
+    global success_count, error_count
+    with _count_lock:
+        if success:
+            success_count += 1  # Increment success count
+        else:
+            error_count += 1
+    log_portal_result(portal_name or PORTAL_NAME, "Clean XML Files", success=success)
+
+def clean_xml_root(root):
+    """
+    Sanitize the text, tails and attribute values of all elements of a parsed XML tree (in place):
+    HTML tags are removed and line breaks become spaces (see `text_sanitizer`).
+    """
+    for elem in root.iter():
+        if elem.text:
+            elem.text = sanitize_text(elem.text)
+        if elem.tail:
+            elem.tail = sanitize_tail(elem.tail)
+        for key, value in elem.items():
+            sanitized = sanitize_attribute(value)
+            if sanitized is not value:
+                elem.set(key, sanitized)
 
+def serialize_cleaned_xml(root):
+    """
+    Serialize a cleaned XML tree in the cleaner's output format: the document on a single line.
+
+    Args:
+        root (Element): XML tree cleaned by `clean_xml_root`, so it contains no line breaks.
+
+    Returns:
+        str: Serialized XML with a trailing newline.
+    """
+    return ET.tostring(root, encoding='utf-8').decode('utf-8') + "\n"
+
+def clean_xml_data(xml_data, source, portal_name=None):
+    """
+    Clean an XML document by removing HTML tags and formatting it properly.
+
+    Args:
+        xml_data (bytes or str): XML document.
+        source (str): File path or dataset name, used in log messages.
+        portal_name (str, optional): Portal for the statistics (default: PORTAL_NAME).
+
+    Returns:
+        str or None: Cleaned XML, None if the document could not be cleaned (already logged).
+    """
     try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
+        root = ET.fromstring(xml_data)
     except ET.ParseError as e:
-        log_error(f"XML parsing failed for {file_path}", "error", e)
-        log_portal_result(PORTAL_NAME, "Clean XML Files", success=False)
-        error_count += 1
-        return
+        log_error(f"XML parsing failed for {source}", "error", e)
+        record_clean_result(False, portal_name)
+        return None
     except Exception as e:
-        log_error(f"Unexpected error while parsing {file_path}", "error", e)
-        log_portal_result(PORTAL_NAME, "Clean XML Files", success=False)
-        error_count += 1
-        return
+        log_error(f"Unexpected error while parsing {source}", "error", e)
+        record_clean_result(False, portal_name)
+        return None
 
     try:
-        for elem in root.iter():
-            if elem.text:
-                elem.text = remove_html_tags(elem.text)
+        clean_xml_root(root)
     except Exception as e:
-        log_error(f"Error while processing text in {file_path}", "error", e)
-        log_portal_result(PORTAL_NAME, "Clean XML Files", success=False)
-        error_count += 1
-        return
+        log_error(f"Error while processing text in {source}", "error", e)
+        record_clean_result(False, portal_name)
+        return None
 
     try:
-        cleaned_xml = ET.tostring(root, encoding='utf-8').decode('utf-8')
-        cleaned_xml = cleaned_xml.replace('\n', '').replace('\t', '')
-        cleaned_xml = re.sub(r"(&#13;|&#10;|&#xD;|&#xA;)", " ", cleaned_xml)
+        return serialize_cleaned_xml(root)
+    except Exception as e:
+        log_error(f"Error serializing cleaned XML for {source}", "error", e)
+        record_clean_result(False, portal_name)
+        return None
 
-        cleaned_lines = []
-        temp_line = ""
+def split_into_shards(items, workers):
+    """Split a list into about `workers * SHARDS_PER_WORKER` contiguous shards."""
+    shard_count = max(1, min(len(items), workers * SHARDS_PER_WORKER))
+    size = -(-len(items) // shard_count)
+    return [items[start:start + size] for start in range(0, len(items), size)]
 
-        for line in cleaned_xml.splitlines():
-            line = line.strip()
-            if not line.endswith(">"):
-                temp_line += line + " "
-            else:
-                temp_line += line
-                cleaned_lines.append(temp_line.strip())
-                temp_line = ""
+def clean_file_shard(file_paths, portal_name):
+    """
+    Worker: clean a shard of XML files.
 
-        if temp_line:
-            cleaned_lines.append(temp_line.strip())
+    The statistics of a worker process are not visible to the main process,
+    so the counts are returned and aggregated by `process_folder`.
 
-        with open(file_path, "w", encoding="utf-8") as file:
-            file.write("\n".join(cleaned_lines) + "\n")
+    Returns:
+        tuple: (number of cleaned files, number of failed files)
+    """
+    cleaned = sum(1 for file_path in file_paths if clean_xml_file(file_path, portal_name))
+    return cleaned, len(file_paths) - cleaned
 
-        success_count += 1  # Increment success count
-        log_portal_result(PORTAL_NAME, "Clean XML Files", success=True)
+def clean_store_shard(store_path, names, portal_name):
+    """
+    Worker: clean a shard of the documents of a metadata store.
 
-    except Exception as e:
-        log_error(f"Error writing cleaned XML for {file_path}", "error", e)
-        log_portal_result(PORTAL_NAME, "Clean XML Files", success=False)
-        error_count += 1
+    The worker only reads from the store; the cleaned documents are returned and
+    written by the main process, so there is a single writer.
+
+    Returns:
+        tuple: (list of (name, cleaned XML), number of failed documents)
+    """
+    results = []
+    failed = 0
+    with MetadataStore(store_path) as store:
+        for name in names:
+            xml_data = store.get(name)
+            cleaned_xml = clean_xml_data(xml_data, name, portal_name) if xml_data is not None else None
+            if cleaned_xml is None:
+                failed += 1
+            else:
+                results.append((name, cleaned_xml))
+    return results, failed
 
-def process_folder(folder_path):
-    """Process all XML files in a specified folder."""
+def record_worker_counts(portal_name, cleaned, failed):
+    """Aggregate the counts of a worker process into the module counters and the statistics."""
     global success_count, error_count
+    with _count_lock:
+        success_count += cleaned
+        error_count += failed
+    add_portal_counts(portal_name, "Clean XML Files", success=cleaned, fail=failed)
 
-    if not isinstance(folder_path, str):
-        log_error(f"Expected a string path, but got {type(folder_path)}: {folder_path}", "error")
-        return
+def process_store(store, workers=1, portal_name=None):
+    """
+    Clean all XML documents of a metadata store in place.
 
-    if not os.path.exists(folder_path):
-        log_error(f"Warning: Folder '{folder_path}' not found. Skipping...", "error")
+    Args:
+        store (MetadataStore): Packed metadata store of the portal.
+        workers (int): Number of worker processes (1 = sequential).
+        portal_name (str, optional): Portal for the statistics (default: PORTAL_NAME).
+    """
+    portal_name = portal_name or PORTAL_NAME
+    names = store.names()
+    if not names:
+        log_error(f"No XML documents found in '{store.path}'. Skipping...", "info")
         return
 
-    xml_files = [f for f in os.listdir(folder_path) if f.endswith(".xml")]
-    if not xml_files:
-        log_error(f"No XML files found in '{folder_path}'. Skipping...", "info")
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(clean_store_shard, store.path, shard, portal_name)
+                for shard in split_into_shards(names, workers)
+            ]
+            for future in futures:
+                results, failed = future.result()
+                store.put_many(results)
+                record_worker_counts(portal_name, len(results), failed)
         return
 
-    for filename in xml_files:
-        file_path = os.path.join(folder_path, filename)
-        clean_xml_file(file_path)
+    for name, xml_data in store.items():
+        cleaned_xml = clean_xml_data(xml_data, name, portal_name)
+        if cleaned_xml is None:
+            continue
+        try:
+            store.put(name, cleaned_xml)
+            record_clean_result(True, portal_name)
+        except Exception as e:
+            log_error(f"Error writing cleaned XML for {name}", "error", e)
+            record_clean_result(False, portal_name)
 
+def process_folder(folder_path, store=None, workers=1, portal_name=None):
+    """
+    Process all XML files in a specified folder.
+    With a MetadataStore the documents of the store are cleaned instead of loose files.
 
-def process_folder(folder_path):
-    """Process all XML files in a specified folder."""
-    global success_count, error_count
+    With `workers > 1` the files are split into shards that are cleaned by a process pool;
+    the per-worker success/failure counts are aggregated into the statistics. On Windows
+    the calling script must guard its entry point with `if __name__ == "__main__":`.
+
+    Args:
+        folder_path (str): Folder with the XML files.
+        store (MetadataStore, optional): Packed metadata store of the portal.
+        workers (int): Number of worker processes (1 = sequential).
+        portal_name (str, optional): Portal for the statistics (default: PORTAL_NAME).
+            Passed to the worker processes explicitly, as they do not see changes of PORTAL_NAME.
+    """
+    portal_name = portal_name or PORTAL_NAME
+    workers = max(1, workers or 1)
+
+    if store is not None:
+        process_store(store, workers, portal_name)
+        return
 
     if not os.path.exists(folder_path):
         log_error(f"Folder '{folder_path}' not found. Skipping...", "warning")
@@ -117,6 +239,30 @@ def process_folder(folder_path):
         log_error(f"No XML files found in '{folder_path}'. Skipping...", "info")
         return
 
-    for filename in xml_files:
-        file_path = os.path.join(folder_path, filename)
-        clean_xml_file(file_path)
+    file_paths = [os.path.join(folder_path, filename) for filename in xml_files]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(clean_file_shard, shard, portal_name)
+                for shard in split_into_shards(file_paths, workers)
+            ]
+            for future in futures:
+                cleaned, failed = future.result()
+                record_worker_counts(portal_name, cleaned, failed)
+        return
+
+    for file_path in file_paths:
+        clean_xml_file(file_path, portal_name)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Clean all XML metadata files of a folder.")
+    parser.add_argument("--dir", type=str, required=True, help="Folder containing the XML files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--portal", type=str, default=PORTAL_NAME, help="Name of the portal for logging")
+    args = parser.parse_args()
+
+    process_folder(args.dir, workers=args.workers, portal_name=args.portal)
+    save_statistics()
@@ -0,0 +1,242 @@
+"""
+Module: XML Path Index
+
+Single-traversal evaluation of ElementPath expressions for the metadata extractors.
+
+`Element.find` / `findall` re-compile (cache lookup) and re-run every path, and each
+`.//` step rescans the whole subtree, so a record with twenty field paths is walked
+twenty times. `PathIndex` walks the tree once and indexes the element positions (document
+order) by tag; a `.//tag` step is then a binary search in the positions of `tag` inside
+the subtree of the context element. Paths are compiled once per process, and the results of shared
+prefixes (e.g. `.//gmd:identificationInfo`) are reused within a document.
+
+The results are identical to ElementTree, including the order and the duplicates that
+nested matches produce: the steps are evaluated exactly like `xml.etree.ElementPath`
+(context elements in order, descendants in document order). Supported are child steps,
+`.//` descendant steps, `.` and `[@attribute='value']` predicates; any other path falls
+back to ElementTree.
+
+Usage:
+    index = PathIndex(root, namespaces)
+    title = index.findtext(".//gmd:title/gco:CharacterString")
+    for element in index.findall(".//gmd:keyword"):
+        ...
+
+Functions:
+- compile_path: Compiles an ElementPath expression into steps.
+- compile_plan: Compiles the paths of a mapping once, for all its documents.
+
+Dependencies:
+- bisect
+- xml.etree.ElementPath
+"""
+
+from bisect import bisect_right
+from functools import lru_cache
+from xml.etree.ElementPath import xpath_tokenizer
+
+CHILD = "child"
+DESCENDANT = "descendant"
+ATTRIBUTE_EQUALS = "attribute_equals"
+_UNCOMPILED = object()
+
+
+@lru_cache(maxsize=512)
+def _compile(path, namespace_items):
+    if path[-1:] == "/":
+        return None
+    tokens = list(xpath_tokenizer(path, dict(namespace_items)))
+    steps = []
+    position = 0
+    while position < len(tokens):
+        operator, tag = tokens[position]
+        if operator == "." and not tag:
+            position += 1
+        elif operator == "/" and not tag:
+            position += 1
+        elif operator == "//" and not tag:
+            following = tokens[position + 1] if position + 1 < len(tokens) else None
+            if following is None or following[0] or "*" in following[1]:
+                return None
+            tag = following[1]
+            steps.append((DESCENDANT, tag[2:] if tag[:2] == "{}" else tag))
+            position += 2
+        elif not operator and tag:
+            if "*" in tag:
+                return None
+            steps.append((CHILD, tag[2:] if tag[:2] == "{}" else tag))
+            position += 1
+        elif operator == "[":
+            predicate = tokens[position:position + 6]
+            if len(predicate) < 6 or [token[0] for token in predicate[:4]] != ["[", "@", "", "="] or predicate[5][0] != "]":
+                return None
+            value = predicate[4][0]
+            if value[:1] not in ("'", '"'):
+                return None
+            steps.append((ATTRIBUTE_EQUALS, predicate[2][1], value[1:-1]))
+            position += 6
+        else:
+            return None
+    return tuple(steps)
+
+
+def compile_path(path, namespaces=None):
+    """
+    Compiles an ElementPath expression into steps.
+
+    Args:
+        path (str): Path relative to the context element, e.g. ".//gmd:title/gco:CharacterString".
+        namespaces (dict, optional): Prefix to namespace URI mapping.
+
+    Returns:
+        tuple or None: Steps, None if the path uses syntax `PathIndex` does not support.
+    """
+    return _compile(path, tuple(sorted((namespaces or {}).items())))
+
+
+def compile_plan(paths, namespaces=None):
+    """
+    Compiles a set of paths for `PathIndex(..., plan=...)`.
+
+    Args:
+        paths (iterable): ElementPath expressions.
+        namespaces (dict, optional): Prefix to namespace URI mapping.
+
+    Returns:
+        dict: Steps by path (None for paths that fall back to ElementTree).
+    """
+    return {path: compile_path(path, namespaces) for path in paths}
+
+
+class PathIndex:
+    """
+    Tag index of a parsed XML tree, built in a single traversal, with ElementTree-compatible find functions.
+    """
+
+    def __init__(self, root, namespaces=None, plan=None):
+        """
+        Args:
+            root (Element): Root element of the parsed document.
+            namespaces (dict, optional): Prefix to namespace URI mapping used by the paths.
+            plan (dict, optional): Compiled steps by path (see `compile_plan`), shared by the
+                documents of a mapping; paths missing from it are compiled and added.
+        """
+        self.root = root
+        self.namespaces = namespaces
+        self._namespace_items = tuple(sorted((namespaces or {}).items()))
+        self._plan = {} if plan is None else plan
+        self._elements = list(root.iter())
+        self._positions = dict(zip(self._elements, range(len(self._elements))))
+        by_tag = {}
+        for position, element in enumerate(self._elements):
+            positions = by_tag.get(element.tag)
+            if positions is None:
+                by_tag[element.tag] = [position]
+            else:
+                positions.append(position)
+        self._by_tag = by_tag
+        self._subtree_ends = {}
+        self._results = {}
+
+    def _tag_positions(self, tag):
+        return self._by_tag.get(tag, ())
+
+    def _descendants(self, element, tag):
+        positions = self._tag_positions(tag)
+        if not positions:
+            return []
+        start = self._positions[element]
+        end = self._subtree_ends.get(start)
+        if end is None:
+            end = self._subtree_ends[start] = start + len(list(element.iter())) - 1
+        first = bisect_right(positions, start)
+        last = bisect_right(positions, end, first)
+        elements = self._elements
+        return [elements[position] for position in positions[first:last]]
+
+    def _apply(self, step, elements):
+        if step[0] == DESCENDANT:
+            if len(elements) == 1:
+                return self._descendants(elements[0], step[1])
+            result = []
+            for element in elements:
+                result.extend(self._descendants(element, step[1]))
+            return result
+        if step[0] == CHILD:
+            tag = step[1]
+            return [child for element in elements for child in element if child.tag == tag]
+        attribute, value = step[1], step[2]
+        return [element for element in elements if element.get(attribute) == value]
+
+    def _evaluate(self, context, steps):
+        if context is not self.root:
+            result = [context]
+            for step in steps:
+                result = self._apply(step, result)
+                if not result:
+                    break
+            return result
+        # Paths from the root share their prefixes (e.g. .//gmd:identificationInfo), so their results are kept
+        result = self._results.get(steps)
+        if result is None:
+            result = self._apply(steps[-1], self._evaluate(context, steps[:-1])) if steps else [context]
+            self._results[steps] = result
+        return result
+
+    def _first(self, step, elements):
+        # First result of the last step, without materialising all of them
+        if step[0] == DESCENDANT:
+            positions = self._tag_positions(step[1])
+            if positions:
+                for element in elements:
+                    start = self._positions[element]
+                    index = bisect_right(positions, start)
+                    if index < len(positions):
+                        end = self._subtree_ends.get(start)
+                        if end is None:
+                            end = self._subtree_ends[start] = start + len(list(element.iter())) - 1
+                        if positions[index] <= end:
+                            return self._elements[positions[index]]
+            return None
+        if step[0] == CHILD:
+            tag = step[1]
+            for element in elements:
+                for child in element:
+                    if child.tag == tag:
+                        return child
+            return None
+        attribute, value = step[1], step[2]
+        for element in elements:
+            if element.get(attribute) == value:
+                return element
+        return None
+
+    def findall(self, path, context=None):
+        """Returns all elements matching `path`, like `Element.findall`."""
+        context = self.root if context is None else context
+        steps = self._plan.get(path, _UNCOMPILED)
+        if steps is _UNCOMPILED:
+            steps = self._plan[path] = _compile(path, self._namespace_items)
+        if steps is None:
+            return context.findall(path, self.namespaces)
+        return list(self._evaluate(context, steps))
+
+    def find(self, path, context=None):
+        """Returns the first element matching `path` or None, like `Element.find`."""
+        context = self.root if context is None else context
+        steps = self._plan.get(path, _UNCOMPILED)
+        if steps is _UNCOMPILED:
+            steps = self._plan[path] = _compile(path, self._namespace_items)
+        if steps is None:
+            return context.find(path, self.namespaces)
+        if not steps:
+            return context
+        previous = self._evaluate(context, steps[:-1])
+        return self._first(steps[-1], previous) if previous else None
+
+    def findtext(self, path, default=None, context=None):
+        """Returns the text of the first element matching `path`, like `Element.findtext`."""
+        element = self.find(path, context)
+        if element is None:
+            return default
+        return element.text or ""